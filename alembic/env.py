@@ -6,6 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 
 import models.entities
+from models.search_index import BOOKS_FTS_TABLE
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -13,7 +14,8 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-fileConfig(config.config_file_name)
+# Migrations also run in-process (initialization.migrate); keep the application's loggers enabled
+fileConfig(config.config_file_name, disable_existing_loggers=False)
 # if config.config_file_name is not None:
 #     fileConfig(config.config_file_name)
 
@@ -23,6 +25,14 @@ fileConfig(config.config_file_name)
 # target_metadata = mymodel.Base.metadata
 target_metadata = models.entities.Base.metadata
 
+
+def include_name(name, type_, parent_names):
+    # The FTS5 index and its shadow tables are managed by hand (models/search_index.py), not by autogenerate
+    if type_ == "table":
+        return not name.startswith(BOOKS_FTS_TABLE)
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +57,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -60,6 +71,14 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # initialization.migrate passes the application's own connection; the alembic CLI connects to sqlalchemy.url
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -68,7 +87,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
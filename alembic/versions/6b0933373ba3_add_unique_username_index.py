@@ -0,0 +1,26 @@
+"""Add unique username index
+
+Revision ID: 6b0933373ba3
+Revises: c5e2d8a41f93
+Create Date: 2026-10-18 18:05:12.730418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b0933373ba3'
+down_revision: Union[str, None] = 'c5e2d8a41f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fails if two accounts already share a username; those have to be merged or renamed first
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_username'), table_name='users')
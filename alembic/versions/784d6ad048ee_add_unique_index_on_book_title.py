@@ -0,0 +1,27 @@
+"""Add unique index on book title
+
+Revision ID: 784d6ad048ee
+Revises: fd65dc787327
+Create Date: 2026-10-18 11:48:05.731642
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '784d6ad048ee'
+down_revision: Union[str, None] = 'fd65dc787327'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The model declares title unique but the table rebuild in 6ff93ddcb6e1 dropped the constraint;
+    # the bulk import upserts on it.
+    op.create_index('uq_books_title', 'books', ['title'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_books_title', table_name='books')
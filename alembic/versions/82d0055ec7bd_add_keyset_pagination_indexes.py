@@ -0,0 +1,27 @@
+"""Add keyset pagination indexes
+
+Revision ID: 82d0055ec7bd
+Revises: 6ff93ddcb6e1
+Create Date: 2026-10-18 10:12:41.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '82d0055ec7bd'
+down_revision: Union[str, None] = '6ff93ddcb6e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_books_title_id', 'books', ['title', 'id'], unique=False)
+    op.create_index('ix_books_year_id', 'books', ['year', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_year_id', table_name='books')
+    op.drop_index('ix_books_title_id', table_name='books')
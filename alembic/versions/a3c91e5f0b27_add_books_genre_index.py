@@ -0,0 +1,25 @@
+"""Add books genre index
+
+Revision ID: a3c91e5f0b27
+Revises: 784d6ad048ee
+Create Date: 2026-10-18 13:02:17.204815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c91e5f0b27'
+down_revision: Union[str, None] = '784d6ad048ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_books_genre_id_id', 'books', ['genre_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_genre_id_id', table_name='books')
@@ -0,0 +1,35 @@
+"""Add change log
+
+Revision ID: c5e2d8a41f93
+Revises: a3c91e5f0b27
+Create Date: 2026-10-18 14:21:36.518093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e2d8a41f93'
+down_revision: Union[str, None] = 'a3c91e5f0b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('change_log',
+                    sa.Column('seq', sa.Integer(), nullable=False),
+                    sa.Column('table_name', sa.String(), nullable=False),
+                    sa.Column('row_id', sa.Integer(), nullable=True),
+                    sa.Column('changed_at', sa.Float(), nullable=False),
+                    sa.PrimaryKeyConstraint('seq'),
+                    sqlite_autoincrement=True
+                    )
+    op.create_index(op.f('ix_change_log_changed_at'), 'change_log', ['changed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_change_log_changed_at'), table_name='change_log')
+    op.drop_table('change_log')
@@ -1,15 +1,18 @@
+import time
 from datetime import datetime, timedelta
 
-import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette import status
 
-from database import get_db
+from cache import TTLCache
+from database import get_session, run_in_session
 from enums import UserRole
 from error_messages import ErrorMessages
-from models import User
+from metrics import JWT_DECODE_SECONDS
+from models import User, Principal
 
 from config import get_settings
 
@@ -20,20 +23,65 @@ JWT_SECRET = settings.JWT_SECRET
 JWT_ALGORITHM = settings.JWT_ALGORITHM
 JWT_DEFAULT_EXPIRATION_HOURS = settings.JWT_EXPIRATION_HOURS
 
+# Authenticated principals keyed by (sub, iat), so each issued token resolves its user at most once per TTL
+principal_cache: TTLCache[tuple[str, int | None], Principal] = TTLCache(settings.PRINCIPAL_CACHE_SIZE,
+                                                                        settings.PRINCIPAL_CACHE_TTL_SECONDS)
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
-                     db: Session = Depends(get_db)):
-    token = credentials.credentials
-    username = decode_jwt(token)
 
-    user = db.query(User).filter(User.username == username).first()
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
+                           db: Session | AsyncSession = Depends(get_session)) -> Principal:
+    return await resolve_principal(decode_jwt_claims(credentials.credentials), db)
+
+
+async def resolve_principal(claims: dict, db: Session | AsyncSession) -> Principal:
+    """
+    The principal a verified token's claims stand for, from the principal cache or the users table.
+    Args:
+        claims (dict): Claims of a token that passed decode_jwt_claims.
+        db (Session | AsyncSession): Session for the lookup on a cache miss.
+    Returns:
+        Principal: The authenticated principal.
+    Raises:
+        HTTPException: If the user no longer exists.
+    """
+    username = claims["sub"]
+
+    if settings.TRUST_JWT_ROLE_CLAIM and claims.get("role"):
+        return Principal(id=claims.get("uid"), username=username, role=claims["role"])
+
+    # Replay users changed by other workers first, so a role or password change there takes effect here within
+    # the change feed's poll interval rather than the cache TTL
+    from service.versions import change_feed  # the services import this module
+
+    if change_feed.due(db.sync_session if isinstance(db, AsyncSession) else db):
+        await run_in_session(db, change_feed.catch_up)
+
+    cache_key = (username, claims.get("iat"))
+    principal = principal_cache.get(cache_key)
+    if principal is not None:
+        return principal
+
+    user = await run_in_session(db, lambda session: session.query(User).filter(User.username == username).first())
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=ErrorMessages.USER_NOT_FOUND.value)
-    return user
+
+    principal = Principal.model_validate(user)
+    principal_cache.set(cache_key, principal)
+    return principal
+
+
+def invalidate_principals(user_id: int | None) -> int:
+    """
+    Drop every cached principal of a user, e.g. after a password or role change. Called for each committed write
+    to the users table, local or replayed from the change feed.
+    Args: user_id (int | None): The ID of the changed user; None when any user may have changed.
+    Returns: int: The number of cache entries removed.
+    """
+    return principal_cache.pop_where(lambda _, principal: user_id is None or principal.id == user_id)
 
 
 def filter_for_role(required_role: UserRole):
-    def role_checker(current_user: User = Depends(get_current_user)):
+    async def role_checker(current_user: Principal = Depends(get_current_user)):
         if required_role.value == "ANY":
             return current_user
         if current_user.role != required_role.name:
@@ -49,17 +97,23 @@ def generate_jwt(data: dict, expires_in: timedelta | None = None) -> str:
         expire = datetime.now() + expires_in
     else:
         expire = datetime.now() + timedelta(hours=JWT_DEFAULT_EXPIRATION_HOURS)
-    to_encode.update({'exp': expire})
+    to_encode.update({'exp': expire, 'iat': int(time.time())})
+    import jwt  # PyJWT pulls in cryptography; imported on first use rather than at startup
+
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
     return encoded_jwt
 
 
-def decode_jwt(token: str) -> str:
+def decode_jwt_claims(token: str) -> dict:
+    import jwt  # see generate_jwt
+
     try:
+        started = time.perf_counter()
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
+        if settings.METRICS_ENABLED:
+            JWT_DECODE_SECONDS.observe(time.perf_counter() - started)
+        if payload.get("sub") is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail=ErrorMessages.COULD_NOT_VALIDATE_CREDENTIALS.value)
     except jwt.ExpiredSignatureError:
@@ -67,5 +121,8 @@ def decode_jwt(token: str) -> str:
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail=ErrorMessages.INVALID_TOKEN.value)
 
-    return username
+    return payload
+
 
+def decode_jwt(token: str) -> str:
+    return decode_jwt_claims(token)["sub"]
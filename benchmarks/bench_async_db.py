@@ -0,0 +1,139 @@
+"""
+Compare request latency of the sync and async database paths under mixed concurrent load.
+
+Each mode runs in its own process (settings are read at import time) against the same seeded SQLite file,
+driving main.app in-process through httpx's ASGI transport, so any query that blocks the event loop shows
+up directly in the tail latency of the other in-flight requests.
+
+    python -m benchmarks.bench_async_db --books 20000 --concurrency 50 --requests 3000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def seed(database_url: str, books: int):
+    from sqlalchemy import create_engine, insert
+
+    from initialization import migrate
+    from models import Book, Genre
+
+    engine = create_engine(database_url)
+    # Stamped with the schema revision, so the app's startup check accepts the database
+    migrate(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Genre), [{'name': f'Genre {i}'} for i in range(1, 21)])
+        conn.execute(insert(Book), [
+            {'title': f'Seed Book {i}', 'author': f'Author {i % 997}', 'year': 1900 + i % 125,
+             'pages': 50 + i % 900, 'genre_id': 1 + i % 20}
+            for i in range(books)
+        ])
+    engine.dispose()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def drive(concurrency: int, total_requests: int) -> dict:
+    import httpx
+
+    from auth import generate_jwt
+    from config import get_settings
+    from initialization import initialize_db
+    from main import app
+
+    initialize_db()
+    token = generate_jwt({'sub': get_settings().ADMIN_USERNAME, 'role': 'ADMIN'})
+    headers = {'Authorization': f'Bearer {token}'}
+    rng = random.Random(42)
+    latencies: dict[str, list[float]] = {}
+    counter = iter(range(total_requests))
+
+    async def one_request(client: httpx.AsyncClient, n: int):
+        roll = rng.random()
+        if roll < 0.6:
+            kind, call = 'browse', client.get('/book/get-all', params={'page': rng.randint(1, 200)}, headers=headers)
+        elif roll < 0.9:
+            kind, call = 'search', client.post('/book/search', json={'title': f'Book {rng.randint(1, 999)}'},
+                                               headers=headers)
+        else:
+            kind, call = 'write', client.post('/book/add', json={'title': f'Bench Book {os.getpid()}-{n}',
+                                                                 'author': 'Bench Author', 'year': 2024,
+                                                                 'pages': 100}, headers=headers)
+        started = time.perf_counter()
+        response = await call
+        response.raise_for_status()
+        latencies.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+
+    async def worker(client: httpx.AsyncClient):
+        for n in counter:
+            await one_request(client, n)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    every = [sample for samples in latencies.values() for sample in samples]
+    report = {'throughput_rps': round(len(every) / elapsed, 1)}
+    for kind, samples in [('all', every), *sorted(latencies.items())]:
+        report[kind] = {
+            'count': len(samples),
+            'p50_ms': round(statistics.median(samples), 2),
+            'p95_ms': round(percentile(samples, 95), 2),
+            'p99_ms': round(percentile(samples, 99), 2),
+        }
+    return report
+
+
+def run_mode(mode: str, database_url: str, args: argparse.Namespace) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url, DATABASE_ASYNC=str(mode == 'async').lower())
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_async_db', '--worker',
+         '--concurrency', str(args.concurrency), '--requests', str(args.requests)],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(drive(args.concurrency, args.requests))))
+        return
+
+    results = {}
+    for mode in ('sync', 'async'):
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(db_fd)
+        try:
+            database_url = f'sqlite:///{db_path}'
+            seed(database_url, args.books)
+            results[mode] = run_mode(mode, database_url, args)
+        finally:
+            os.unlink(db_path)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
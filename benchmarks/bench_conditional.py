@@ -0,0 +1,100 @@
+"""
+Latency of conditional GETs: a full 200 response vs the 304 returned for a current If-None-Match.
+
+Runs main.app in-process through httpx's ASGI transport against a seeded SQLite file (in a subprocess, since
+settings are read at import time), issuing requests one at a time so the numbers are per-request cost.
+
+    python -m benchmarks.bench_conditional --books 20000 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+ENDPOINTS = [
+    ('book', '/book/get/1234'),
+    ('book_page', '/book/get-all?page=50&page_size=50'),
+    ('genre', '/genre/get/3'),
+    ('genre_page', '/genre/get-all?page_size=20'),
+]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def drive(requests: int) -> dict:
+    import httpx
+
+    from auth import generate_jwt
+    from config import get_settings
+    from initialization import initialize_db
+    from main import app
+
+    initialize_db()
+    headers = {'Authorization': f"Bearer {generate_jwt({'sub': get_settings().ADMIN_USERNAME})}"}
+
+    async def timed(client: httpx.AsyncClient, url: str, extra: dict, expected: int) -> dict:
+        samples = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get(url, headers={**headers, **extra})
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == expected, response.status_code
+        return {
+            'p50_ms': round(statistics.median(samples), 3),
+            'p95_ms': round(percentile(samples, 95), 3),
+            'bytes': len(response.content),
+        }
+
+    report = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        for name, url in ENDPOINTS:
+            etag = (await client.get(url, headers=headers)).headers['etag']
+            report[name] = {
+                'full_200': await timed(client, url, {}, 200),
+                'not_modified_304': await timed(client, url, {'If-None-Match': etag}, 304),
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(drive(args.requests))))
+        return
+
+    from benchmarks.bench_async_db import seed
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    try:
+        database_url = f'sqlite:///{db_path}'
+        seed(database_url, args.books)
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_conditional', '--worker', '--requests', str(args.requests)],
+            cwd=ROOT, env=dict(os.environ, DATABASE_URL=database_url), check=True, capture_output=True, text=True,
+        ).stdout
+    finally:
+        os.unlink(db_path)
+
+    print(json.dumps(json.loads(output.strip().splitlines()[-1]), indent=2))
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
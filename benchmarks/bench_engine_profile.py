@@ -0,0 +1,136 @@
+"""
+Compare SQLite engine profiles under mixed concurrent read/write load.
+
+Each profile gets a freshly seeded SQLite file and an engine built by engine_profile from the settings with the
+profile's overrides. Worker threads each hold their own session and, for a fixed duration, run point reads and
+small genre pages, with a share of single-row UPDATE + COMMIT transactions. Reports throughput, latency
+percentiles and "database is locked" failures per profile.
+
+    python -m benchmarks.bench_engine_profile --books 50000 --threads 8 --seconds 10 --write-ratio 0.2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+NO_PRAGMAS = {'SQLITE_JOURNAL_MODE': None, 'SQLITE_SYNCHRONOUS': None, 'SQLITE_CACHE_SIZE': None,
+              'SQLITE_MMAP_SIZE': None, 'SQLITE_BUSY_TIMEOUT_MS': None, 'SQLITE_TEMP_STORE': None}
+
+PROFILES = {
+    # The engine as it was: rollback journal, synchronous=FULL, driver defaults
+    'driver_defaults': NO_PRAGMAS,
+    'wal_full': {'SQLITE_SYNCHRONOUS': 'FULL'},
+    # The shipped defaults
+    'wal_normal': {},
+}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def run_profile(overrides: dict, args: argparse.Namespace) -> dict:
+    from sqlalchemy import create_engine, update
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import sessionmaker
+
+    from benchmarks.bench_async_db import seed
+    from config import get_settings
+    from engine_profile import apply_profile, engine_options, engine_info
+    from models import Book
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    database_url = f'sqlite:///{db_path}'
+    seed(database_url, args.books)
+
+    settings = get_settings().model_copy(update={'DATABASE_POOL_SIZE': args.threads, **overrides})
+    engine = create_engine(database_url, **engine_options(database_url, settings))
+    apply_profile(engine, settings)
+    Session = sessionmaker(bind=engine)
+
+    reads: list[float] = []
+    writes: list[float] = []
+    locked = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(seed_value: int):
+        rng = random.Random(seed_value)
+        local_reads, local_writes, local_locked = [], [], 0
+        with Session() as db:
+            while time.perf_counter() < deadline:
+                book_id = rng.randint(1, args.books)
+                started = time.perf_counter()
+                try:
+                    if rng.random() < args.write_ratio:
+                        db.execute(update(Book).where(Book.id == book_id).values(pages=rng.randint(50, 900)))
+                        db.commit()
+                        local_writes.append((time.perf_counter() - started) * 1000)
+                    else:
+                        if rng.random() < 0.5:
+                            db.get(Book, book_id)
+                        else:
+                            db.query(Book).filter(Book.genre_id == 1 + book_id % 20).order_by(Book.id).limit(20).all()
+                        db.rollback()
+                        local_reads.append((time.perf_counter() - started) * 1000)
+                except OperationalError:
+                    db.rollback()
+                    local_locked += 1
+                db.expunge_all()
+        with lock:
+            reads.extend(local_reads)
+            writes.extend(local_writes)
+            locked[0] += local_locked
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with engine.connect() as connection:
+            pragmas = engine_info(connection).get('pragmas')
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    return {
+        'pragmas': pragmas,
+        'ops_per_s': round((len(reads) + len(writes)) / args.seconds),
+        'reads': len(reads),
+        'writes': len(writes),
+        'locked_errors': locked[0],
+        'read_p50_ms': round(percentile(reads, 50), 3),
+        'read_p99_ms': round(percentile(reads, 99), 3),
+        'write_p50_ms': round(percentile(writes, 50), 3),
+        'write_p99_ms': round(percentile(writes, 99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=50000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--profile', choices=sorted(PROFILES), action='append',
+                        help='profiles to run (default: all)')
+    args = parser.parse_args()
+
+    results = {name: run_profile(PROFILES[name], args) for name in args.profile or PROFILES}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
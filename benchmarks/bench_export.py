@@ -0,0 +1,99 @@
+"""
+Throughput and peak memory of the streaming catalog export.
+
+Seeds a temporary SQLite catalog, then runs BookService.export_books in a fresh interpreter per format (so
+ru_maxrss is that run's own peak) and writes the body to /dev/null. rss_growth_mb is the peak above the
+interpreter's footprint before the export started; it should not move with --books.
+
+    python -m benchmarks.bench_export --books 1000000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_search import seed  # noqa: E402
+
+FORMATS = [('ndjson', False), ('csv', False), ('ndjson', True), ('csv', True)]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def export(db_path: str, export_format: str, compress: bool, batch_size: int) -> dict:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from enums import ExportFormat
+    from models import SearchRequest
+    from service import BookService
+    from service.book_export import gzip_chunks
+
+    engine = create_engine(f'sqlite:///{db_path}')
+    rss_before = peak_rss_mb()
+    written = 0
+    started = time.perf_counter()
+    with Session(engine) as db, open(os.devnull, 'wb') as sink:
+        chunks = BookService(db).export_books(SearchRequest(), ExportFormat(export_format), batch_size)
+        for chunk in gzip_chunks(chunks) if compress else chunks:
+            written += len(chunk)
+            sink.write(chunk)
+    seconds = time.perf_counter() - started
+    rows = engine.connect().exec_driver_sql('SELECT COUNT(*) FROM books').scalar()
+    return {
+        'format': export_format,
+        'gzip': compress,
+        'rows_per_second': round(rows / seconds),
+        'seconds': round(seconds, 2),
+        'mb_written': round(written / 2 ** 20, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'rss_growth_mb': round(peak_rss_mb() - rss_before, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--worker', nargs=3, metavar=('DB', 'FORMAT', 'GZIP'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        db_path, export_format, compress = args.worker
+        print(json.dumps(export(db_path, export_format, compress == 'gzip', args.batch_size)))
+        return
+
+    from sqlalchemy import create_engine
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    engine = create_engine(f'sqlite:///{db_path}')
+    try:
+        seed(engine, args.books, random.Random(7))
+        engine.dispose()
+        report = []
+        for export_format, compress in FORMATS:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_export', '--batch-size', str(args.batch_size),
+                 '--worker', db_path, export_format, 'gzip' if compress else 'plain'],
+                cwd=ROOT, check=True, capture_output=True, text=True,
+            ).stdout
+            report.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        os.unlink(db_path)
+
+    print(json.dumps({'books': args.books, 'batch_size': args.batch_size, 'runs': report}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
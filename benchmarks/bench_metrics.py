@@ -0,0 +1,134 @@
+"""
+Overhead of the Prometheus metrics (METRICS_ENABLED) on request throughput and latency.
+
+Two parts:
+    micro       per-call cost of a histogram observation, of the SQL statement hooks and of the ASGI middleware
+                around a trivial app
+    end_to_end  benchmarks.load scenarios with metrics on and off, each in a fresh process (settings are read at
+                import), alternating for --rounds rounds; medians per setting plus the relative difference
+
+    python -m benchmarks.bench_metrics --books 50000 --scenario browse --rounds 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def micro(iterations: int) -> dict:
+    from sqlalchemy import create_engine, text
+
+    from metrics import Histogram, MetricsMiddleware, instrument_engine
+
+    histogram = Histogram('bench_seconds', 'Benchmark.', ('route',))
+    started = time.perf_counter()
+    for i in range(iterations):
+        histogram.observe(0.003, '/book/get/{book_id}')
+    observe_ns = (time.perf_counter() - started) / iterations * 1e9
+
+    def statement_ns(instrumented: bool) -> float:
+        engine = create_engine('sqlite://')
+        if instrumented:
+            instrument_engine(engine)
+        timings = []
+        with engine.connect() as connection:
+            statement = text('SELECT 1')
+            # Warmed up, then best of three: single runs on a busy machine vary more than the hooks cost
+            for _ in range(4):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    connection.execute(statement)
+                timings.append(time.perf_counter() - started)
+        engine.dispose()
+        return min(timings[1:]) / iterations * 1e9
+
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def request_ns(handler) -> float:
+        scope = {'type': 'http', 'method': 'GET', 'path': '/'}
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            pass
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await handler(scope, receive, send)
+        return (time.perf_counter() - started) / iterations * 1e9
+
+    bare, instrumented = statement_ns(False), statement_ns(True)
+    plain, wrapped = asyncio.run(request_ns(app)), asyncio.run(request_ns(MetricsMiddleware(app)))
+    return {
+        'histogram_observe_ns': round(observe_ns),
+        'sql_statement_ns': {'off': round(bare), 'on': round(instrumented), 'added': round(instrumented - bare)},
+        'asgi_request_ns': {'off': round(plain), 'on': round(wrapped), 'added': round(wrapped - plain)},
+    }
+
+
+def load_run(args: argparse.Namespace, db_path: str, enabled: bool) -> dict:
+    command = [sys.executable, '-m', 'benchmarks.load', '--db', db_path, '--books', str(args.books),
+               '--concurrency', str(args.concurrency), '--requests', str(args.requests)]
+    for scenario in args.scenario:
+        command += ['--scenario', scenario]
+    env = {**os.environ, 'METRICS_ENABLED': str(enabled).lower()}
+    output = subprocess.run(command, cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    # initialize_db prints to stdout before the report
+    return json.loads(output[output.index('{\n'):])['scenarios']
+
+
+def end_to_end(args: argparse.Namespace) -> dict:
+    db_path = args.db or os.path.join(tempfile.gettempdir(), f'books-load-{args.books}-42.db')
+    runs: dict[bool, list[dict]] = {True: [], False: []}
+    for _ in range(args.rounds):
+        for enabled in (False, True):
+            runs[enabled].append(load_run(args, db_path, enabled))
+
+    results = {}
+    for scenario in args.scenario:
+        medians = {
+            'on' if enabled else 'off': {
+                metric: statistics.median(run[scenario][metric] for run in runs[enabled])
+                for metric in ('throughput_rps', 'p50_ms', 'p95_ms')
+            }
+            for enabled in (False, True)
+        }
+        off, on = medians['off'], medians['on']
+        medians['throughput_change_pct'] = round((on['throughput_rps'] / off['throughput_rps'] - 1) * 100, 1)
+        medians['p95_change_pct'] = round((on['p95_ms'] / off['p95_ms'] - 1) * 100, 1)
+        results[scenario] = medians
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=100000, help='calls per micro measurement')
+    parser.add_argument('--db', help='catalog for the load runs (default: the one benchmarks.load generates)')
+    parser.add_argument('--books', type=int, default=50000)
+    parser.add_argument('--scenario', action='append', help='load scenarios (default: browse)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--skip-load', action='store_true', help='only run the micro measurements')
+    args = parser.parse_args()
+    args.scenario = args.scenario or ['browse']
+
+    results = {'micro': micro(args.iterations)}
+    if not args.skip_load:
+        results['end_to_end'] = end_to_end(args)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
@@ -0,0 +1,95 @@
+"""
+Latency of OFFSET vs keyset (cursor) pagination by page depth.
+
+Seeds a temporary SQLite catalog and times BookService.get_all_books at increasing page numbers in both modes.
+The keyset cursor for page N is built from the boundary row directly, which is exactly what a client that
+walked pages 1..N-1 would hold.
+
+    python -m benchmarks.bench_pagination --books 100000 --page-size 10
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def seed(engine, books: int):
+    from sqlalchemy import insert
+
+    from database import Base
+    from models import Book
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for start in range(0, books, 50000):
+            conn.execute(insert(Book), [
+                {'title': f'Seed Book {i}', 'author': f'Author {i % 997}', 'year': 1900 + i % 125,
+                 'pages': 50 + i % 900}
+                for i in range(start, min(books, start + 50000))
+            ])
+
+
+def timed(call, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--sort-by', default='year', choices=['id', 'title', 'year'])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from models import Book
+    from service import BookService
+    from service.cursor import NEXT, encode_cursor
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    engine = create_engine(f'sqlite:///{db_path}')
+    try:
+        seed(engine, args.books)
+        last_page = args.books // args.page_size
+        depths = sorted({p for p in (1, 10, 100, 1000, 10000, 100000, last_page) if p <= last_page})
+        sort_column = getattr(Book, args.sort_by)
+        results = []
+
+        with Session(engine) as db:
+            service = BookService(db)
+            for page in depths:
+                cursor = ''
+                if page > 1:
+                    boundary = (db.query(sort_column, Book.id).order_by(sort_column, Book.id)
+                                .offset((page - 1) * args.page_size - 1).limit(1).one())
+                    cursor = encode_cursor(args.sort_by, tuple(boundary), NEXT)
+
+                offset_ms = timed(lambda: service.get_all_books(page, args.page_size, sort_by=args.sort_by),
+                                  args.repeat)
+                keyset_ms = timed(lambda: service.get_all_books(page_size=args.page_size, cursor=cursor,
+                                                                sort_by=args.sort_by), args.repeat)
+                results.append({'page': page, 'offset_ms': offset_ms, 'keyset_ms': keyset_ms})
+
+        print(json.dumps({'books': args.books, 'page_size': args.page_size, 'sort_by': args.sort_by,
+                          'results': results}, indent=2))
+    finally:
+        engine.dispose()
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
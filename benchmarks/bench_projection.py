@@ -0,0 +1,114 @@
+"""
+Throughput and memory of the listing queries with entities vs column projection.
+
+    entities    the query loads Book/Genre entities (genre joined eagerly for BookResponse) into the session's
+                identity map, then validates them from attributes
+    projection  the query selects only the schema's columns as plain rows (GenericService._paginate with
+                project=True, what the services use), then validates dicts built from them
+
+Seeds a temporary synthetic catalog and runs get_all_books, an author search and get_genres through both modes,
+each call in a fresh session. Reports pages per second (best of --repeat) and the peak memory allocated while
+building one page (tracemalloc), and checks both modes return the same page.
+
+    python -m benchmarks.bench_projection --books 50000 --genres 1000 --page-size 1000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def listings(page_size: int) -> dict:
+    """name -> (entity mode call, projection mode call), each taking a BookService and a GenreService."""
+    from sqlalchemy.orm import joinedload
+
+    from models import Book, BookResponse, BookSearchResult, Genre, GenreResponse, SearchRequest
+
+    search = SearchRequest(author='a')
+
+    def entity_books(books, genres):
+        return books._paginate(books.db.query(Book).options(joinedload(Book.genre)), 1, page_size,
+                               schema=BookResponse)
+
+    def entity_search(books, genres):
+        query, _ = books._filter_books(books.db.query(Book), search)
+        return books._paginate(query, 1, page_size, schema=BookSearchResult)
+
+    def entity_genres(books, genres):
+        return genres._paginate(genres.db.query(Genre), 1, page_size, schema=GenreResponse,
+                                to_schema=lambda rows: genres._genre_responses(rows, 0))
+
+    return {
+        'get_all_books': (entity_books, lambda books, genres: books.get_all_books(page_size=page_size)),
+        'search_books': (entity_search, lambda books, genres: books.search_books(search, page_size=page_size)),
+        'get_genres': (entity_genres, lambda books, genres: genres.get_genres(page_size=page_size, books_limit=0)),
+    }
+
+
+def run(engine, call):
+    from sqlalchemy.orm import Session
+
+    from service import BookService, GenreService
+
+    with Session(engine) as db:
+        return call(BookService(db), GenreService(db))
+
+
+def measure(engine, call, repeat: int) -> dict:
+    run(engine, call)  # warm the statement cache and the compiled validators
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(engine, call)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    run(engine, call)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'pages_per_s': round(1 / best, 1), 'ms_per_page': round(best * 1000, 2),
+            'peak_kib': round(peak / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=50000)
+    parser.add_argument('--genres', type=int, default=1000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+
+    from benchmarks.catalog import generate_catalog
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    generate_catalog(f'sqlite:///{db_path}', args.books, genres=args.genres, users=0)
+    engine = create_engine(f'sqlite:///{db_path}')
+    try:
+        results = {}
+        for name, (entities, projection) in listings(args.page_size).items():
+            assert run(engine, entities) == run(engine, projection)
+            before, after = measure(engine, entities, args.repeat), measure(engine, projection, args.repeat)
+            results[name] = {
+                'entities': before,
+                'projection': after,
+                'speedup': round(after['pages_per_s'] / before['pages_per_s'], 2),
+                'memory_ratio': round(after['peak_kib'] / before['peak_kib'], 2),
+            }
+        print(json.dumps({'books': args.books, 'genres': args.genres, 'page_size': args.page_size,
+                          'results': results}, indent=2))
+    finally:
+        engine.dispose()
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
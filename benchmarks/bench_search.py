@@ -0,0 +1,105 @@
+"""
+ILIKE substring search vs the FTS5 full-text index.
+
+Seeds temporary SQLite catalogs of each size (the FTS triggers index rows as they are inserted) and times
+BookService.search_books for the same terms in both modes.
+
+    python -m benchmarks.bench_search --sizes 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+WORDS = ('shadow night river empire garden silent winter crown stone glass ocean dragon secret house city '
+         'fire lost letter king queen war peace daughter storm light dark road journey island memory song').split()
+NAMES = ('Smith Jones Taylor Brown Williams Wilson Johnson Davies Robinson Wright Thompson Evans Walker White '
+         'Roberts Green Hall Wood Jackson Clarke').split()
+
+
+def seed(engine, books: int, rng: random.Random):
+    from sqlalchemy import insert
+
+    from database import Base
+    from models import Book
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for start in range(0, books, 50000):
+            conn.execute(insert(Book), [
+                {'title': f'{" ".join(rng.choices(WORDS, k=rng.randint(2, 5))).title()} {i}',
+                 'author': f'{rng.choice(NAMES)} {rng.choice(NAMES)}',
+                 'year': rng.randint(1900, 2024), 'pages': rng.randint(50, 900)}
+                for i in range(start, min(books, start + 50000))
+            ])
+
+
+def timed(call, repeat: int) -> float:
+    from service.count_cache import count_cache
+
+    samples = []
+    for _ in range(repeat):
+        # Measure the uncached cost: a typing user sends a new query every keystroke
+        count_cache.invalidate('books')
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--terms', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from models import SearchRequest
+    from service import BookService
+
+    rng = random.Random(7)
+    # Common words (about one title in ten each) and rare ones (a single title)
+    terms = rng.sample(WORDS, args.terms // 2) + [str(rng.randrange(10000, 99999)) for _ in range(args.terms // 2)]
+    report = []
+    for size in args.sizes:
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(db_fd)
+        engine = create_engine(f'sqlite:///{db_path}')
+        try:
+            started = time.perf_counter()
+            seed(engine, size, rng)
+            load_seconds = time.perf_counter() - started
+            with Session(engine) as db:
+                service = BookService(db)
+                ilike = [timed(lambda: service.search_books(SearchRequest(title=term)), args.repeat)
+                         for term in terms]
+                # prefix query, as typed into a search box
+                fts = [timed(lambda: service.search_books(SearchRequest(query=term[:4])), args.repeat)
+                       for term in terms]
+            report.append({
+                'books': size,
+                'load_seconds': round(load_seconds, 1),
+                'ilike_median_ms': round(statistics.median(ilike), 3),
+                'ilike_max_ms': max(ilike),
+                'fts_median_ms': round(statistics.median(fts), 3),
+                'fts_max_ms': max(fts),
+            })
+        finally:
+            engine.dispose()
+            os.unlink(db_path)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-item cost of turning a page of ORM rows into a JSON response body: before and after single-pass serialization.
+
+    before  model_validate per row in the service, then FastAPI's response handling: dump the page to dicts,
+            validate them against the response model, serialize to JSON-able objects and json.dumps them
+    after   one validate_python call on the page's compiled list[schema] TypeAdapter, then dump_json on the
+            response model's TypeAdapter straight to bytes
+
+Rows are transient Book/Genre instances, so no database time is included.
+
+    python -m benchmarks.bench_serialization --page-size 500 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def book_rows(count: int) -> list:
+    from models import Book, Genre
+
+    genres = [Genre(id=i, name=f'Genre {i}') for i in range(1, 11)]
+    return [Book(id=i, title=f'Book title {i}', author=f'Author {i % 97}', year=1900 + i % 120, pages=100 + i % 700,
+                 genre_id=genres[i % 10].id, genre=genres[i % 10]) for i in range(1, count + 1)]
+
+
+def genre_rows(count: int, books_limit: int) -> list:
+    books = book_rows(books_limit)
+    return [SimpleNamespace(id=i, name=f'Genre {i}', book_count=1000 + i, books=books) for i in range(1, count + 1)]
+
+
+def measure(build, repeat: int) -> float:
+    build()  # warm the compiled validators and serializers
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def compare(schema, rows: list, repeat: int) -> dict:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from models import PaginatedResponse
+    from serialization import adapter, validate_page
+
+    response_type = PaginatedResponse[schema]
+    field = create_response_field(name='response', type_=response_type)
+    page = {'current_page': 1, 'total_pages': 10, 'total_items': 10 * len(rows)}
+
+    def before():
+        content = PaginatedResponse(items=[schema.model_validate(row) for row in rows], **page)
+        encoded = asyncio.run(serialize_response(field=field, response_content=content))
+        return JSONResponse(encoded).body
+
+    def after():
+        return adapter(response_type).dump_json(response_type(items=validate_page(schema, rows), **page))
+
+    assert json.loads(before()) == json.loads(after())
+    before_seconds, after_seconds = measure(before, repeat), measure(after, repeat)
+    return {
+        'before_us_per_item': round(before_seconds / len(rows) * 1e6, 2),
+        'after_us_per_item': round(after_seconds / len(rows) * 1e6, 2),
+        'speedup': round(before_seconds / after_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--books-limit', type=int, default=10, help='books listed per genre')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from models import BookResponse, GenreResponse
+
+    print(json.dumps({
+        'page_size': args.page_size,
+        'BookResponse': compare(BookResponse, book_rows(args.page_size), args.repeat),
+        'GenreResponse': compare(GenreResponse, genre_rows(args.page_size, args.books_limit), args.repeat),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
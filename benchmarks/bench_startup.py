@@ -0,0 +1,91 @@
+"""
+Worker import-to-ready time: importing main and running its startup, in a fresh process per run.
+
+"current" is the startup as it is; "previous" adds what every worker used to do before serving: import PyJWT,
+passlib and uvicorn eagerly, run create_all and query for the admin account. The database is bootstrapped once,
+up front, as a deployment would.
+
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def start_worker(previous: bool) -> dict:
+    from startup import worker_startup
+
+    if previous:
+        with worker_startup.phase('eager_imports'):
+            import jwt  # noqa: F401
+            import uvicorn  # noqa: F401
+            from passlib.context import CryptContext  # noqa: F401
+    import main  # noqa: F401
+
+    if previous:
+        from database import Base, engine, get_db
+        from initialization import create_admin_user
+        with worker_startup.phase('create_all_and_admin_check'):
+            Base.metadata.create_all(bind=engine)
+            db = next(get_db())
+            create_admin_user(db)
+            db.close()
+    asyncio.run(worker_startup.start())
+    return worker_startup.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--worker', choices=['current', 'previous'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(start_worker(args.worker == 'previous')))
+        return
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    os.unlink(db_path)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}')
+    try:
+        subprocess.run([sys.executable, '-m', 'initialization', 'bootstrap'], cwd=ROOT, env=env, check=True,
+                       capture_output=True)
+        report = {}
+        for mode in ('previous', 'current'):
+            ready, wall, phases = [], [], {}
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_startup', '--worker', mode],
+                    cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+                ).stdout
+                wall.append((time.perf_counter() - started) * 1000)
+                worker = json.loads(output.strip().splitlines()[-1])
+                ready.append(worker['phases_ms']['ready'])
+                for name, ms in worker['phases_ms'].items():
+                    phases.setdefault(name, []).append(ms)
+            report[mode] = {
+                'ready_p50_ms': round(statistics.median(ready), 1),
+                'process_p50_ms': round(statistics.median(wall), 1),
+                'phases_p50_ms': {name: round(statistics.median(ms), 1) for name, ms in phases.items()},
+            }
+    finally:
+        for suffix in ('', '-shm', '-wal'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
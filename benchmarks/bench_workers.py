@@ -0,0 +1,159 @@
+"""
+Read-heavy throughput of the pre-fork server (python -m server) as the worker count grows.
+
+For each worker count the server is started on a seeded SQLite file and driven over real HTTP with load.py's
+browse scenario (book pages, single books, genre pages) by --clients load-generator processes for --duration
+seconds, after an unmeasured warmup. Reported per worker count: throughput, p50/p99 latency and the speed-up over
+a single worker. The load generators share the machine with the server; give them cores of their own (taskset, or
+another host through --url) to measure the server alone.
+
+    python -m benchmarks.bench_workers --workers 1,2,4 --clients 4 --concurrency 16 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def generate_load(url: str, concurrency: int, duration: float, warmup: float, context: dict) -> dict:
+    import httpx
+
+    from benchmarks.load import browse
+
+    rng = random.Random(os.getpid())
+    latencies: list[float] = []
+    errors = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        n = 0
+        while (now := time.perf_counter()) < stop_at:
+            response = await browse(client, rng, n, context)
+            n += 1
+            if now >= measure_from:
+                latencies.append((time.perf_counter() - now) * 1000)
+                errors += response.status_code >= 400
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return {'latencies': latencies, 'errors': errors}
+
+
+def wait_until_ready(url: str, workers: int, timeout: float = 60):
+    import httpx
+
+    # /health/ready answers per worker; wait until every worker has answered at least once
+    ready = set()
+    deadline = time.monotonic() + timeout
+    while len(ready) < workers:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f'{workers - len(ready)} of {workers} workers not ready after {timeout} s')
+        try:
+            response = httpx.get(f'{url}/health/ready', timeout=1)
+            if response.status_code == 200:
+                ready.add(response.json()['pid'])
+        except httpx.HTTPError:
+            time.sleep(0.1)
+
+
+def run_workers(workers: int, args: argparse.Namespace, env: dict, token: str) -> dict:
+    url = args.url or f'http://127.0.0.1:{args.port}'
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'server', '--workers', str(workers), '--port', str(args.port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(url, workers)
+        clients = [
+            subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.bench_workers', '--client', '--url', url,
+                 '--concurrency', str(args.concurrency), '--duration', str(args.duration),
+                 '--warmup', str(args.warmup), '--books', str(args.books), '--token', token],
+                cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+            )
+            for _ in range(args.clients)
+        ]
+        results = [json.loads(client.communicate()[0].strip().splitlines()[-1]) for client in clients]
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = [ms for result in results for ms in result['latencies']]
+    return {
+        'requests': len(latencies),
+        'errors': sum(result['errors'] for result in results),
+        'throughput_rps': round(len(latencies) / args.duration, 1),
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default=f'1,2,{os.cpu_count() or 1}', help='comma-separated worker counts')
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=4, help='load-generator processes')
+    parser.add_argument('--concurrency', type=int, default=16, help='connections per load generator')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    parser.add_argument('--token', help=argparse.SUPPRESS)
+    parser.add_argument('--client', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.client:
+        context = {'books': args.books, 'headers': {'Authorization': f'Bearer {args.token}'}}
+        print(json.dumps(asyncio.run(generate_load(args.url, args.concurrency, args.duration, args.warmup,
+                                                   context))))
+        return
+
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    os.unlink(db_path)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}')
+    os.environ.update(env)
+    from auth import generate_jwt
+    from benchmarks.bench_async_db import seed
+    from config import get_settings
+
+    try:
+        seed(env['DATABASE_URL'], args.books)
+        subprocess.run([sys.executable, '-m', 'initialization', 'create-admin'], cwd=ROOT, env=env, check=True,
+                       capture_output=True)
+        token = generate_jwt({'sub': get_settings().ADMIN_USERNAME})
+        counts = sorted({int(count) for count in args.workers.split(',')})
+        report = {'cpus': os.cpu_count(), 'clients': args.clients, 'concurrency': args.concurrency, 'workers': {}}
+        for workers in counts:
+            report['workers'][workers] = run_workers(workers, args, env, token)
+        baseline = report['workers'][counts[0]]['throughput_rps']
+        for result in report['workers'].values():
+            result['speedup'] = round(result['throughput_rps'] / baseline, 2) if baseline else None
+    finally:
+        for suffix in ('', '-shm', '-wal'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
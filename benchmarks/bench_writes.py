@@ -0,0 +1,89 @@
+"""
+Write throughput of GenericService.create/update: the previous flush-then-refresh path vs INSERT/UPDATE ... RETURNING.
+
+Each mode gets a fresh SQLite file and creates then updates the same number of books through BookService, one
+committed transaction per write, reporting writes per second and SQL statements per write (update_book's lookup
+SELECT and the change_log append are included in both modes). --dir /dev/shm takes fsync out of the picture.
+
+    python -m benchmarks.bench_writes --writes 2000 [--dir /dev/shm]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Book, BookRequest
+from service import BookService
+
+
+class RefreshingBookService(BookService):
+    """The write path before RETURNING: flush, then re-select the whole row."""
+    def _flush_and_refresh(self, item: Book) -> BookRequest:
+        self.db.add(item)
+        self.db.flush()
+        self.db.refresh(item)
+        return self.schema.model_validate(item)
+
+    def create(self, item: BookRequest) -> BookRequest:
+        db_item = self.model(**item.model_dump())
+        return self._db_operation(lambda: self._flush_and_refresh(db_item))
+
+    def update(self, db_item: Book, update_data: Dict[str, Any]) -> BookRequest:
+        def update_operation():
+            for key, value in update_data.items():
+                setattr(db_item, key, value)
+            return self._flush_and_refresh(db_item)
+
+        return self._db_operation(update_operation)
+
+
+def run(service_class: type[BookService], writes: int, directory: str | None) -> dict:
+    fd, path = tempfile.mkstemp(suffix='.db', dir=directory)
+    os.close(fd)
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    report = {}
+    try:
+        with sessionmaker(bind=engine)() as db:
+            service = service_class(db)
+            started = time.perf_counter()
+            ids = [service.create_new_book(BookRequest(title=f'Book {i}', author='Author', year=2000, pages=100)).id
+                   for i in range(writes)]
+            report['create'] = {'writes_per_s': round(writes / (time.perf_counter() - started)),
+                                'statements_per_write': round(len(statements) / writes, 2)}
+
+            statements.clear()
+            started = time.perf_counter()
+            for book_id in ids:
+                service.update_book(book_id, BookRequest(title=f'Renamed {book_id}', author='Author', year=2000,
+                                                         pages=200))
+            report['update'] = {'writes_per_s': round(writes / (time.perf_counter() - started)),
+                                'statements_per_write': round(len(statements) / writes, 2)}
+    finally:
+        engine.dispose()
+        os.remove(path)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--writes', type=int, default=2000)
+    parser.add_argument('--dir', default=None, help='directory for the SQLite files (default: the temp dir)')
+    args = parser.parse_args()
+    print(json.dumps({
+        'writes': args.writes,
+        'flush_refresh': run(RefreshingBookService, args.writes, args.dir),
+        'returning': run(BookService, args.writes, args.dir),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Seeded synthetic catalog generator: genres, users and 10k-5M books with realistic value distributions.
+
+Titles are unique by construction (a permuted index picks the words, long catalogs continue as numbered
+volumes) and come from a few templates; authors and genres are Zipf-distributed so a few prolific authors and
+popular genres dominate, as in real catalogs; years lean towards recent decades and page counts
+are log-normal. Everything is loaded with multi-row INSERTs in large transactions, and the same seed always
+produces the same catalog.
+
+    python -m benchmarks.catalog --books 1000000 --out /tmp/catalog.db
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from typing import Iterator
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+ADJECTIVES = ('Silent Hidden Broken Golden Forgotten Burning Crimson Endless Frozen Wandering Distant Hollow '
+              'Secret Fallen Bitter Savage Gentle Restless Scarlet Shattered Ancient Quiet Wild Last Lonely Dark '
+              'Bright Lost Sacred Wicked Iron Silver Glass Paper Velvet Stolen Sleeping Drowned Painted Invisible '
+              'Northern Southern Eastern Western Midnight Summer Winter Autumn Spring Little Great Final First '
+              'Second Infinite Tender Cruel Strange Perfect Twisted Sweet').split()
+NOUNS = ('Shadow River Empire Garden Crown Stone Ocean Dragon House City Fire Letter King Queen War Peace '
+         'Daughter Storm Light Road Journey Island Memory Song Mirror Forest Tower Sea Heart Wolf Raven Sword '
+         'Promise Bridge Harbor Lantern Orchard Window Clock Compass Map Key Door Field Mountain Valley Desert '
+         'Winter Star Moon Sun Sky Rain Snow Wind Thunder Flame Ash Dust Bone Blood Salt Honey Rose Thorn Lily '
+         'Oak Willow Feather Wing Child Widow Stranger Soldier Thief Prince Priest Hunter Sailor Painter Poet '
+         'Doctor Witness Liar Keeper Maker Ghost Angel Devil Saint Spy Captain Orphan Singer Dancer Gardener '
+         'Clockmaker Cartographer Archivist Alchemist Beekeeper Lighthouse Library Museum Station Hotel Circus '
+         'Carnival Cathedral Monastery Palace Cottage Farm Vineyard Mill Forge Workshop Theatre Cemetery').split()
+PLACES = ('Avalon Babylon Carthage Damascus Eden Florence Granada Havana Istanbul Jericho Kyoto Lisbon Marrakesh '
+          'Nineveh Odessa Prague Quebec Rome Samarkand Troy Ur Venice Warsaw Xanadu Yorkshire Zanzibar Alexandria '
+          'Bombay Cairo Dublin Edinburgh Geneva Hamburg Jerusalem Kiev Lyon Madrid Naples Oxford Paris Quito '
+          'Riga Seville Tangier Vienna York Zurich Athens Berlin Cordoba Delphi Ephesus Fez Genoa Hanoi Ithaca '
+          'Jaipur Kabul Lima Memphis Nazareth Oslo Petra Ravenna Sparta Thebes Utopia Verona Winchester').split() + [
+    f'the {place}' for place in ('North South East West Sea Valley Hills Marsh Moor Coast Island Forest Desert River '
+                                 'Mountains Border Frontier Empire').split()
+]
+TEMPLATES = ('{adjective} {noun}', 'The {adjective} {noun}', 'The {noun} of {place}',
+             '{adjective} {noun} of {place}', 'A {noun} in {place}', 'The {adjective} {noun} of {place}')
+FIRST_NAMES = ('James Mary John Patricia Robert Jennifer Michael Linda William Elizabeth David Barbara Richard '
+               'Susan Joseph Jessica Thomas Sarah Charles Karen Daniel Nancy Matthew Lisa Anthony Betty Mark '
+               'Margaret Donald Sandra Steven Ashley Paul Kimberly Andrew Emily Joshua Donna Kenneth Michelle '
+               'Kevin Dorothy Brian Carol George Amanda Timothy Melissa Ronald Deborah Edward Stephanie Jason '
+               'Rebecca Jeffrey Sharon Ryan Laura Jacob Cynthia Gary Kathleen Nicholas Amy Eric Angela Haruki '
+               'Chimamanda Gabriel Isabel Orhan Olga Jorge Elena Naguib Wislawa Kazuo Arundhati Salman Toni').split()
+LAST_NAMES = ('Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez Hernandez Lopez Gonzalez '
+              'Wilson Anderson Thomas Taylor Moore Jackson Martin Lee Perez Thompson White Harris Sanchez Clark '
+              'Ramirez Lewis Robinson Walker Young Allen King Wright Scott Torres Nguyen Hill Flores Green Adams '
+              'Nelson Baker Hall Rivera Campbell Mitchell Carter Roberts Murakami Adichie Marquez Allende Pamuk '
+              'Tokarczuk Borges Ferrante Mahfouz Szymborska Ishiguro Roy Rushdie Morrison Okri Achebe Lessing '
+              'Munro Atwood Coetzee Gordimer Naipaul Walcott Heaney Pinter Modiano Handke Ernaux Fosse').split()
+GENRES = ('Literary Fiction', 'Mystery', 'Thriller', 'Romance', 'Science Fiction', 'Fantasy', 'Horror',
+          'Historical Fiction', 'Biography', 'Memoir', 'History', 'Science', 'Philosophy', 'Poetry', 'Drama',
+          'Travel', 'Cooking', 'Self Help', 'Business', 'Economics', 'Politics', 'Religion', 'Art', 'Music',
+          'Children', 'Young Adult', 'Graphic Novels', 'Crime', 'Adventure', 'Short Stories')
+
+USER_PASSWORD = 'benchmark-password'
+
+
+def zipf_weights(count: int, exponent: float = 1.1) -> list[float]:
+    """Cumulative Zipf weights for random.choices(cum_weights=...) over count ranked items."""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def _permutation_step(size: int) -> int:
+    # A step coprime to the size makes index * step % size a permutation, scattering neighbouring indexes
+    step = int(size * 0.6180339887) | 1
+    while math.gcd(step, size) != 1:
+        step += 2
+    return step
+
+
+def book_rows(books: int, genres: int, rng: random.Random) -> Iterator[dict]:
+    """Yield the book rows; titles are unique, the other columns follow the distributions described above."""
+    authors = [f'{first} {last}' for first in FIRST_NAMES for last in LAST_NAMES]
+    rng.shuffle(authors)
+    author_weights = zipf_weights(len(authors), 0.6)
+    genre_ids = range(1, genres + 1)
+    genre_weights = zipf_weights(genres, 0.8)
+    capacity = len(ADJECTIVES) * len(NOUNS) * len(PLACES)
+    step = _permutation_step(capacity)
+
+    for index in range(books):
+        volume, position = divmod(index, capacity)
+        position = position * step % capacity
+        position, place = divmod(position, len(PLACES))
+        adjective, noun = divmod(position, len(NOUNS))
+        template = TEMPLATES[(index * 7 + volume) % len(TEMPLATES)]
+        # Templates that drop a word must not collide: the dropped word goes into a subtitle instead
+        title = template.format(adjective=ADJECTIVES[adjective], noun=NOUNS[noun], place=PLACES[place])
+        missing = [word for key, word in (('{adjective}', ADJECTIVES[adjective]), ('{place}', PLACES[place]))
+                   if key not in template]
+        if missing:
+            title = f'{title}: {" ".join(missing)}'
+        if volume:
+            title = f'{title}, Volume {volume + 1}'
+
+        recent = rng.random() < 0.7
+        yield {
+            'title': title,
+            'author': rng.choices(authors, cum_weights=author_weights)[0],
+            'year': round(rng.triangular(1990, 2025, 2024)) if recent else rng.randint(1800, 1989),
+            'pages': min(2000, max(24, round(rng.lognormvariate(math.log(300), 0.45)))),
+            'genre_id': None if rng.random() < 0.05 else rng.choices(genre_ids, cum_weights=genre_weights)[0],
+        }
+
+
+def generate_catalog(database_url: str, books: int, genres: int = len(GENRES), users: int = 1000,
+                     seed: int = 42, chunk_size: int = 50000) -> dict:
+    """
+    Create the schema and load a synthetic catalog.
+    Args:
+        database_url (str): The database to create and load.
+        books (int): Number of books.
+        genres (int): Number of genres. Defaults to the named genre list.
+        users (int): Number of USER accounts (user{n}, password USER_PASSWORD).
+        seed (int): Random seed; the same seed yields the same catalog.
+        chunk_size (int): Rows per multi-row INSERT.
+    Returns:
+        dict: Row counts and load timings.
+    """
+    from sqlalchemy import create_engine, insert
+
+    from enums import UserRole
+    from hashing import password_context
+    from initialization import migrate
+    from models import Book, Genre, User
+
+    rng = random.Random(seed)
+    engine = create_engine(database_url)
+    # Stamped with the schema revision, so the app's startup check accepts the database
+    migrate(engine)
+    started = time.perf_counter()
+    # One bcrypt hash shared by every account keeps the load fast; logins still pay the full verify cost
+    password = password_context().hash(USER_PASSWORD)
+    with engine.begin() as connection:
+        connection.execute(insert(Genre), [
+            {'name': GENRES[i] if i < len(GENRES) else f'{GENRES[i % len(GENRES)]} {i // len(GENRES) + 1}'}
+            for i in range(genres)
+        ])
+        connection.execute(insert(User), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': password,
+             'role': UserRole.USER.value}
+            for i in range(users)
+        ])
+        rows = book_rows(books, genres, rng)
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            connection.execute(insert(Book), chunk)
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return {'books': books, 'genres': genres, 'users': users, 'seed': seed,
+            'load_seconds': round(elapsed, 2), 'books_per_s': round(books / elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--genres', type=int, default=len(GENRES))
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', required=True, help='SQLite file to create')
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        parser.error(f'{args.out} already exists')
+    print(json.dumps(generate_catalog(f'sqlite:///{args.out}', args.books, args.genres, args.users, args.seed),
+                     indent=2))
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
@@ -0,0 +1,243 @@
+"""
+In-process load driver: scripted scenarios against main.app at fixed concurrency, with baseline comparison.
+
+Generates (or reuses) a synthetic catalog, then runs each scenario through httpx's ASGI transport with a fixed
+number of concurrent clients, after an unmeasured warmup. Per scenario it reports p50/p95/p99 latency,
+throughput, error count and SQL statements per request as JSON. --save-baseline stores the report;
+--baseline compares against a stored one and exits with status 1 when any scenario's p95 latency or throughput
+regresses by more than --threshold.
+
+Scenarios:
+    browse       book pages (page numbers and cursors), single books, genre pages
+    search       title/author filters and full-text queries
+    login_storm  logins of the catalog's users (bcrypt verify on the hashing pool)
+    write_burst  book creates, updates and genre assignments
+
+    python -m benchmarks.load --books 100000 --concurrency 32 --requests 2000 --save-baseline /tmp/baseline.json
+    python -m benchmarks.load --books 100000 --concurrency 32 --requests 2000 --baseline /tmp/baseline.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Request functions take (client, rng, n, context) and return the response awaitable
+Scenario = Callable[[Any, random.Random, int, dict], Awaitable[Any]]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def browse(client, rng: random.Random, n: int, context: dict):
+    roll = rng.random()
+    headers = context['headers']
+    if roll < 0.4:
+        return client.get('/book/get-all', params={'page': rng.randint(1, 100), 'page_size': 20}, headers=headers)
+    if roll < 0.6:
+        return client.get('/book/get-all', params={'cursor': '', 'sort_by': 'title', 'page_size': 20,
+                                                   'include_total': 'false'}, headers=headers)
+    if roll < 0.9:
+        return client.get(f"/book/get/{rng.randint(1, context['books'])}", headers=headers)
+    return client.get('/genre/get-all', params={'page_size': 10}, headers=headers)
+
+
+def search(client, rng: random.Random, n: int, context: dict):
+    from benchmarks.catalog import ADJECTIVES, LAST_NAMES, NOUNS, PLACES
+
+    roll = rng.random()
+    if roll < 0.4:
+        body = {'title': rng.choice(NOUNS)}
+    elif roll < 0.6:
+        body = {'author': rng.choice(LAST_NAMES)}
+    else:
+        body = {'query': f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS + PLACES)[:4]}'}
+    return client.post('/book/search', json=body, params={'page_size': 20}, headers=context['headers'])
+
+
+def login_storm(client, rng: random.Random, n: int, context: dict):
+    from benchmarks.catalog import USER_PASSWORD
+
+    return client.post('/auth/login', json={'username': f"user{rng.randrange(context['users'])}",
+                                            'password': USER_PASSWORD})
+
+
+def write_burst(client, rng: random.Random, n: int, context: dict):
+    roll = rng.random()
+    headers = context['headers']
+    tag = f"{context['run']}-{next(context['sequence'])}"
+    if roll < 0.5:
+        return client.post('/book/add', json={'title': f'Load Book {tag}', 'author': 'Load Author', 'year': 2024,
+                                              'pages': rng.randint(50, 900)}, headers=headers)
+    if roll < 0.8:
+        return client.patch('/book/update', json={'id': rng.randint(1, context['books']), 'title': f'Updated {tag}',
+                                                  'author': 'Load Author', 'year': 2024, 'pages': 300},
+                            headers=headers)
+    return client.get(f"/book/add-genre/{rng.randint(1, context['books'])}/{rng.randint(1, context['genres'])}",
+                      headers=headers)
+
+
+SCENARIOS: dict[str, Scenario] = {
+    'browse': browse,
+    'search': search,
+    'login_storm': login_storm,
+    'write_burst': write_burst,
+}
+
+
+async def run_scenario(app, scenario: Scenario, concurrency: int, requests: int, context: dict,
+                       statements: list[int]) -> dict:
+    import httpx
+
+    rng = random.Random(42)
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient):
+        for n in counter:
+            started = time.perf_counter()
+            response = await scenario(client, rng, n, context)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+
+    statements[0] = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://load') as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'statements_per_request': round(statements[0] / len(latencies), 2),
+    }
+
+
+async def drive(args: argparse.Namespace) -> dict:
+    from sqlalchemy import event, func, select
+
+    from auth import generate_jwt
+    from config import get_settings
+    from database import SessionLocal, async_engine, async_read_engine, engine, read_engine
+    from initialization import initialize_db
+    from main import app
+    from models import Book, Genre, User
+
+    initialize_db()
+    with SessionLocal() as db:
+        context = {
+            'books': db.execute(select(func.max(Book.id))).scalar() or 1,
+            'genres': db.execute(select(func.count(Genre.id))).scalar() or 1,
+            'users': max(1, db.execute(select(func.count(User.id))).scalar() - 1),
+        }
+    context['headers'] = {'Authorization': f"Bearer {generate_jwt({'sub': get_settings().ADMIN_USERNAME})}"}
+    # Titles written by write_burst must stay unique across runs, warmups included
+    context['run'] = f'{os.getpid()}-{int(time.time())}'
+    context['sequence'] = itertools.count()
+
+    statements = [0]
+
+    def count_statement(*args):
+        statements[0] += 1
+
+    for app_engine in (engine, read_engine, async_engine, async_read_engine):
+        if app_engine is not None:
+            event.listen(getattr(app_engine, 'sync_engine', app_engine), 'before_cursor_execute', count_statement)
+
+    report = {'books': context['books'], 'concurrency': args.concurrency, 'scenarios': {}}
+    for name in args.scenario or SCENARIOS:
+        requests = args.login_requests if name == 'login_storm' else args.requests
+        if args.warmup:
+            # Warm the caches, pools and (for logins) the hashing workers; not measured
+            await run_scenario(app, SCENARIOS[name], args.concurrency, min(args.warmup, requests), context,
+                               statements)
+        report['scenarios'][name] = await run_scenario(app, SCENARIOS[name], args.concurrency, requests, context,
+                                                       statements)
+    return report
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    The regressions of a report against a baseline.
+    Args:
+        report (dict): The current run.
+        baseline (dict): A stored earlier run.
+        threshold (float): Allowed relative slowdown, e.g. 0.2 for 20%.
+    Returns:
+        list[str]: One line per regressed metric; empty when nothing regressed.
+    """
+    regressions = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        if current['throughput_rps'] < previous['throughput_rps'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='SQLite catalog to run against (generated when missing)')
+    parser.add_argument('--books', type=int, default=100000, help='catalog size when generating')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append', help='default: all')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--login-requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=100, help='unmeasured requests per scenario')
+    parser.add_argument('--async-db', action='store_true', help='run with DATABASE_ASYNC=true')
+    parser.add_argument('--baseline', help='compare against this stored report')
+    parser.add_argument('--save-baseline', help='store this report as a baseline')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.gettempdir(), f'books-load-{args.books}-{args.seed}.db')
+    # Settings are read when the app modules are first imported, so the environment must be set before that
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['DATABASE_ASYNC'] = str(args.async_db).lower()
+    os.environ.setdefault('HTTP_CACHE_MAX_AGE_SECONDS', '0')
+
+    from benchmarks.catalog import generate_catalog
+
+    if not os.path.exists(db_path):
+        print(json.dumps({'generated': generate_catalog(os.environ['DATABASE_URL'], args.books, seed=args.seed)}),
+              file=sys.stderr)
+
+    report = asyncio.run(drive(args))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            report['regressions'] = compare(report, json.load(file), args.threshold)
+    print(json.dumps(report, indent=2))
+
+    from hashing import password_hasher
+    password_hasher.shutdown()
+    if report.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
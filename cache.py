@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe LRU cache whose entries also expire after ttl_seconds.
+    With max_bytes, sizeof(value) is charged per entry and least recently used entries are evicted to stay
+    under the budget as well. Keeps hit/miss/eviction counters for the admin stats.
+    """
+    def __init__(self, max_entries: int, ttl_seconds: float,
+                 max_bytes: int | None = None, sizeof: Callable[[V], int] | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda _: 0)
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: K, value: V):
+        size = self._sizeof(value)
+        if self.max_entries <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None
+                                                            and self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def pop(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._remove(key) if key in self._entries else None
+            return entry[1] if entry else None
+
+    def _remove(self, key: K) -> tuple[float, V]:
+        entry = self._entries.pop(key)
+        self._bytes -= self._sizeof(entry[1])
+        return entry
+
+    def pop_where(self, predicate: Callable[[K, V], bool]) -> int:
+        with self._lock:
+            keys = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                **({'bytes': self._bytes, 'max_bytes': self.max_bytes} if self.max_bytes is not None else {}),
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,55 @@
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request, Response
+from starlette import status
+
+from config import get_settings
+
+settings = get_settings()
+
+
+def cache_control() -> str:
+    # private: every read sits behind a bearer token, so shared caches must not keep it
+    if settings.HTTP_CACHE_MAX_AGE_SECONDS > 0:
+        return f"private, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}"
+    return "private, no-cache"
+
+
+def conditional_response(request: Request, response: Response, etag: str,
+                         last_modified: float | None = None) -> Response | None:
+    """
+    Set the validators on the response and answer a matching conditional GET.
+    Args:
+        request (Request): The incoming request.
+        response (Response): The response the route will return; receives the ETag and cache headers.
+        etag (str): The strong ETag of the current representation, taken before it is built.
+        last_modified (float | None): Timestamp of the last change, for lists. Defaults to None.
+    Returns:
+        Response | None: A 304 response when the client's copy is current, otherwise None.
+    """
+    now = time.time()
+    headers = {"ETag": etag, "Cache-Control": cache_control()}
+    # Last-Modified has whole seconds, so it covers every change up to the end of its second: it is only sent once
+    # that second is over, or a second change within it would compare as not modified
+    if last_modified is not None and int(last_modified) < int(now):
+        headers["Last-Modified"] = formatdate(int(last_modified), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return None
+
+    # If-Modified-Since is only consulted without If-None-Match (RFC 9110 13.1.3)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return None
+        # No Last-Modified of the current second (or later) was ever sent
+        if since < int(now) and int(last_modified) <= since:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
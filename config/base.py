@@ -1,15 +1,94 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     APP_NAME: str = 'books-fastapi'
     DEBUG: bool = False
     DATABASE_URL: str
+    DATABASE_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str | None = None
     JWT_SECRET: str
     JWT_ALGORITHM: str
     JWT_EXPIRATION_HOURS: int
     ADMIN_USERNAME: str
     ADMIN_EMAIL: str
     ADMIN_PASSWORD: str
+    # Engine profile. The SQLite pragmas are set on every new connection; None leaves the SQLite default
+    SQLITE_JOURNAL_MODE: Literal['DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'] | None = 'WAL'
+    SQLITE_SYNCHRONOUS: Literal['OFF', 'NORMAL', 'FULL', 'EXTRA'] | None = 'NORMAL'
+    # Negative: KiB, positive: pages
+    SQLITE_CACHE_SIZE: int | None = -64 * 1024
+    SQLITE_MMAP_SIZE: int | None = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int | None = 5000
+    SQLITE_TEMP_STORE: Literal['DEFAULT', 'FILE', 'MEMORY'] | None = 'MEMORY'
+    # None lets SQLAlchemy pick the pool for the URL; size and overflow apply to queue pools
+    DATABASE_POOL_CLASS: Literal['queue', 'null', 'static'] | None = None
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_PRE_PING: bool = False
+    # Route reads to their own pool: read-only (mode=ro) connections to the same SQLite file, or DATABASE_READ_URL
+    # (a replica) on other backends. A session that has written reads from the writer until it is closed.
+    DATABASE_READ_ROUTING: bool = True
+    DATABASE_READ_URL: str | None = None
+    # With reads routed away, give the SQLite writer a single connection so writers queue in the pool
+    SQLITE_SINGLE_WRITER: bool = True
+    # Prometheus metrics at /metrics: request, SQL, pool, bcrypt and JWT timings
+    METRICS_ENABLED: bool = True
+    # Per-request SQL tracking: statement count and DB time, repeated statement shapes (N+1) and the query plans
+    # of statements slower than SQL_SLOW_QUERY_MS. Budgets are statements per request, keyed by route template
+    SQL_TRACKING_ENABLED: bool = False
+    SQL_SLOW_QUERY_MS: float | None = 100
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+    SQL_DEFAULT_BUDGET: int | None = None
+    SQL_ROUTE_BUDGETS: dict[str, int] = {}
+    SQL_BUDGET_ACTION: Literal['log', 'raise'] = 'log'
+    # On-demand profiling: admin requests carrying PROFILING_HEADER, plus a sampled share of all requests, are
+    # profiled; the last PROFILING_MAX_PROFILES profiles are kept in PROFILING_DIR (default: a temp directory)
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = 'X-Profile'
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 1.0
+    PROFILING_DIR: str | None = None
+    PROFILING_MAX_PROFILES: int = 50
+    # Startup. Migrations and the admin account are set up once, by `python -m initialization`, under a file lock
+    # (default: in the temp directory); each worker then only checks the schema revision and opens
+    # STARTUP_WARM_CONNECTIONS connections per pool before it reports ready
+    BOOTSTRAP_LOCK_FILE: str | None = None
+    STARTUP_CHECK_SCHEMA: bool = True
+    STARTUP_WARM_CONNECTIONS: int = 2
+    # Pre-fork serving (python -m server): SERVER_WORKERS processes share one socket (0: one per CPU). Preloading
+    # imports the app once, before forking. A worker is replaced after SERVER_MAX_REQUESTS requests plus up to the
+    # jitter (0: never), and stopping waits up to SERVER_GRACEFUL_TIMEOUT_SECONDS for in-flight requests
+    SERVER_HOST: str = '0.0.0.0'
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 1
+    SERVER_PRELOAD: bool = True
+    SERVER_MAX_REQUESTS: int = 0
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: float = 30
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60
+    # Take the role from the token instead of the users table; role changes then apply only to new tokens
+    TRUST_JWT_ROLE_CLAIM: bool = False
+    COUNT_CACHE_SIZE: int = 1000
+    COUNT_CACHE_TTL_SECONDS: float = 30
+    # max-age for conditional GETs; 0 makes clients revalidate (If-None-Match) on every request
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 0
+    ENTITY_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    ENTITY_CACHE_TTL_SECONDS: float = 300
+    # Writes made by other worker processes reach this one's caches and ETags within this bound; 0 disables the feed
+    CHANGE_FEED_POLL_SECONDS: float = 1.0
+    CHANGE_FEED_RETENTION_SECONDS: float = 3600
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 1000
+    EXPORT_BATCH_SIZE: int = 1000
+    GENRE_BOOK_PREVIEW_SIZE: int = 10
+    GENRE_MAX_PAGE_SIZE: int = 500
+    GET_MANY_MAX_IDS: int = 100
+    BULK_UPDATE_CHUNK_SIZE: int = 500
+    HASH_POOL_WORKERS: int = 2
+    HASH_MAX_IN_FLIGHT: int = 64
 
     class Config:
         env_file = '.env'
@@ -1,16 +1,126 @@
+import os
+from typing import Any, Callable, TypeVar
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from starlette.concurrency import run_in_threadpool
+
 from config import get_settings
+from engine_profile import PoolMetrics, apply_profile, engine_options, is_single_writer, read_url
+from metrics import Gauge, instrument_engine, registry
+from query_tracker import install as install_query_tracker
 
 
 settings = get_settings()
 
 SQLALCHEMY_DATABASE_URI = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URI, connect_args={'check_same_thread': False})
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+T = TypeVar('T')
+
+
+def to_async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+_WROTE = 'routing_wrote'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends SELECTs to the read engine and everything else to the writer (its bind).
+    Once the session has written (a flush or a DML statement) every later statement goes to the writer as well,
+    so a request reads its own writes even before they commit or reach a replica. The stickiness lasts until the
+    session is closed. Statements of unknown kind and bare connection() calls go to the writer.
+    """
+    def __init__(self, *args: Any, reader: Engine | None = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.reader = reader
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self.reader is None or self.info.get(_WROTE) or clause is None:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        if self._flushing or not clause.is_select:
+            self.info[_WROTE] = True
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        return self.reader
+
+    def close(self):
+        super().close()
+        self.info.pop(_WROTE, None)
+
+
+# Utilization of every pool the app uses, by role
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def _create_engines(database_url: str, replica_url: str | None,
+                    is_async: bool = False) -> tuple[Engine | AsyncEngine, Engine | AsyncEngine | None]:
+    create = create_async_engine if is_async else create_engine
+    prefix = 'async_' if is_async else ''
+    single_writer = is_single_writer(database_url, settings)
+    writer_options = engine_options(database_url, settings, is_async, single_writer, pool_name=f'{prefix}writer')
+    writer = create(database_url, **writer_options)
+    url = read_url(database_url, settings, replica_url)
+    reader_options = engine_options(url, settings, is_async, pool_name=f'{prefix}reader') if url else {}
+    reader = create(url, **reader_options) if url else None
+    for name, created, options in ((f'{prefix}writer', writer, writer_options),
+                                   (f'{prefix}reader', reader, reader_options)):
+        if created is not None:
+            sync_engine = created.sync_engine if is_async else created
+            apply_profile(sync_engine, settings)
+            pool_metrics[name] = PoolMetrics(sync_engine, options.get('max_overflow'))
+            if settings.METRICS_ENABLED:
+                instrument_engine(sync_engine)
+            if settings.SQL_TRACKING_ENABLED:
+                install_query_tracker(sync_engine)
+    return writer, reader
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine, read_engine = _create_engines(SQLALCHEMY_DATABASE_URI, settings.DATABASE_READ_URL)
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, reader=read_engine)
+
+ASYNC_DATABASE_URI = settings.ASYNC_DATABASE_URL or to_async_url(SQLALCHEMY_DATABASE_URI)
+
+async_engine, async_read_engine = (
+    _create_engines(ASYNC_DATABASE_URI, settings.DATABASE_READ_URL and to_async_url(settings.DATABASE_READ_URL),
+                    is_async=True)
+    if settings.DATABASE_ASYNC else (None, None)
+)
+
+AsyncSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=async_engine,
+                                       sync_session_class=RoutingSession,
+                                       reader=async_read_engine.sync_engine if async_read_engine else None)
+
+registry.register(Gauge(
+    'db_pool_connections_in_use', 'Connections currently checked out of the pool.', ('pool',),
+    lambda: [((name,), metrics.in_use) for name, metrics in pool_metrics.items()]))
+registry.register(Gauge(
+    'db_pool_saturation', 'Connections in use as a share of pool size plus overflow; 1 means checkouts wait.',
+    ('pool',),
+    lambda: [((name,), saturation) for name, metrics in pool_metrics.items()
+             if (saturation := metrics.saturation()) is not None]))
+
+
+def _dispose_after_fork():
+    # A forked worker must not share its parent's connections: drop the inherited ones without closing them (they
+    # are still the parent's) and let every pool open its own
+    for created in (engine, read_engine, async_engine, async_read_engine):
+        if created is not None:
+            (created.sync_engine if isinstance(created, AsyncEngine) else created).dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_dispose_after_fork)
 
 Base = declarative_base()
 
@@ -21,3 +131,26 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Request-scoped session dependency used by the services; DATABASE_ASYNC picks the engine behind it.
+get_session = get_async_db if settings.DATABASE_ASYNC else get_db
+
+
+async def run_in_session(db: Session | AsyncSession, operation: Callable[[Session], T]) -> T:
+    """
+    Run sync ORM code against a request session without blocking the event loop.
+    Args:
+        db (Session | AsyncSession): The request-scoped session.
+        operation (Callable[[Session], T]): The sync code to run; receives the sync Session.
+    Returns:
+        T: Whatever the operation returns.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(operation)
+    return await run_in_threadpool(operation, db)
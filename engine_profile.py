@@ -0,0 +1,250 @@
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any
+from urllib.parse import quote
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool, StaticPool
+
+from config.base import Settings
+from metrics import POOL_CHECKOUT_WAIT_SECONDS
+
+
+class _TimedCheckout:
+    """Queue pool mixin recording how long each checkout waits for a connection, labelled by pool_name."""
+    pool_name = 'default'
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - started, self.pool_name)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+POOL_CLASSES = {
+    False: {'queue': QueuePool, 'null': NullPool, 'static': StaticPool},
+    True: {'queue': AsyncAdaptedQueuePool, 'null': NullPool, 'static': StaticPool},
+}
+TIMED_QUEUE_POOLS = {False: TimedQueuePool, True: TimedAsyncAdaptedQueuePool}
+
+
+@lru_cache
+def timed_queue_pool(is_async: bool, pool_name: str) -> type:
+    # The name is a class attribute: create_engine passes pools no extra arguments, and dispose() recreates the
+    # pool from its class
+    pool_class = TIMED_QUEUE_POOLS[is_async]
+    return type(pool_class.__name__, (pool_class,), {'pool_name': pool_name})
+
+# Reported by /admin/db-info; journal_mode and mmap_size can differ from the setting (e.g. in-memory databases)
+REPORTED_PRAGMAS = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'busy_timeout', 'temp_store')
+
+
+def _is_memory_sqlite(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+
+
+def sqlite_pragmas(settings: Settings) -> dict[str, str | int]:
+    """The pragmas the profile sets on each new SQLite connection, in the order they are applied."""
+    pragmas = {
+        'journal_mode': settings.SQLITE_JOURNAL_MODE,
+        'synchronous': settings.SQLITE_SYNCHRONOUS,
+        'cache_size': settings.SQLITE_CACHE_SIZE,
+        'mmap_size': settings.SQLITE_MMAP_SIZE,
+        'busy_timeout': settings.SQLITE_BUSY_TIMEOUT_MS,
+        'temp_store': settings.SQLITE_TEMP_STORE,
+    }
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def read_url(database_url: str, settings: Settings, replica_url: str | None = None) -> str | None:
+    """
+    The URL reads are routed to.
+    Args:
+        database_url (str): The writer URL.
+        settings (Settings): The profile settings.
+        replica_url (str | None): The replica URL for other backends (DATABASE_READ_URL, in the writer's driver).
+    Returns:
+        str | None: A read-only (mode=ro) URI on the same file for SQLite, the replica URL for other backends,
+        or None when reads stay on the writer (routing off, in-memory SQLite, no replica).
+    """
+    if not settings.DATABASE_READ_ROUTING:
+        return None
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite':
+        return replica_url
+    if _is_memory_sqlite(database_url) or url.query.get('uri'):
+        return None
+    path = quote(os.path.abspath(url.database))
+    return url.set(database=f'file:{path}', query={'mode': 'ro', 'uri': 'true'}).render_as_string(hide_password=False)
+
+
+def is_single_writer(database_url: str, settings: Settings) -> bool:
+    """Whether the writer engine is a single pooled connection (SQLite with reads routed elsewhere)."""
+    return (settings.SQLITE_SINGLE_WRITER and make_url(database_url).get_backend_name() == 'sqlite'
+            and read_url(database_url, settings) is not None)
+
+
+def engine_options(database_url: str, settings: Settings, is_async: bool = False,
+                   single_writer: bool = False, pool_name: str | None = None) -> dict[str, Any]:
+    """
+    Keyword arguments for create_engine/create_async_engine according to the profile.
+    Args:
+        database_url (str): The URL the engine is created for.
+        settings (Settings): The profile settings.
+        is_async (bool): Whether the options are for an async engine. Defaults to False.
+        single_writer (bool): Size a queue pool to one connection; SQLite admits one writer at a time, so
+            writers wait in the pool instead of on busy_timeout. Defaults to False.
+        pool_name (str | None): Names the pool in logs and, with METRICS_ENABLED, times its checkouts under
+            that name. Defaults to None.
+    Returns:
+        dict[str, Any]: Pool class, sizing, pre-ping and driver connect arguments.
+    """
+    backend = make_url(database_url).get_backend_name()
+    options: dict[str, Any] = {'pool_pre_ping': settings.DATABASE_POOL_PRE_PING}
+    if backend == 'sqlite' and not is_async:
+        # Connections move between the threadpool's threads; the pool never shares one concurrently
+        options['connect_args'] = {'check_same_thread': False}
+
+    pool_class = settings.DATABASE_POOL_CLASS
+    if pool_class is not None:
+        options['poolclass'] = POOL_CLASSES[is_async][pool_class]
+    # Without an explicit class SQLAlchemy uses a queue pool for everything but in-memory SQLite
+    default_queue = pool_class is None and not (backend == 'sqlite' and _is_memory_sqlite(database_url))
+    if pool_class == 'queue' or default_queue:
+        options['pool_size'] = 1 if single_writer else settings.DATABASE_POOL_SIZE
+        options['max_overflow'] = 0 if single_writer else settings.DATABASE_MAX_OVERFLOW
+        if settings.METRICS_ENABLED and pool_name is not None:
+            options['poolclass'] = timed_queue_pool(is_async, pool_name)
+    if pool_name is not None:
+        options['pool_logging_name'] = pool_name
+    return options
+
+
+def apply_profile(engine: Engine, settings: Settings):
+    """
+    Set the profile's SQLite pragmas on every connection the engine opens (no-op for other backends).
+    Args:
+        engine (Engine): The engine; for an AsyncEngine pass its sync_engine.
+        settings (Settings): The profile settings.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(settings)
+    if engine.url.query.get('mode') == 'ro':
+        # The journal mode is a property of the file, set by the writer; a read-only connection can't change it
+        pragmas.pop('journal_mode', None)
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+def engine_info(connection: Connection) -> dict[str, Any]:
+    """
+    The effective profile of the engine behind a connection: backend, pool state and, for SQLite, the pragma
+    values as the database reports them. Pool options such as pre-ping are the profile's settings.
+    Args: connection (Connection): A connection checked out from the engine.
+    Returns: dict[str, Any]: The engine description.
+    """
+    engine = connection.engine
+    pool = engine.pool
+    info: dict[str, Any] = {
+        'url': engine.url.render_as_string(hide_password=True),
+        'dialect': engine.dialect.name,
+        'driver': engine.dialect.driver,
+        'pool': {
+            'class': type(pool).__name__,
+            'status': pool.status(),
+        },
+    }
+    if isinstance(pool, QueuePool):
+        info['pool'].update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    if engine.dialect.name == 'sqlite':
+        info['sqlite_version'] = connection.exec_driver_sql('SELECT sqlite_version()').scalar()
+        info['pragmas'] = {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+                           for name in REPORTED_PRAGMAS}
+    return info
+
+
+class PoolMetrics:
+    """
+    Utilization of one engine's connection pool: checkouts, connections in use (current and peak) and the time
+    connections spent checked out, as a share of the pool's capacity since the metrics started.
+    max_overflow is the engine's option (see engine_options): None when it has none, negative when unbounded.
+    """
+    def __init__(self, engine: Engine, max_overflow: int | None = None):
+        self.engine = engine
+        self.max_overflow = max_overflow
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.busy_seconds = 0.0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        event.listen(engine, 'checkout', self._checkout)
+        event.listen(engine, 'checkin', self._checkin)
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.monotonic()
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop('checked_out_at', None)
+        if checked_out_at is None:
+            return
+        with self._lock:
+            self.in_use -= 1
+            self.busy_seconds += time.monotonic() - checked_out_at
+
+    @property
+    def pool(self):
+        # The engine replaces its pool on dispose()
+        return self.engine.pool
+
+    def capacity(self) -> int | None:
+        """Connections the pool can hand out at once; None when unbounded (or not a queue pool)."""
+        if isinstance(self.pool, QueuePool) and self.max_overflow is not None and self.max_overflow >= 0:
+            return self.pool.size() + self.max_overflow
+        return None
+
+    def saturation(self) -> float | None:
+        """Connections in use as a share of the capacity; 1.0 means the next checkout waits."""
+        capacity = self.capacity()
+        return self.in_use / capacity if capacity else None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats: dict[str, Any] = {
+                'class': type(self.pool).__name__,
+                'checkouts': self.checkouts,
+                'in_use': self.in_use,
+                'peak_in_use': self.peak_in_use,
+                'busy_seconds': round(self.busy_seconds, 3),
+            }
+        if isinstance(self.pool, QueuePool):
+            elapsed = time.monotonic() - self._started
+            stats.update(size=self.pool.size(), overflow=self.pool.overflow(),
+                         utilization=round(stats['busy_seconds'] / (elapsed * self.pool.size()), 4),
+                         saturation=round(self.saturation() or 0.0, 4))
+        return stats
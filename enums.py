@@ -5,3 +5,34 @@ class UserRole(Enum):
     USER = "USER"
     ADMIN = "ADMIN"
     ANY = "ANY"
+
+
+class BookSortField(Enum):
+    ID = "id"
+    TITLE = "title"
+    YEAR = "year"
+
+
+class GenreSortField(Enum):
+    ID = "id"
+    NAME = "name"
+
+
+class TotalMode(Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+
+
+class ImportFormat(Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ExportFormat(Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ProfileFormat(Enum):
+    SPEEDSCOPE = "speedscope"
+    COLLAPSED = "collapsed"
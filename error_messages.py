@@ -10,8 +10,24 @@ class ErrorMessages(Enum):
 
     BOOK_NOT_FOUND = "Book not found"
     ENTITY_NOT_FOUND = "Entity not found"
+    GENRE_NOT_FOUND = "Genre not found"
+    DUPLICATE_TITLE = "A book with this title already exists"
 
     INCORRECT_CREDENTIALS = "Incorrect credentials"
+    DUPLICATE_USER = "A user with this username or email already exists"
+    HASHING_OVERLOADED = "Too many concurrent authentication requests, try again later"
 
     ID_SHOULD_NOT_BE_NULL = "ID shouldn't be NULL"
+    TOO_MANY_IDS = "Too many ids requested"
+    INVALID_CURSOR = "Invalid pagination cursor"
+    CURSOR_NOT_SUPPORTED = "Cursor pagination is not supported for full-text search"
+    NO_FILTER_CRITERIA = "Filters must set at least one of title, author and query"
 
+    IMPORT_NOT_AN_OBJECT = "Record is not a JSON object"
+    IMPORT_UNTERMINATED_QUOTE = "Unterminated quoted field"
+    IMPORT_DUPLICATE_TITLE = "title: a book with this title already exists"
+    UPSERT_NOT_SUPPORTED = "Upsert is not supported by this database"
+
+    PROFILE_NOT_FOUND = "Profile not found"
+
+    NOT_READY = "Not ready to serve requests yet"
@@ -0,0 +1,138 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from fastapi import HTTPException
+from starlette import status
+
+from config import get_settings
+from error_messages import ErrorMessages
+from metrics import PASSWORD_HASH_SECONDS
+
+settings = get_settings()
+
+
+@lru_cache(maxsize=None)
+def password_context():
+    """
+    The bcrypt context, one per process; the pool workers import this module and build their own.
+    Built on first use: passlib and bcrypt stay out of the web process's startup, where only the pool hashes.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> str:
+    return password_context().hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return password_context().verify(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hash/verify on a process pool so the event loop never does the work itself.
+    At most max_in_flight operations are accepted at once (running plus queued on the pool); anything over that
+    is rejected immediately with a 503 instead of piling up behind a login spike.
+    """
+    def __init__(self, workers: int, max_in_flight: int):
+        self.workers = workers
+        self.max_in_flight = max_in_flight
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    # HASH_POOL_WORKERS=0 keeps the work in-process on a single helper thread
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hashing')
+            return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                    detail=ErrorMessages.HASHING_OVERLOADED.value)
+            self.in_flight += 1
+
+    def _release(self, started: float, operation: str):
+        elapsed = time.perf_counter() - started
+        if settings.METRICS_ENABLED:
+            PASSWORD_HASH_SECONDS.observe(elapsed, operation)
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    async def _submit(self, fn, *args):
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self._release(started, fn.__name__.lstrip('_'))
+
+    def _submit_blocking(self, fn, *args):
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            self._release(started, fn.__name__.lstrip('_'))
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(_verify, password, hashed_password)
+
+    def hash_blocking(self, password: str) -> str:
+        """For sync callers outside a request, e.g. startup scripts."""
+        return self._submit_blocking(_hash, password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_in_flight': self.max_in_flight,
+                'in_flight': self.in_flight,
+                'queue_depth': max(0, self.in_flight - max(self.workers, 1)),
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_latency_ms': round(self.total_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+                'max_latency_ms': round(self.max_seconds * 1000, 2),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def _after_fork(self):
+        # A forked server worker can't use its parent's pool (or lock); it starts its own on first use
+        self._lock = threading.Lock()
+        self._executor = None
+        self.in_flight = 0
+
+
+password_hasher = PasswordHasher(settings.HASH_POOL_WORKERS, settings.HASH_MAX_IN_FLIGHT)
+os.register_at_fork(after_in_child=password_hasher._after_fork)
@@ -1,16 +1,100 @@
-from passlib.context import CryptContext
-from sqlalchemy.exc import SQLAlchemyError
+"""
+One-shot database bootstrap: migrations and the admin account. Run it once per deployment, before the workers:
+
+    python -m initialization              migrate, then create the admin account (same as "bootstrap")
+    python -m initialization migrate      only bring the schema to the latest revision
+    python -m initialization create-admin only create the admin account
+
+Both steps are idempotent and run under an exclusive file lock, so concurrent runs on one host (several
+containers starting at once) queue instead of racing; the unique username index settles races across hosts.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from database import get_db, engine
 from enums import UserRole
+from hashing import password_hasher
 from models import User, entities
 
 from config import get_settings
 
 settings = get_settings()
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# The newest Alembic revision, which the startup check expects; tests/test_startup.py keeps it equal to the head
+SCHEMA_REVISION = '6b0933373ba3'
+
+
+def schema_revision(connection: Connection) -> str | None:
+    """The Alembic revision the database is stamped with; None when Alembic doesn't manage it."""
+    if not inspect(connection).has_table('alembic_version'):
+        return None
+    return connection.execute(text('SELECT version_num FROM alembic_version')).scalar()
+
+
+def _alembic_config(connection: Connection):
+    from alembic.config import Config
+
+    config = Config(os.path.join(ROOT, 'alembic.ini'))
+    config.set_main_option('script_location', os.path.join(ROOT, 'alembic'))
+    config.attributes['connection'] = connection
+    return config
+
+
+def migrate(bind: Engine = engine) -> str:
+    """
+    Bring the schema to SCHEMA_REVISION.
+    A database Alembic manages is upgraded; an empty one gets the current tables and is stamped, since the first
+    revisions expect tables that predate them.
+    Args: bind (Engine): The database. Defaults to the application's writer.
+    Returns: str: What was done: "up to date", "upgraded from <revision>" or "created".
+    Raises:
+        RuntimeError: If the database has tables but no Alembic revision.
+    """
+    from alembic import command
+
+    with bind.begin() as connection:
+        current = schema_revision(connection)
+        if current == SCHEMA_REVISION:
+            return 'up to date'
+        config = _alembic_config(connection)
+        if current is not None:
+            command.upgrade(config, 'head')
+            return f'upgraded from {current}'
+        if inspect(connection).get_table_names():
+            raise RuntimeError('The database has tables but no Alembic revision; stamp the revision it matches '
+                               '(alembic stamp <revision>) and run the migrations again')
+        entities.Base.metadata.create_all(bind=connection)
+        command.stamp(config, 'head')
+        return 'created'
+
+
+@contextmanager
+def bootstrap_lock(path: str | None = None) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a file for the duration of the block, waiting for other holders on the same host.
+    Args: path (str | None): The lock file. Defaults to BOOTSTRAP_LOCK_FILE, else one in the temp directory.
+    """
+    import fcntl
+
+    path = path or settings.BOOTSTRAP_LOCK_FILE or os.path.join(tempfile.gettempdir(),
+                                                                 f'{settings.APP_NAME}-bootstrap.lock')
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 
 def create_admin_user(db: Session):
@@ -22,7 +106,7 @@ def create_admin_user(db: Session):
     admin_user = User(
         username=settings.ADMIN_USERNAME,
         email=settings.ADMIN_EMAIL,
-        password=password_context.hash(settings.ADMIN_PASSWORD),
+        password=password_hasher.hash_blocking(settings.ADMIN_PASSWORD),
         role=UserRole.ADMIN.value,
     )
 
@@ -31,14 +115,42 @@ def create_admin_user(db: Session):
         db.commit()
         db.refresh(admin_user)
         print("Admin user created")
+    except IntegrityError:
+        # Created by a bootstrap on another host in the meantime
+        db.rollback()
+        print("Admin already exists")
     except SQLAlchemyError as e:
         db.rollback()
         print(f"Error while creating admin user: {e}")
 
 
 def initialize_db():
-    entities.Base.metadata.create_all(bind=engine)
+    """Migrate the schema and create the admin account, under the bootstrap lock."""
+    with bootstrap_lock():
+        migrate()
+        db = next(get_db())
+        create_admin_user(db)
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', nargs='?', default='bootstrap', choices=['bootstrap', 'migrate', 'create-admin'])
+    args = parser.parse_args()
+
+    try:
+        with bootstrap_lock():
+            if args.command in ('bootstrap', 'migrate'):
+                print(f'Schema {migrate()} (revision {SCHEMA_REVISION})')
+            if args.command in ('bootstrap', 'create-admin'):
+                db = next(get_db())
+                create_admin_user(db)
+                db.close()
+    except RuntimeError as e:
+        sys.exit(str(e))
+    finally:
+        password_hasher.shutdown()
+
 
-    db = next(get_db())
-    create_admin_user(db)
-    db.close()
+if __name__ == '__main__':
+    main()
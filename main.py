@@ -1,18 +1,31 @@
+# Imported first: the worker's import-to-ready time starts here
+from startup import worker_startup
+
 from contextlib import asynccontextmanager
 
-import uvicorn
 from fastapi import FastAPI
 
-from initialization import initialize_db
+from config import get_settings
+from hashing import password_hasher
+from metrics import MetricsMiddleware
+from profiling import ProfilingMiddleware
+from query_tracker import QueryTrackerMiddleware
 from routes import router as books_router
 from routes import user_router
 from routes import genre_router
+from routes import admin_router
+from routes import metrics_router
+from routes import health_router
+
+settings = get_settings()
 
 
 @asynccontextmanager
 async def lifespan(app_: FastAPI):
-    initialize_db()
+    # Migrations and the admin account are a deployment step (python -m initialization), not every worker's
+    await worker_startup.start()
     yield
+    password_hasher.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -20,7 +33,22 @@ app = FastAPI(lifespan=lifespan)
 app.include_router(books_router)
 app.include_router(user_router)
 app.include_router(genre_router)
+app.include_router(admin_router)
+app.include_router(health_router)
+
+if settings.SQL_TRACKING_ENABLED:
+    app.add_middleware(QueryTrackerMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+worker_startup.imported()
 
 
 if __name__ == '__main__':
+    # A single process without the supervisor, for development; `python -m server` for multiple workers
+    import uvicorn
+
     uvicorn.run(app, host='0.0.0.0', port=8000)
@@ -1,3 +1,6 @@
 from .schemas import (BookRequest, SearchRequest, UserRequest, GenreRequest, BookResponse, GenreResponse,
-                      LoginRequest, LoginResponse, PaginatedResponse, ChangePasswordRequest)
-from .entities import Book, User, Genre
+                      LoginRequest, LoginResponse, PaginatedResponse, ChangePasswordRequest, Principal,
+                      BookSearchResult, ImportReport, ImportRowError, GetManyRequest, GetManyResponse,
+                      AssignGenreRequest, BookPatch, BulkUpdateReport)
+from .entities import Book, User, Genre, ChangeLog
+from .search_index import books_fts, has_books_fts, BOOKS_FTS_TABLE
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Float
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -6,6 +6,13 @@ from database import Base
 
 class Book(Base):
     __tablename__ = 'books'
+    __table_args__ = (
+        # (sort column, id) pairs back the keyset pagination seek predicates
+        Index('ix_books_title_id', 'title', 'id'),
+        Index('ix_books_year_id', 'year', 'id'),
+        # Serves the per-genre book counts, previews and /genre/{id}/books pages
+        Index('ix_books_genre_id_id', 'genre_id', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, unique=True)
@@ -28,7 +35,21 @@ class User(Base):
     __tablename__ = 'users'
 
     id = Column(Integer, primary_key=True, index=True)
-    username = Column(String)
+    # Looked up by every login and every token without a trusted role claim
+    username = Column(String, unique=True, index=True)
     email = Column(String, unique=True)
     password = Column(String)
     role = Column(String)
+
+
+class ChangeLog(Base):
+    """Committed writes in sequence order, so every worker process can invalidate what another one changed."""
+    __tablename__ = 'change_log'
+    # AUTOINCREMENT: a sequence number is never reused, even once the log has been pruned empty
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    seq = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)
+    # NULL when any row of the table may have changed (bulk statements)
+    row_id = Column(Integer)
+    changed_at = Column(Float, nullable=False, index=True)
@@ -1,5 +1,7 @@
 from typing import Optional, Generic, TypeVar, List
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+
+from enums import TotalMode
 
 T = TypeVar('T')
 
@@ -24,13 +26,83 @@ class GenreRequest(BaseModel):
 class SearchRequest(BaseModel):
     title: Optional[str] = Field(default=None)
     author: Optional[str] = Field(default=None)
+    query: Optional[str] = Field(default=None, description="Ranked full-text query over title and author; "
+                                                           "every term is prefix-matched")
+
+    @property
+    def has_criteria(self) -> bool:
+        # Empty strings filter nothing, the same as omitted fields
+        return bool(self.title or self.author or self.query)
 
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
-    current_page: int
-    total_pages: int
-    total_items: int
+    current_page: Optional[int]
+    total_pages: Optional[int]
+    total_items: Optional[int]
+    total_mode: Optional[TotalMode] = TotalMode.EXACT
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class GetManyRequest(BaseModel):
+    ids: List[int] = Field(min_length=1)
+
+
+class GetManyResponse(BaseModel, Generic[T]):
+    # One entry per requested id, in request order; null where the id was not found
+    items: List[Optional[T]]
+    not_found: List[int]
+
+
+class AssignGenreRequest(BaseModel):
+    genre_id: int = Field(gt=0)
+    ids: Optional[List[int]] = Field(default=None, description="The books to assign; or use filters")
+    filters: Optional[SearchRequest] = Field(default=None, description="Assign every book matching these filters")
+
+    @model_validator(mode="after")
+    def ids_or_filters(self) -> "AssignGenreRequest":
+        if (self.ids is None) == (self.filters is None):
+            raise ValueError("Exactly one of ids and filters is required")
+        if self.filters is not None and not self.filters.has_criteria:
+            raise ValueError("filters must set at least one of title, author and query")
+        return self
+
+
+class BookPatch(BaseModel):
+    id: int
+    title: Optional[str] = Field(default=None, min_length=3)
+    author: Optional[str] = Field(default=None, min_length=3)
+    year: Optional[int] = Field(default=None, lt=2100)
+    pages: Optional[int] = Field(default=None, gt=0)
+    genre_id: Optional[int] = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def changes_something(self) -> "BookPatch":
+        # A patch without changes would be missing from the report: neither updated nor found missing
+        if not self.model_dump(exclude={"id"}, exclude_none=True):
+            raise ValueError("At least one field to change is required")
+        return self
+
+
+class BulkUpdateReport(BaseModel):
+    requested: int
+    updated: int
+    # Requested ids that matched no book; None when the database cannot report them (no UPDATE ... RETURNING)
+    not_found: Optional[List[int]] = None
+
+
+class ImportRowError(BaseModel):
+    line: int
+    errors: List[str]
+
+
+class ImportReport(BaseModel):
+    rows_read: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = Field(default_factory=list)
+    errors_truncated: bool = False
 
 
 class UserRequest(BaseModel):
@@ -54,6 +126,14 @@ class LoginResponse(BaseModel):
     username: str = Field(min_length=3)
 
 
+class Principal(BaseModel):
+    id: Optional[int] = None
+    username: str
+    role: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
 class ChangePasswordRequest(BaseModel):
     id: int
     username: str = Field(min_length=3)
@@ -65,5 +145,13 @@ class BookResponse(BookRequest):
     genre: Optional[GenreRequest] = None
 
 
+class BookSearchResult(BookRequest):
+    title_highlight: Optional[str] = None
+    author_highlight: Optional[str] = None
+    rank: Optional[float] = None
+
+
 class GenreResponse(GenreRequest):
-    books: Optional[List[BookRequest]] = None
+    book_count: Optional[int] = None
+    books: Optional[List[BookRequest]] = Field(default=None, description="The genre's first books by id, "
+                                                                        "capped by books_limit")
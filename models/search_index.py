@@ -0,0 +1,50 @@
+from sqlalchemy import DDL, event, table, column
+from sqlalchemy.engine import Connection
+
+from .entities import Book
+
+BOOKS_FTS_TABLE = 'books_fts'
+
+# External-content FTS5 index over books(title, author); the triggers keep it in step with every write to books,
+# including bulk inserts that bypass the ORM.
+BOOKS_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {BOOKS_FTS_TABLE} USING fts5(
+        title, author, content='books', content_rowid='id', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO {BOOKS_FTS_TABLE}(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO {BOOKS_FTS_TABLE}({BOOKS_FTS_TABLE}, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author ON books BEGIN
+        INSERT INTO {BOOKS_FTS_TABLE}({BOOKS_FTS_TABLE}, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO {BOOKS_FTS_TABLE}(rowid, title, author) VALUES (new.id, new.title, new.author);
+    END""",
+]
+
+books_fts = table(BOOKS_FTS_TABLE, column('rowid'), column('title'), column('author'))
+
+for statement in BOOKS_FTS_DDL:
+    event.listen(Book.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+_fts_available: dict[str, bool] = {}
+
+
+def has_books_fts(connection: Connection) -> bool:
+    """
+    Whether the database behind the connection has the books full-text index (checked once per database).
+    Args: connection (Connection): Any connection to the database.
+    Returns: bool: True when books_fts exists.
+    """
+    url = str(connection.engine.url)
+    if url not in _fts_available:
+        _fts_available[url] = (
+            connection.dialect.name == 'sqlite'
+            and connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (BOOKS_FTS_TABLE,)
+            ).first() is not None
+        )
+    return _fts_available[url]
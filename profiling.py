@@ -0,0 +1,293 @@
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from types import FrameType
+from typing import Any
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from config import get_settings
+from enums import UserRole
+
+settings = get_settings()
+
+Frame = tuple[str, str, int]  # qualified name, file, first line
+
+PROFILE_ID = re.compile(r'^[0-9]+-[0-9a-f]+$')
+
+# Segments a sample is charged to: the first match from the innermost frame outwards, anything else is "app"
+SEGMENTS = (
+    ('sql', ('/sqlalchemy/engine/', '/sqlalchemy/dialects/', '/sqlite3/', '/aiosqlite/', '/psycopg', '/asyncpg/')),
+    ('validation', ('/pydantic/', '/fastapi/_compat.py', '/fastapi/encoders.py')),
+    ('jwt', ('/jwt/',)),
+    ('bcrypt', ('/passlib/', '/bcrypt/', '/hashing.py')),
+)
+
+
+def _frame_key(frame: FrameType) -> Frame:
+    code = frame.f_code
+    return code.co_qualname, code.co_filename, code.co_firstlineno
+
+
+def _frames_from(frame: FrameType | None) -> list[FrameType]:
+    """A thread's stack, outermost frame first."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _await_chain(awaitable: Any) -> tuple[list[FrameType], Any]:
+    """The frames of a (suspended or running) coroutine and everything it awaits, plus the innermost awaitable."""
+    frames = []
+    while True:
+        frame = getattr(awaitable, 'cr_frame', None) or getattr(awaitable, 'gi_frame', None)
+        if frame is None:
+            return frames, awaitable
+        frames.append(frame)
+        inner = getattr(awaitable, 'cr_await', None) or getattr(awaitable, 'gi_yieldfrom', None)
+        if inner is None:
+            return frames, awaitable
+        awaitable = inner
+
+
+def _worker_stack(frame: FrameType, current_frames: dict[int, FrameType]) -> list[FrameType]:
+    """The stack of the worker thread an anyio to_thread call is waiting on, below the worker's own loop."""
+    worker = frame.f_locals.get('worker')
+    stack = _frames_from(current_frames.get(getattr(worker, 'ident', None)))
+    for index, worker_frame in enumerate(stack):
+        if worker_frame.f_code.co_name == 'run' and worker_frame.f_locals.get('self') is worker:
+            return stack[index + 1:]
+    return []
+
+
+def segment_of(stack: tuple[Frame, ...]) -> str:
+    for _, filename, _ in reversed(stack):
+        for segment, markers in SEGMENTS:
+            if any(marker in filename for marker in markers):
+                return segment
+    return 'app'
+
+
+class RequestProfile:
+    """
+    Wall-clock samples of one request. Each sample is the request's stack at that moment: the event loop's
+    stack while the request runs, otherwise the chain of awaits it is suspended in, extended into the worker
+    thread when it waits on the threadpool. Time spent waiting (on the hashing pool, a pool checkout, the
+    database) therefore counts, just as it does for the client.
+    """
+    def __init__(self, profile_id: str, label: str, interval: float):
+        self.profile_id = profile_id
+        self.label = label
+        self.interval = interval
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.status: int | None = None
+        # stack (outermost first) -> milliseconds
+        self.stacks: dict[tuple[Frame, ...], float] = {}
+
+    def sample(self, coroutine: Any, loop_thread_id: int, elapsed: float):
+        chain, innermost = _await_chain(coroutine)
+        if not chain:
+            return
+        current_frames = sys._current_frames()
+        loop_stack = _frames_from(current_frames.get(loop_thread_id))
+        if chain[0] in loop_stack:
+            stack = loop_stack[loop_stack.index(chain[0]):]
+        else:
+            stack = list(chain)
+            if getattr(innermost, 'cr_running', False):
+                # Running without our frames on the loop's stack: inside a greenlet (async SQLAlchemy's run_sync)
+                stack += loop_stack
+            for frame in chain:
+                if frame.f_code.co_name == 'run_sync_in_worker_thread':
+                    stack += _worker_stack(frame, current_frames)
+        key = tuple(_frame_key(frame) for frame in stack)
+        self.stacks[key] = self.stacks.get(key, 0.0) + elapsed * 1000
+
+    def segments(self) -> dict[str, float]:
+        totals = {segment: 0.0 for segment, _ in SEGMENTS} | {'app': 0.0}
+        for stack, ms in self.stacks.items():
+            totals[segment_of(stack)] += ms
+        return {segment: round(ms, 2) for segment, ms in totals.items()}
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            'id': self.profile_id,
+            'label': self.label,
+            'status': self.status,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 2),
+            'sampled_ms': round(sum(self.stacks.values()), 2),
+            'interval_ms': self.interval * 1000,
+            'segments_ms': self.segments(),
+        }
+
+    def to_speedscope(self) -> dict[str, Any]:
+        """The profile in speedscope's file format (https://www.speedscope.app), one sampled profile."""
+        frames: dict[Frame, int] = {}
+        samples, weights = [], []
+        for stack, ms in self.stacks.items():
+            samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+            weights.append(round(ms, 3))
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': self.label,
+            'exporter': settings.APP_NAME,
+            'shared': {'frames': [{'name': name, 'file': file, 'line': line} for name, file, line in frames]},
+            'profiles': [{
+                'type': 'sampled', 'name': self.label, 'unit': 'milliseconds',
+                'startValue': 0, 'endValue': round(sum(weights), 3), 'samples': samples, 'weights': weights,
+            }],
+        }
+
+
+def collapsed_stacks(speedscope: dict[str, Any]) -> str:
+    """Brendan Gregg's collapsed stack format (flamegraph.pl, speedscope, inferno), weights in microseconds."""
+    frames = speedscope['shared']['frames']
+    profile = speedscope['profiles'][0]
+    lines = []
+    for sample, weight in zip(profile['samples'], profile['weights']):
+        names = [f"{frames[index]['name']} ({os.path.basename(frames[index]['file'])}:{frames[index]['line']})"
+                 for index in sample]
+        lines.append(f"{';'.join(names)} {round(weight * 1000)}")
+    return '\n'.join(lines) + '\n'
+
+
+class ProfileStore:
+    """The most recent max_profiles profiles, one JSON file each in a directory; older ones are deleted."""
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str) -> str:
+        if not PROFILE_ID.match(profile_id):
+            raise KeyError(profile_id)
+        return os.path.join(self.directory, f'{profile_id}.json')
+
+    def save(self, profile: RequestProfile):
+        document = {'summary': profile.summary(), 'speedscope': profile.to_speedscope()}
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(profile.profile_id)
+            with open(f'{path}.tmp', 'w') as file:
+                json.dump(document, file)
+            os.replace(f'{path}.tmp', path)
+            for profile_id in self._ids()[:-self.max_profiles]:
+                os.unlink(self._path(profile_id))
+
+    def _ids(self) -> list[str]:
+        # Ids start with the start time in milliseconds, so they sort oldest first
+        if not os.path.isdir(self.directory):
+            return []
+        ids = [name[:-len('.json')] for name in os.listdir(self.directory) if name.endswith('.json')]
+        return sorted((profile_id for profile_id in ids if PROFILE_ID.match(profile_id)),
+                      key=lambda profile_id: int(profile_id.split('-')[0]))
+
+    def list(self) -> list[dict[str, Any]]:
+        summaries = []
+        for profile_id in reversed(self._ids()):
+            try:
+                summaries.append(self.get(profile_id)['summary'])
+            except KeyError:
+                continue  # deleted by a concurrent save
+        return summaries
+
+    def get(self, profile_id: str) -> dict[str, Any]:
+        try:
+            with open(self._path(profile_id)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            raise KeyError(profile_id)
+
+
+profile_store = ProfileStore(
+    settings.PROFILING_DIR or os.path.join(tempfile.gettempdir(), f'{settings.APP_NAME}-profiles'),
+    settings.PROFILING_MAX_PROFILES,
+)
+
+
+async def _requested_by_admin(scope) -> bool:
+    from auth import decode_jwt_claims, resolve_principal
+    from database import AsyncSessionLocal, SessionLocal
+
+    authorization = dict(scope['headers']).get(b'authorization', b'').decode('latin-1')
+    scheme, _, token = authorization.partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    try:
+        claims = decode_jwt_claims(token)
+        if settings.DATABASE_ASYNC:
+            async with AsyncSessionLocal() as db:
+                principal = await resolve_principal(claims, db)
+        else:
+            with SessionLocal() as db:
+                principal = await resolve_principal(claims, db)
+    except HTTPException:
+        return False
+    return principal.role == UserRole.ADMIN.name
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests from an admin that carry the PROFILING_HEADER header, plus a PROFILING_SAMPLE_RATE share of
+    all requests. A profiled request gets an X-Profile-Id response header; the profile is kept in profile_store
+    and served by /admin/profiles. Only installed when PROFILING_ENABLED, so it costs nothing otherwise.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.PROFILING_HEADER.lower().encode('latin-1')
+
+    async def _should_profile(self, scope) -> bool:
+        if any(name == self.header for name, _ in scope['headers']):
+            return await _requested_by_admin(scope)
+        return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not await self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(f'{int(time.time() * 1000)}-{secrets.token_hex(4)}', scope['path'],
+                                 settings.PROFILING_INTERVAL_MS / 1000)
+
+        async def send_with_profile_id(message):
+            if message['type'] == 'http.response.start':
+                profile.status = message['status']
+                message['headers'] = [*message.get('headers', []),
+                                      (b'x-profile-id', profile.profile_id.encode('latin-1'))]
+            await send(message)
+
+        coroutine = self.app(scope, receive, send_with_profile_id)
+        loop_thread_id = threading.get_ident()
+        stop = threading.Event()
+
+        def sampler():
+            last = time.perf_counter()
+            while not stop.wait(profile.interval):
+                now = time.perf_counter()
+                profile.sample(coroutine, loop_thread_id, now - last)
+                last = now
+
+        thread = threading.Thread(target=sampler, name=f'profiler-{profile.profile_id}', daemon=True)
+        started = time.perf_counter()
+        thread.start()
+        try:
+            await coroutine
+        finally:
+            stop.set()
+            profile.duration = time.perf_counter() - started
+            route = scope.get('route')
+            profile.label = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+            thread.join()
+            await run_in_threadpool(profile_store.save, profile)
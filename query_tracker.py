@@ -0,0 +1,228 @@
+import logging
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import get_settings
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar['QueryTracker | None'] = ContextVar('query_tracker', default=None)
+
+# Statements whose plan is worth reading; EXPLAIN of DDL or PRAGMAs says nothing
+_EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+_IN_LIST = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)|\((?:\s*%\(\w+\)s\s*,)+\s*%\(\w+\)s\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_SPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised by a strict tracker when a request goes over its statement budget or repeats a statement shape."""
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """
+    The statement with IN-lists, literal numbers and whitespace collapsed, so the same query with different
+    parameters or list lengths has one shape.
+    """
+    shape = _IN_LIST.sub('(?)', statement)
+    shape = _NUMBER.sub('?', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+
+def full_table_scans(plan: list[str]) -> list[str]:
+    """
+    Tables read in full according to SQLite EXPLAIN QUERY PLAN details, e.g. "SCAN books". Index scans, virtual
+    tables (FTS), subqueries and the schema table are not counted.
+    """
+    subqueries = {match.group(1) for detail in plan if (match := re.match(r'(?:CO-ROUTINE|MATERIALIZE) (\w+)', detail))}
+    scans = []
+    for detail in plan:
+        match = re.match(r'SCAN (?:TABLE )?(\w+)(.*)', detail)
+        if match is None or 'USING' in match.group(2) or 'VIRTUAL TABLE' in match.group(2):
+            continue
+        table = match.group(1)
+        if table != 'CONSTANT' and table not in subqueries and not table.startswith('sqlite_'):
+            scans.append(table)
+    return scans
+
+
+class QueryTracker:
+    """
+    SQL issued while the tracker is current (see track_queries): statement count, total DB time, repeated
+    statement shapes (N+1) and, for statements slower than slow_ms, the SQLite query plan and full table scans.
+    A strict tracker raises QueryBudgetExceeded as soon as the budget or the N+1 threshold is crossed.
+    """
+    def __init__(self, budget: int | None | Callable[[], int | None] = None, strict: bool = False,
+                 n_plus_one_threshold: int = settings.SQL_N_PLUS_ONE_THRESHOLD,
+                 slow_ms: float | None = settings.SQL_SLOW_QUERY_MS, label: str = ''):
+        self._budget = budget
+        self.strict = strict
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_ms = slow_ms
+        self.label = label
+        self.statements = 0
+        self.seconds = 0.0
+        self.shapes: dict[str, int] = {}
+        self.slow: list[dict[str, Any]] = []
+        self.violations: list[str] = []
+
+    @property
+    def budget(self) -> int | None:
+        # Resolved late: a request's route (and so its budget) is only known once it has been routed
+        return self._budget() if callable(self._budget) else self._budget
+
+    @property
+    def n_plus_one(self) -> dict[str, int]:
+        return {shape: count for shape, count in self.shapes.items() if count >= self.n_plus_one_threshold}
+
+    @property
+    def full_table_scans(self) -> list[str]:
+        return sorted({table for slow in self.slow for table in slow['full_table_scans']})
+
+    def _violate(self, message: str):
+        self.violations.append(message)
+        if self.strict:
+            raise QueryBudgetExceeded(message)
+
+    def before_statement(self, statement: str):
+        self.statements += 1
+        shape = statement_shape(statement)
+        count = self.shapes[shape] = self.shapes.get(shape, 0) + 1
+        budget = self.budget
+        if budget is not None and self.statements == budget + 1:
+            self._violate(f'{self.label or "block"} ran more than {budget} SQL statements')
+        if count == self.n_plus_one_threshold:
+            self._violate(f'possible N+1: {count} x {shape}')
+
+    def after_statement(self, connection, statement: str, parameters: Any, executemany: bool, elapsed: float):
+        self.seconds += elapsed
+        if self.slow_ms is None or elapsed * 1000 < self.slow_ms:
+            return
+        slow: dict[str, Any] = {'statement': statement, 'ms': round(elapsed * 1000, 2), 'plan': [],
+                                'full_table_scans': []}
+        explainable = statement.lstrip().split(None, 1)[0].upper() in _EXPLAINABLE if statement.strip() else False
+        if connection.dialect.name == 'sqlite' and explainable and not executemany:
+            # A raw DBAPI cursor on the same connection: no events fire and the transaction is the same
+            cursor = connection.connection.cursor()
+            try:
+                cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+                slow['plan'] = [row[3] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+            slow['full_table_scans'] = full_table_scans(slow['plan'])
+        self.slow.append(slow)
+
+    def report(self) -> dict[str, Any]:
+        return {
+            'label': self.label,
+            'statements': self.statements,
+            'db_ms': round(self.seconds * 1000, 2),
+            'budget': self.budget,
+            'n_plus_one': self.n_plus_one,
+            'slow': self.slow,
+            'full_table_scans': self.full_table_scans,
+            'violations': self.violations,
+        }
+
+
+@contextmanager
+def track_queries(*args: Any, **kwargs: Any) -> Iterator[QueryTracker]:
+    """
+    Track the SQL run inside the block on every engine passed to install(); arguments are QueryTracker's.
+    A strict tracker also raises on leaving the block, in case its QueryBudgetExceeded was caught on the way.
+    """
+    tracker = QueryTracker(*args, **kwargs)
+    token = _current.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current.reset(token)
+    if tracker.strict and tracker.violations:
+        raise QueryBudgetExceeded('; '.join(tracker.violations))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = _current.get()
+    if tracker is not None:
+        tracker.before_statement(statement)
+        conn.info.setdefault('tracker_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = _current.get()
+    if tracker is not None and conn.info.get('tracker_started'):
+        elapsed = time.perf_counter() - conn.info['tracker_started'].pop()
+        tracker.after_statement(conn, statement, parameters, executemany, elapsed)
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('tracker_started'):
+        connection.info['tracker_started'].pop()
+
+
+def install(engine: Engine):
+    """
+    Report the engine's statements to the current tracker, if any. Idempotent.
+    Args: engine (Engine): The engine; for an AsyncEngine pass its sync_engine.
+    """
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+
+
+def route_budget(route_path: str | None) -> int | None:
+    """The SQL statement budget of a route template: SQL_ROUTE_BUDGETS, else SQL_DEFAULT_BUDGET."""
+    return settings.SQL_ROUTE_BUDGETS.get(route_path, settings.SQL_DEFAULT_BUDGET)
+
+
+class QueryTrackerMiddleware:
+    """
+    Pure ASGI middleware tracking each request's SQL against its route's budget. With SQL_BUDGET_ACTION=raise
+    the request fails on the statement that crosses the budget or the N+1 threshold; with "log" the report of a
+    request with violations, slow statements or full table scans is logged and kept in `flagged` for
+    /admin/stats.
+    """
+    flagged: deque[dict[str, Any]] = deque(maxlen=50)
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        def budget() -> int | None:
+            route = scope.get('route')
+            return route_budget(getattr(route, 'path', None))
+
+        # Not track_queries: by the time the block is left the response has been sent, too late to raise
+        tracker = QueryTracker(budget, strict=settings.SQL_BUDGET_ACTION == 'raise')
+        token = _current.set(tracker)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            route = scope.get('route')
+            tracker.label = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+            if tracker.violations or tracker.slow:
+                report = tracker.report()
+                self.flagged.append(report)
+                logger.warning('SQL report for %s: %s', tracker.label, report)
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        return {'flagged': list(cls.flagged)}
@@ -1,3 +1,6 @@
 from .book_routes import router
 from .user_routes import user_router
 from .genre_routes import genre_router
+from .admin_routes import admin_router
+from .metrics_routes import metrics_router
+from .health_routes import health_router
@@ -0,0 +1,88 @@
+import json
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from sqlalchemy.engine import Engine
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+
+from auth import filter_for_role, principal_cache
+from config import get_settings
+from database import async_engine, async_read_engine, engine, pool_metrics, read_engine
+from engine_profile import engine_info, sqlite_pragmas
+from enums import ProfileFormat, UserRole
+from error_messages import ErrorMessages
+from hashing import password_hasher
+from profiling import collapsed_stacks, profile_store
+from query_tracker import QueryTrackerMiddleware
+from service.count_cache import count_cache
+from service.entity_cache import entity_cache
+from service.versions import change_feed
+from startup import worker_startup
+
+settings = get_settings()
+
+admin_router = APIRouter(prefix="/admin")
+
+
+def _sync_engine_info(sync_engine: Engine) -> dict:
+    with sync_engine.connect() as connection:
+        return engine_info(connection)
+
+
+@admin_router.get("/stats", status_code=status.HTTP_200_OK)
+async def get_stats(payload: Any = Depends(filter_for_role(UserRole.ADMIN))):
+    return {
+        "hashing": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "count_cache": count_cache.stats(),
+        "entity_cache": entity_cache.stats(),
+        "change_feed": change_feed.stats(),
+        "pools": {name: metrics.stats() for name, metrics in pool_metrics.items()},
+        "sql_tracker": QueryTrackerMiddleware.stats(),
+        "startup": worker_startup.report(),
+    }
+
+
+@admin_router.get("/db-info", status_code=status.HTTP_200_OK)
+async def get_db_info(payload: Any = Depends(filter_for_role(UserRole.ADMIN))):
+    engines = {"writer": await run_in_threadpool(_sync_engine_info, engine)}
+    if read_engine is not None:
+        engines["reader"] = await run_in_threadpool(_sync_engine_info, read_engine)
+    for name, async_db_engine in (("async_writer", async_engine), ("async_reader", async_read_engine)):
+        if async_db_engine is not None:
+            async with async_db_engine.connect() as connection:
+                engines[name] = await connection.run_sync(engine_info)
+    return {
+        "profile": {
+            "sqlite_pragmas": sqlite_pragmas(settings),
+            "pool_class": settings.DATABASE_POOL_CLASS,
+            "pool_size": settings.DATABASE_POOL_SIZE,
+            "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+            "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+            "read_routing": read_engine is not None,
+        },
+        "engines": engines,
+    }
+
+
+@admin_router.get("/profiles", status_code=status.HTTP_200_OK)
+async def get_profiles(payload: Any = Depends(filter_for_role(UserRole.ADMIN))):
+    return {"enabled": settings.PROFILING_ENABLED, "profiles": await run_in_threadpool(profile_store.list)}
+
+
+@admin_router.get("/profiles/{profile_id}", status_code=status.HTTP_200_OK)
+async def download_profile(profile_id: str = Path(pattern=r"^[0-9]+-[0-9a-f]+$"),
+                           profile_format: ProfileFormat = Query(ProfileFormat.SPEEDSCOPE, alias="format"),
+                           payload: Any = Depends(filter_for_role(UserRole.ADMIN))):
+    try:
+        document = await run_in_threadpool(profile_store.get, profile_id)
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=ErrorMessages.PROFILE_NOT_FOUND.value)
+
+    if profile_format == ProfileFormat.COLLAPSED:
+        content, media_type, extension = collapsed_stacks(document["speedscope"]), "text/plain", "collapsed.txt"
+    else:
+        content, media_type, extension = json.dumps(document["speedscope"]), "application/json", "speedscope.json"
+    return Response(content, media_type=media_type,
+                    headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.{extension}"'})
@@ -1,61 +1,117 @@
-from typing import Any
+from typing import Any, Optional
 
-from fastapi import APIRouter, Path, HTTPException, Depends, Query
+from fastapi import APIRouter, Path, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from starlette import status
 
 from auth import filter_for_role
-from enums import UserRole
+from conditional import conditional_response
+from config import get_settings
+from database import SessionLocal
+from enums import UserRole, BookSortField, TotalMode, ImportFormat, ExportFormat
 from error_messages import ErrorMessages
-from models import BookRequest, SearchRequest, PaginatedResponse, BookResponse
-from service import BookService, get_book_service
+from models import (Book, Genre, BookRequest, SearchRequest, PaginatedResponse, BookResponse, BookSearchResult,
+                    ImportReport, GetManyRequest, GetManyResponse, AssignGenreRequest, BookPatch, BulkUpdateReport)
+from service import AsyncService, BookService, get_book_service, versions
+from service.book_export import MEDIA_TYPES, gzip_chunks
+from serialization import json_response
+
+settings = get_settings()
 
 router = APIRouter(prefix="/book")
 
 
 @router.get("/get-all", status_code=status.HTTP_200_OK, response_model=PaginatedResponse[BookResponse])
 async def get_all(
+        request: Request,
+        response: Response,
         page: int = Query(1, ge=1),
         page_size: int = Query(10, ge=1),
-        service: BookService = Depends(get_book_service),
+        cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page; empty to start"),
+        sort_by: BookSortField = Query(BookSortField.ID),
+        include_total: bool = Query(True),
+        total_mode: TotalMode = Query(TotalMode.EXACT),
+        service: AsyncService[BookService] = Depends(get_book_service),
         payload: Any = Depends(filter_for_role(UserRole.ANY))):
 
-    return service.get_all_books(page, page_size)
+    await service.sync_changes()
+    tables = (Book.__tablename__, Genre.__tablename__)
+    not_modified = conditional_response(request, response, versions.table_etag(*tables),
+                                        versions.last_modified(*tables))
+    if not_modified:
+        return not_modified
+
+    books = await service.get_all_books(page, page_size, cursor, sort_by.value, include_total, total_mode.value)
+    return json_response(PaginatedResponse[BookResponse], books, response)
 
 
 @router.get("/get/{book_id}", status_code=status.HTTP_200_OK, response_model=BookResponse)
-async def get_one(service: BookService = Depends(get_book_service),
+async def get_one(request: Request,
+                  response: Response,
+                  service: AsyncService[BookService] = Depends(get_book_service),
                   payload: Any = Depends(filter_for_role(UserRole.ANY)),
                   book_id: int = Path(gt=0)):
 
-    return service.get_book(book_id)
+    await service.sync_changes()
+    etag = versions.entity_etag(Book.__tablename__, book_id, Genre.__tablename__)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    return await service.get_book(book_id)
+
+
+@router.post("/get-many", status_code=status.HTTP_200_OK, response_model=GetManyResponse[BookResponse])
+async def get_many(get_many_request: GetManyRequest,
+                   service: AsyncService[BookService] = Depends(get_book_service),
+                   payload: Any = Depends(filter_for_role(UserRole.ANY))):
+
+    return json_response(GetManyResponse[BookResponse], await service.get_books_by_ids(get_many_request.ids))
 
 
 @router.post("/add", status_code=status.HTTP_201_CREATED, response_model=BookRequest)
 async def create_book(book_request: BookRequest,
-                      service: BookService = Depends(get_book_service),
+                      service: AsyncService[BookService] = Depends(get_book_service),
                       payload: Any = Depends(filter_for_role(UserRole.ANY))):
 
-    return service.create_new_book(book_request)
+    return await service.create_new_book(book_request)
 
 
 @router.patch("/update", status_code=status.HTTP_200_OK, response_model=BookRequest)
 async def update_book(book_request: BookRequest,
-                      service: BookService = Depends(get_book_service),
+                      service: AsyncService[BookService] = Depends(get_book_service),
                       payload: Any = Depends(filter_for_role(UserRole.ANY))):
 
     if book_request.id is None:
         raise HTTPException(status_code=400, detail=ErrorMessages.ID_SHOULD_NOT_BE_NULL.value)
 
-    return service.update_book(book_request.id, book_request)
+    return await service.update_book(book_request.id, book_request)
 
 
 @router.get("/add-genre/{book_id}/{genre_id}", status_code=status.HTTP_200_OK, response_model=BookResponse)
 async def add_book_to_genre(book_id: int = Path(gt=0),
                             genre_id: int = Path(gt=0),
-                            service: BookService = Depends(get_book_service),
+                            service: AsyncService[BookService] = Depends(get_book_service),
                             payload: Any = Depends(filter_for_role(UserRole.ANY))):
 
-    return service.add_book_to_genre(book_id, genre_id)
+    return await service.add_book_to_genre(book_id, genre_id)
+
+
+@router.post("/assign-genre", status_code=status.HTTP_200_OK, response_model=BulkUpdateReport)
+async def assign_genre(assign_genre_request: AssignGenreRequest,
+                       service: AsyncService[BookService] = Depends(get_book_service),
+                       payload: Any = Depends(filter_for_role(UserRole.ADMIN))):
+
+    return await service.assign_genre(assign_genre_request.genre_id, assign_genre_request.ids,
+                                      assign_genre_request.filters)
+
+
+@router.patch("/update-many", status_code=status.HTTP_200_OK, response_model=BulkUpdateReport)
+async def update_many(patches: list[BookPatch],
+                      service: AsyncService[BookService] = Depends(get_book_service),
+                      payload: Any = Depends(filter_for_role(UserRole.ADMIN))):
+
+    return await service.update_books(patches)
 
 
 @router.delete("/delete/{book_id}", status_code=status.HTTP_200_OK)
@@ -65,12 +121,51 @@ async def delete_book(book_id: int = Path(gt=0),
     return {"message": f"I deleted book with id {book_id}"}
 
 
-@router.post("/search", status_code=status.HTTP_200_OK, response_model=PaginatedResponse[BookRequest])
+@router.post("/search", status_code=status.HTTP_200_OK, response_model=PaginatedResponse[BookSearchResult])
 async def search_book(
         search_filters: SearchRequest,
         page: int = Query(1, ge=1),
         page_size: int = Query(10, ge=1),
-        service: BookService = Depends(get_book_service),
+        cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page; empty to start"),
+        sort_by: BookSortField = Query(BookSortField.ID),
+        include_total: bool = Query(True),
+        total_mode: TotalMode = Query(TotalMode.EXACT),
+        service: AsyncService[BookService] = Depends(get_book_service),
         payload: Any = Depends(filter_for_role(UserRole.ANY))):
 
-    return service.search_books(search_filters, page, page_size)
+    books = await service.search_books(search_filters, page, page_size, cursor, sort_by.value,
+                                       include_total, total_mode.value)
+    return json_response(PaginatedResponse[BookSearchResult], books)
+
+
+@router.post("/import", status_code=status.HTTP_200_OK, response_model=ImportReport,
+             openapi_extra={"requestBody": {"required": True,
+                                            "content": {"application/x-ndjson": {}, "text/csv": {}}}})
+async def import_books(request: Request,
+                       import_format: ImportFormat = Query(ImportFormat.NDJSON, alias="format"),
+                       batch_size: int = Query(settings.IMPORT_BATCH_SIZE, ge=1, le=10000),
+                       upsert: bool = Query(False, description="Update books whose title already exists"),
+                       service: AsyncService[BookService] = Depends(get_book_service),
+                       payload: Any = Depends(filter_for_role(UserRole.ADMIN))):
+
+    return await service.import_books(request.stream(), import_format, batch_size, upsert)
+
+
+@router.get("/export", status_code=status.HTTP_200_OK, response_class=StreamingResponse,
+            responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}})
+def export_books(search_filters: SearchRequest = Depends(),
+                 export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+                 batch_size: int = Query(settings.EXPORT_BATCH_SIZE, ge=1, le=10000),
+                 compress: bool = Query(False, alias="gzip", description="Gzip the body on the fly"),
+                 payload: Any = Depends(filter_for_role(UserRole.ANY))):
+
+    # The request's own session is closed before the body is sent, so the stream opens one for its lifetime
+    def body():
+        with SessionLocal() as db:
+            chunks = BookService(db).export_books(search_filters, export_format, batch_size)
+            yield from gzip_chunks(chunks) if compress else chunks
+
+    headers = {"Content-Disposition": f'attachment; filename="books.{export_format.value}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[export_format], headers=headers)
@@ -1,38 +1,106 @@
-from typing import Any
+from typing import Any, Optional
 
-from fastapi import APIRouter, Path, Depends, Query
+from fastapi import APIRouter, Path, Depends, Query, Request, Response
 from starlette import status
 
 from auth import filter_for_role
-from enums import UserRole
-from models import GenreRequest, GenreResponse, PaginatedResponse
-from service import GenreService, get_genre_service
+from conditional import conditional_response
+from config import get_settings
+from enums import UserRole, GenreSortField, BookSortField, TotalMode
+from models import (Book, Genre, GenreRequest, GenreResponse, PaginatedResponse, BookRequest, GetManyRequest,
+                    GetManyResponse)
+from serialization import json_response
+from service import AsyncService, GenreService, get_genre_service, BookService, get_book_service, versions
+
+settings = get_settings()
 
 genre_router = APIRouter(prefix="/genre")
 
 
 @genre_router.get("/get/{genre_id}", status_code=status.HTTP_200_OK, response_model=GenreResponse)
-async def get_genre(service: GenreService = Depends(get_genre_service),
+async def get_genre(request: Request,
+                    response: Response,
+                    service: AsyncService[GenreService] = Depends(get_genre_service),
                     payload: Any = Depends(filter_for_role(UserRole.ANY)),
-                    genre_id: int = Path(gt=0)):
+                    genre_id: int = Path(gt=0),
+                    books_limit: int = Query(settings.GENRE_BOOK_PREVIEW_SIZE, ge=0, le=100)):
+
+    await service.sync_changes()
+    etag = versions.entity_etag(Genre.__tablename__, genre_id, Book.__tablename__)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    return await service.get_genre(genre_id, books_limit)
+
 
-    return service.get_genre(genre_id)
+@genre_router.post("/get-many", status_code=status.HTTP_200_OK, response_model=GetManyResponse[GenreResponse])
+async def get_many(get_many_request: GetManyRequest,
+                   books_limit: int = Query(settings.GENRE_BOOK_PREVIEW_SIZE, ge=0, le=100),
+                   service: AsyncService[GenreService] = Depends(get_genre_service),
+                   payload: Any = Depends(filter_for_role(UserRole.ANY))):
+
+    genres = await service.get_genres_by_ids(get_many_request.ids, books_limit)
+    return json_response(GetManyResponse[GenreResponse], genres)
 
 
 @genre_router.post("/add", status_code=status.HTTP_201_CREATED, response_model=GenreRequest)
 async def create_genre(genre_request: GenreRequest,
-                       service: GenreService = Depends(get_genre_service),
+                       service: AsyncService[GenreService] = Depends(get_genre_service),
                        payload: Any = Depends(filter_for_role(UserRole.ANY))):
 
-    return service.create_genre(genre_request)
+    return await service.create_genre(genre_request)
 
 
 @genre_router.get("/get-all", status_code=status.HTTP_200_OK, response_model=PaginatedResponse[GenreResponse])
 async def get_all(
+        request: Request,
+        response: Response,
+        page: int = Query(1, ge=1),
+        page_size: int = Query(10, ge=1, le=settings.GENRE_MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page; empty to start"),
+        sort_by: GenreSortField = Query(GenreSortField.ID),
+        include_total: bool = Query(True),
+        total_mode: TotalMode = Query(TotalMode.EXACT),
+        books_limit: int = Query(settings.GENRE_BOOK_PREVIEW_SIZE, ge=0, le=100),
+        service: AsyncService[GenreService] = Depends(get_genre_service),
+        payload: Any = Depends(filter_for_role(UserRole.ANY)),
+):
+
+    await service.sync_changes()
+    tables = (Genre.__tablename__, Book.__tablename__)
+    not_modified = conditional_response(request, response, versions.table_etag(*tables),
+                                        versions.last_modified(*tables))
+    if not_modified:
+        return not_modified
+
+    genres = await service.get_genres(page, page_size, cursor, sort_by.value,
+                                      include_total, total_mode.value, books_limit)
+    return json_response(PaginatedResponse[GenreResponse], genres, response)
+
+
+@genre_router.get("/{genre_id}/books", status_code=status.HTTP_200_OK, response_model=PaginatedResponse[BookRequest])
+async def get_genre_books(
+        request: Request,
+        response: Response,
+        genre_id: int = Path(gt=0),
         page: int = Query(1, ge=1),
         page_size: int = Query(10, ge=1),
-        service: GenreService = Depends(get_genre_service),
+        cursor: Optional[str] = Query(None, description="Keyset cursor from a previous page; empty to start"),
+        sort_by: BookSortField = Query(BookSortField.ID),
+        include_total: bool = Query(True),
+        total_mode: TotalMode = Query(TotalMode.EXACT),
+        service: AsyncService[BookService] = Depends(get_book_service),
         payload: Any = Depends(filter_for_role(UserRole.ANY)),
 ):
 
-    return service.get_genres(page, page_size)
+    await service.sync_changes()
+    tables = (Genre.__tablename__, Book.__tablename__)
+    not_modified = conditional_response(request, response, versions.table_etag(*tables),
+                                        versions.last_modified(*tables))
+    if not_modified:
+        return not_modified
+
+    books = await service.get_books_by_genre(genre_id, page, page_size, cursor, sort_by.value,
+                                             include_total, total_mode.value)
+    return json_response(PaginatedResponse[BookRequest], books, response)
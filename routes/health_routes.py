@@ -0,0 +1,15 @@
+from fastapi import APIRouter, HTTPException
+from starlette import status
+
+from error_messages import ErrorMessages
+from startup import worker_startup
+
+health_router = APIRouter(prefix="/health")
+
+
+@health_router.get("/ready", status_code=status.HTTP_200_OK, include_in_schema=False)
+async def get_ready():
+    # Unauthenticated, for load balancer and orchestrator probes: 503 until this worker has finished starting up
+    if not worker_startup.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=ErrorMessages.NOT_READY.value)
+    return worker_startup.report()
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from metrics import registry
+
+metrics_router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    # Unauthenticated so Prometheus can scrape it; expose it on an internal network only
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,44 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from starlette import status
+
+
+class PreEncodedJSONResponse(Response):
+    """A JSON response whose body is already encoded; render() passes the bytes through untouched."""
+    media_type = 'application/json'
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+@lru_cache(maxsize=None)
+def adapter(annotation: Any) -> TypeAdapter:
+    """A TypeAdapter per type, built once: building one compiles the validator and serializer."""
+    return TypeAdapter(annotation)
+
+
+def validate_page(annotation: Any, items: list[Any]) -> list[Any]:
+    """Validate a page of ORM entities (or plain dicts) as annotation instances with one compiled validator call."""
+    return adapter(list[annotation]).validate_python(items, from_attributes=True)
+
+
+def json_response(annotation: Any, content: Any, response: Response | None = None,
+                  status_code: int = status.HTTP_200_OK) -> PreEncodedJSONResponse:
+    """
+    Serialize route content straight to JSON bytes with the response model's compiled serializer.
+    Returning a Response skips FastAPI's second validation and its JSON encoding; the route keeps declaring
+    response_model, so the OpenAPI schema is unchanged.
+    Args:
+        annotation (Any): The route's response model; content must be an instance of exactly this type.
+        content (Any): The already validated response.
+        response (Response | None): The route's injected response, whose headers (ETag, Cache-Control) are kept.
+        status_code (int): The status code. Defaults to 200.
+    Returns:
+        PreEncodedJSONResponse: The encoded response.
+    """
+    headers = {name: value for name, value in response.headers.items() if name != 'content-length'} \
+        if response is not None else None
+    return PreEncodedJSONResponse(adapter(annotation).dump_json(content), status_code=status_code, headers=headers)
@@ -0,0 +1,204 @@
+"""
+Pre-fork server: a master process binds the listening socket, optionally imports the application (preload) and
+forks SERVER_WORKERS uvicorn workers that accept from the shared socket. It replaces workers that exit (after
+SERVER_MAX_REQUESTS, or on a crash) and, on SIGTERM or SIGINT, lets every worker drain its in-flight requests.
+
+    python -m server                          serve with the worker count and limits from the settings
+    python -m server --workers 4 --port 8000  override them
+
+Run `python -m initialization` first; a worker that fails its startup check stops the whole server.
+"""
+import argparse
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass
+
+from config import get_settings
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+APP = 'main:app'
+
+# Exit status of a worker whose startup (schema check, pool warm-up) failed; respawning it would only fail again
+WORKER_BOOT_ERROR = 3
+
+
+@dataclass
+class ServerOptions:
+    host: str = settings.SERVER_HOST
+    port: int = settings.SERVER_PORT
+    workers: int = settings.SERVER_WORKERS
+    preload: bool = settings.SERVER_PRELOAD
+    max_requests: int = settings.SERVER_MAX_REQUESTS
+    max_requests_jitter: int = settings.SERVER_MAX_REQUESTS_JITTER
+    graceful_timeout: float = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+
+    @property
+    def worker_count(self) -> int:
+        return self.workers or os.cpu_count() or 1
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def server_config(options: ServerOptions):
+    """The uvicorn configuration the workers serve with; load() imports the application and the protocol modules."""
+    import uvicorn
+
+    return uvicorn.Config(APP, lifespan='on', timeout_graceful_shutdown=options.graceful_timeout)
+
+
+def run_worker(sock: socket.socket, options: ServerOptions, config=None) -> int:
+    """
+    Serve requests from the shared socket until told to stop or the request limit is reached, in a forked child.
+    Args:
+        sock (socket.socket): The master's listening socket.
+        options (ServerOptions): The server options.
+        config (uvicorn.Config | None): A configuration the master has loaded already (preload).
+    Returns: int: The exit status: 0, or WORKER_BOOT_ERROR when the application did not start.
+    """
+    import uvicorn
+
+    # uvicorn handles SIGTERM and SIGINT while it serves (by draining) and re-raises them afterwards; ignored then,
+    # so the worker exits with its own status
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    config = config or server_config(options)
+    if options.max_requests > 0:
+        # Spread the limit so the workers, started together, don't all restart together
+        config.limit_max_requests = options.max_requests + random.randint(0, max(options.max_requests_jitter, 0))
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+    return 0 if server.started else WORKER_BOOT_ERROR
+
+
+class Supervisor:
+    """
+    The master process: forks the workers, keeps their number up and stops them gracefully.
+    It never touches the database, so its engines have no connections for the workers to inherit; database.py
+    still replaces the pools in every child (os.register_at_fork) in case a preloaded import opened one. Likewise,
+    service/versions.py gives every child its own ETag epoch and change feed position.
+    """
+    def __init__(self, options: ServerOptions):
+        self.options = options
+        self.workers: set[int] = set()
+        self.stopping = False
+        self.exit_status = 0
+        self.sock: socket.socket | None = None
+        self.config = None
+
+    def _handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers.add(pid)
+            return
+        status = 1
+        try:
+            status = run_worker(self.sock, self.options, self.config)
+        except BaseException:
+            logger.exception('Worker %d failed', os.getpid())
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def reap(self) -> list[tuple[int, int]]:
+        """Collect the workers that have exited. Returns: list[tuple[int, int]]: Their pids and exit statuses."""
+        exited = []
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            if pid in self.workers:
+                self.workers.remove(pid)
+                exited.append((pid, os.waitstatus_to_exitcode(status)))
+        return exited
+
+    def stop(self):
+        """Ask every worker to drain and exit; kill the ones still running after the graceful timeout."""
+        logger.info('Stopping %d workers, waiting up to %.0f s for in-flight requests',
+                    len(self.workers), self.options.graceful_timeout)
+        for pid in self.workers:
+            os.kill(pid, signal.SIGTERM)
+        # Workers also run their lifespan shutdown after draining; allow a little beyond the drain timeout
+        deadline = time.monotonic() + self.options.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in self.workers:
+            logger.warning('Worker %d did not stop in time, killing it', pid)
+            os.kill(pid, signal.SIGKILL)
+        while self.workers:
+            pid, _ = os.waitpid(-1, 0)
+            self.workers.discard(pid)
+
+    def run(self) -> int:
+        """
+        Serve until SIGTERM or SIGINT.
+        Returns: int: The process exit status; WORKER_BOOT_ERROR when a worker could not start.
+        """
+        self.sock = bind_socket(self.options.host, self.options.port)
+        if self.options.preload:
+            # Imported once here, the application and uvicorn are shared by the workers copy-on-write and each
+            # worker's startup is down to the readiness check
+            self.config = server_config(self.options)
+            self.config.load()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        logger.info('Master %d serving on %s:%d with %d workers (preload: %s, max requests: %s)', os.getpid(),
+                    self.options.host, self.options.port, self.options.worker_count, self.options.preload,
+                    self.options.max_requests or 'unlimited')
+        for _ in range(self.options.worker_count):
+            self.spawn()
+        try:
+            while not self.stopping:
+                for pid, status in self.reap():
+                    if status == WORKER_BOOT_ERROR:
+                        logger.error('Worker %d failed to start; stopping', pid)
+                        self.exit_status = WORKER_BOOT_ERROR
+                        self.stopping = True
+                        break
+                    logger.info('Worker %d exited with status %d, replacing it', pid, status)
+                    self.spawn()
+                time.sleep(0.1)
+        finally:
+            self.stop()
+            self.sock.close()
+        return self.exit_status
+
+
+def main():
+    defaults = ServerOptions()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=defaults.host)
+    parser.add_argument('--port', type=int, default=defaults.port)
+    parser.add_argument('--workers', type=int, default=defaults.workers, help='0: one per CPU')
+    parser.add_argument('--preload', action=argparse.BooleanOptionalAction, default=defaults.preload)
+    parser.add_argument('--max-requests', type=int, default=defaults.max_requests, help='0: unlimited')
+    parser.add_argument('--max-requests-jitter', type=int, default=defaults.max_requests_jitter)
+    parser.add_argument('--graceful-timeout', type=float, default=defaults.graceful_timeout)
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(levelname)s:     [%(process)d] %(message)s')
+    logger.setLevel(logging.INFO)
+    sys.exit(Supervisor(ServerOptions(**vars(args))).run())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
+from .async_service import AsyncService
+from .versions import versions
 from .book_service import BookService, get_book_service
 from .user_service import UserService, get_user_service
 from .genre_service import GenreService, get_genre_service
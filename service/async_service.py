@@ -0,0 +1,29 @@
+import functools
+import inspect
+from typing import Any, Generic, TypeVar
+
+from service.generic_service import GenericService
+
+S = TypeVar('S', bound=GenericService)
+
+
+class AsyncService(Generic[S]):
+    """
+    Awaitable view of a service, handed to the routes.
+    Every sync method of the wrapped service becomes a coroutine that runs through GenericService.run: on the
+    async engine the statements are awaited via AsyncSession.run_sync, on the sync engine the call is moved to
+    the threadpool. Either way the event loop is never blocked by a query. Coroutine methods are passed through.
+    """
+    def __init__(self, service: S):
+        self.service = service
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.service, name)
+        if not callable(attr) or inspect.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self.service.run(attr, *args, **kwargs)
+
+        return call
@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+import zlib
+from typing import Iterable, Iterator, Sequence
+
+from enums import ExportFormat
+
+# Flat rows with the genre by name, so an export can be fed straight back into /book/import
+EXPORT_COLUMNS = ('id', 'title', 'author', 'year', 'pages', 'genre')
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: 'application/x-ndjson',
+    ExportFormat.CSV: 'text/csv',
+}
+
+
+def encode_rows(partitions: Iterable[Sequence[tuple]], export_format: ExportFormat) -> Iterator[bytes]:
+    """
+    Encode row tuples (in EXPORT_COLUMNS order) straight to bytes, one chunk per partition.
+    Args:
+        partitions (Iterable[Sequence[tuple]]): Batches of rows as they come off the cursor.
+        export_format (ExportFormat): NDJSON (one object per line) or CSV (header row first).
+    Returns:
+        Iterator[bytes]: The encoded body.
+    """
+    if export_format == ExportFormat.NDJSON:
+        for rows in partitions:
+            yield ''.join(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n'
+                          for row in rows).encode()
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in partitions:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Gzip a byte stream on the fly, without buffering more than the compressor's window.
+    Args:
+        chunks (Iterable[bytes]): The uncompressed stream.
+        level (int): zlib compression level. Defaults to 6.
+    Returns:
+        Iterator[bytes]: A single gzip member.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
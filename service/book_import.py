@@ -0,0 +1,171 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from enums import ImportFormat
+from error_messages import ErrorMessages
+from models import Book, BookRequest, Genre, ImportReport, ImportRowError
+
+BOOK_COLUMNS = ('title', 'author', 'year', 'pages', 'genre_id')
+DIALECT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+async def read_records(chunks: AsyncIterator[bytes],
+                       import_format: ImportFormat) -> AsyncIterator[tuple[int, dict | str]]:
+    """
+    Parse a streamed NDJSON or CSV body record by record, holding only the current line in memory.
+    Args:
+        chunks (AsyncIterator[bytes]): The raw request body.
+        import_format (ImportFormat): NDJSON (one object per line) or CSV (header row first).
+    Returns:
+        AsyncIterator[tuple[int, dict | str]]: (line number, record) pairs; unparsable records come back as an
+        error message instead of a dict.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    header: list[str] | None = None
+    pending = ''
+    line_number = 0
+    record_start = 1
+
+    async def lines() -> AsyncIterator[str]:
+        buffer = ''
+        async for chunk in chunks:
+            buffer += decoder.decode(chunk)
+            *complete, buffer = buffer.split('\n')
+            for line in complete:
+                yield line
+        buffer += decoder.decode(b'', final=True)
+        if buffer:
+            yield buffer
+
+    async for line in lines():
+        line_number += 1
+        if import_format == ImportFormat.NDJSON:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                yield line_number, record if isinstance(record, dict) else ErrorMessages.IMPORT_NOT_AN_OBJECT.value
+            except json.JSONDecodeError as e:
+                yield line_number, f'Invalid JSON: {e.msg}'
+            continue
+
+        # CSV: a quoted field may span lines, so wait until the quotes balance before parsing the record
+        pending = f'{pending}\n{line}' if pending else line
+        if pending.count('"') % 2:
+            continue
+        record_text, pending = pending, ''
+        if not record_text.strip():
+            record_start = line_number + 1
+            continue
+        values = next(csv.reader([record_text]))
+        if header is None:
+            header = [name.strip() for name in values]
+        else:
+            yield record_start, dict(zip(header, values))
+        record_start = line_number + 1
+
+    if pending:
+        yield record_start, ErrorMessages.IMPORT_UNTERMINATED_QUOTE.value
+
+
+def _genre_name(record: dict | str) -> str:
+    genre = record.get('genre') if isinstance(record, dict) else None
+    return genre.strip() if isinstance(genre, str) else ''
+
+
+class BookImporter:
+    """
+    Loads validated book rows in set-based batches: one genre lookup and one multi-row INSERT per batch, inside
+    one transaction. With upsert, rows whose title already exists update that book instead of failing.
+    """
+    def __init__(self, db: Session, upsert: bool, max_errors: int):
+        self.db = db
+        self.upsert = upsert
+        self.max_errors = max_errors
+        self.genre_ids: dict[str, int | None] = {}
+        self.report = ImportReport()
+
+        dialect = db.get_bind().dialect.name
+        if upsert and dialect not in DIALECT_INSERTS:
+            raise HTTPException(status_code=400, detail=ErrorMessages.UPSERT_NOT_SUPPORTED.value)
+        self.insert = DIALECT_INSERTS.get(dialect, insert)
+
+    def fail(self, line: int, errors: list[str]):
+        self.report.failed += 1
+        if len(self.report.errors) < self.max_errors:
+            self.report.errors.append(ImportRowError(line=line, errors=errors))
+        else:
+            self.report.errors_truncated = True
+
+    def _resolve_genres(self, names: set[str]):
+        missing = [name for name in names if name not in self.genre_ids]
+        if missing:
+            found = dict(self.db.query(Genre.name, Genre.id).filter(Genre.name.in_(missing)).all())
+            for name in missing:
+                self.genre_ids[name] = found.get(name)
+
+    def _validate(self, batch: list[tuple[int, dict | str]]) -> dict[str, tuple[int, dict[str, Any]]]:
+        rows: dict[str, tuple[int, dict[str, Any]]] = {}
+        self._resolve_genres({_genre_name(record) for _, record in batch} - {''})
+
+        for line, record in batch:
+            self.report.rows_read += 1
+            if isinstance(record, str):
+                self.fail(line, [record])
+                continue
+            try:
+                book = BookRequest.model_validate({key: value for key, value in record.items() if key != 'genre'})
+            except ValidationError as e:
+                self.fail(line, [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                                 for error in e.errors()])
+                continue
+
+            genre_name = _genre_name(record)
+            genre_id = self.genre_ids.get(genre_name) if genre_name else None
+            if genre_name and genre_id is None:
+                self.fail(line, [f'genre: unknown genre "{genre_name}"'])
+                continue
+
+            row = {**book.model_dump(include=set(BOOK_COLUMNS)), 'genre_id': genre_id}
+            if book.title in rows and not self.upsert:
+                self.fail(line, [ErrorMessages.IMPORT_DUPLICATE_TITLE.value])
+                continue
+            # With upsert the last row for a title wins, as it would have row by row
+            rows[book.title] = (line, row)
+        return rows
+
+    def import_batch(self, batch: list[tuple[int, dict | str]]):
+        rows = self._validate(batch)
+        if not rows:
+            return
+
+        statement = self.insert(Book)
+        if self.upsert:
+            statement = statement.on_conflict_do_update(
+                index_elements=[Book.title],
+                set_={
+                    'author': statement.excluded.author,
+                    'year': statement.excluded.year,
+                    'pages': statement.excluded.pages,
+                    'genre_id': func.coalesce(statement.excluded.genre_id, Book.genre_id),
+                },
+            )
+        elif self.insert is not insert:
+            statement = statement.on_conflict_do_nothing(index_elements=[Book.title])
+
+        written = set(self.db.execute(statement.returning(Book.title), [row for _, row in rows.values()]).scalars())
+        self.report.imported += len(written)
+        for title, (line, _) in rows.items():
+            if title not in written:
+                self.fail(line, [ErrorMessages.IMPORT_DUPLICATE_TITLE.value])
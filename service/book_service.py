@@ -1,15 +1,34 @@
+import re
+from math import ceil
+from typing import AsyncIterator, Callable, Iterator
+
 from fastapi import Depends, HTTPException
-from sqlalchemy import or_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import or_, func, literal_column, select, update, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, Query, joinedload
 
-from database import get_db
+from config import get_settings
+from database import get_session
+from serialization import validate_page
+from enums import TotalMode, ImportFormat, ExportFormat
 from error_messages import ErrorMessages
-from models import Book, BookRequest, SearchRequest, PaginatedResponse, BookResponse, Genre
+from models import (Book, BookRequest, SearchRequest, PaginatedResponse, BookResponse, Genre, BookSearchResult,
+                    books_fts, has_books_fts, BOOKS_FTS_TABLE, ImportReport, GetManyResponse, BookPatch,
+                    BulkUpdateReport)
+from service.async_service import AsyncService
+from service.book_export import encode_rows
+from service.book_import import BookImporter, read_records
+from service.entity_cache import entity_cache
 from service.generic_service import GenericService
+from service.projection import projection
+from service.versions import versions, change_feed
+
+settings = get_settings()
 
 
 class BookService(GenericService[Book, BookRequest]):
-    def __init__(self, db: Session):
+    def __init__(self, db: Session | AsyncSession):
         super().__init__(db, Book, BookRequest)
 
     def get_book(self, book_id: int) -> BookResponse | None:
@@ -18,20 +37,83 @@ class BookService(GenericService[Book, BookRequest]):
         Args: book_id (int): The ID of the book to retrieve.
         Returns: BookResponse | None: The book response if found, otherwise None.
         """
-        book = self.db.query(Book).options(joinedload(self.model.genre)).filter(Book.id == book_id).first()
-        return BookResponse.model_validate(book) if book else None
+        change_feed.catch_up(self.db)
+        return self._cached_books([book_id]).get(book_id)
+
+    def get_books_by_ids(self, book_ids: list[int]) -> GetManyResponse[BookResponse]:
+        """
+        Retrieve many books by ID with one query for those not already cached.
+        Args: book_ids (list[int]): The IDs of the books to retrieve, at most GET_MANY_MAX_IDS.
+        Returns: GetManyResponse[BookResponse]: The books in request order, null where not found.
+        Raises:
+            HTTPException: If too many IDs are requested.
+        """
+        if len(book_ids) > settings.GET_MANY_MAX_IDS:
+            raise HTTPException(status_code=400, detail=ErrorMessages.TOO_MANY_IDS.value)
+
+        change_feed.catch_up(self.db)
+        books = self._cached_books(list(dict.fromkeys(book_ids)))
+        return GetManyResponse[BookResponse](items=[books.get(book_id) for book_id in book_ids],
+                                             not_found=[book_id for book_id in dict.fromkeys(book_ids)
+                                                        if book_id not in books])
 
-    def get_all_books(self, page: int = 1, page_size: int = 10) -> PaginatedResponse[BookResponse]:
+    def _cached_books(self, book_ids: list[int]) -> dict[int, BookResponse]:
+        table = Book.__tablename__
+        found = entity_cache.read_through(
+            self.db, [(table, book_id) for book_id in book_ids],
+            [versions.entity_etag(table, book_id, Genre.__tablename__) for book_id in book_ids],
+            self._load_books, BookResponse,
+        )
+        return {book_id: book for (_, book_id), book in found.items()}
+
+    def _load_books(self, keys: list[tuple[str, int]]) -> dict[tuple[str, int], BookResponse]:
+        books = (self.db.query(Book).options(joinedload(self.model.genre))
+                 .filter(Book.id.in_([book_id for _, book_id in keys])).all())
+        return {(Book.__tablename__, book.id): BookResponse.model_validate(book) for book in books}
+
+    def get_all_books(self, page: int = 1, page_size: int = 10,
+                      cursor: str | None = None, sort_by: str = 'id',
+                      include_total: bool = True,
+                      total_mode: str = TotalMode.EXACT.value) -> PaginatedResponse[BookResponse]:
         """
         Retrieve all books with pagination.
         Args:
             page (int): The page number to retrieve. Defaults to 1.
             page_size (int): The number of books per page. Defaults to 10.
+            cursor (str | None): Keyset cursor from a previous page; "" starts cursor mode. Defaults to None.
+            sort_by (str): The column to order by (id, title or year). Defaults to id.
+            include_total (bool): Whether to count the matching books. Defaults to True.
+            total_mode (str): "exact" or "estimated" total. Defaults to exact.
         Returns:
             PaginatedResponse[BookResponse]: A paginated response of books.
         """
-        query = self.db.query(Book).options(joinedload(self.model.genre))
-        return self._paginate(query, page, page_size)
+        return self._paginate(self.db.query(Book), page, page_size, cursor, sort_by, include_total, total_mode,
+                              schema=BookResponse, project=True)
+
+    def get_books_by_genre(self, genre_id: int, page: int = 1, page_size: int = 10,
+                           cursor: str | None = None, sort_by: str = 'id',
+                           include_total: bool = True,
+                           total_mode: str = TotalMode.EXACT.value) -> PaginatedResponse[BookRequest]:
+        """
+        Retrieve the books of a genre with pagination.
+        Args:
+            genre_id (int): The ID of the genre.
+            page (int): The page number to retrieve. Defaults to 1.
+            page_size (int): The number of books per page. Defaults to 10.
+            cursor (str | None): Keyset cursor from a previous page; "" starts cursor mode. Defaults to None.
+            sort_by (str): The column to order by (id, title or year). Defaults to id.
+            include_total (bool): Whether to count the genre's books. Defaults to True.
+            total_mode (str): "exact" or "estimated" total. Defaults to exact.
+        Returns:
+            PaginatedResponse[BookRequest]: A paginated response of the genre's books.
+        Raises:
+            HTTPException: If the genre is not found.
+        """
+        if self.db.query(Genre.id).filter(Genre.id == genre_id).first() is None:
+            raise HTTPException(status_code=404, detail=ErrorMessages.ENTITY_NOT_FOUND.value)
+
+        query = self.db.query(Book).filter(Book.genre_id == genre_id)
+        return self._paginate(query, page, page_size, cursor, sort_by, include_total, total_mode)
 
     def create_new_book(self, book: BookRequest) -> BookRequest:
         """
@@ -61,18 +143,43 @@ class BookService(GenericService[Book, BookRequest]):
 
     def search_books(self, search_filters: SearchRequest,
                      page: int = 1,
-                     page_size: int = 10) -> PaginatedResponse[BookRequest]:
+                     page_size: int = 10,
+                     cursor: str | None = None,
+                     sort_by: str = 'id',
+                     include_total: bool = True,
+                     total_mode: str = TotalMode.EXACT.value) -> PaginatedResponse[BookSearchResult]:
         """
         Search for books based on the provided search filters.
+        title/author are substring (ILIKE) filters. A free-text query runs a ranked full-text search on the
+        books_fts index (prefix matching, bm25 order, highlighted snippets) and falls back to a substring match
+        on title or author when the index is not available.
         Args:
             search_filters (SearchRequest): The search filters containing the search criteria.
             page (int): The page number to retrieve. Defaults to 1.
             page_size (int): The number of books per page. Defaults to 10.
+            cursor (str | None): Keyset cursor from a previous page; "" starts cursor mode. Defaults to None.
+            sort_by (str): The column to order by (id, title or year). Defaults to id.
+            include_total (bool): Whether to count the matching books. Defaults to True.
+            total_mode (str): "exact" or "estimated" total. Defaults to exact.
         Returns:
-            PaginatedResponse[BookRequest]: A paginated response of books matching the search criteria.
+            PaginatedResponse[BookSearchResult]: A paginated response of books matching the search criteria.
+        Raises:
+            HTTPException: If a cursor is combined with a full-text query.
         """
-        query = self.db.query(Book)
+        query, full_text = self._filter_books(self.db.query(Book), search_filters)
+        if full_text:
+            if cursor is not None:
+                raise HTTPException(status_code=400, detail=ErrorMessages.CURSOR_NOT_SUPPORTED.value)
+            return self._full_text_search(query, page, page_size, include_total, total_mode)
+
+        return self._paginate(query, page, page_size, cursor, sort_by, include_total, total_mode,
+                              schema=BookSearchResult, project=True)
 
+    def _filter_books(self, query: Query, search_filters: SearchRequest) -> tuple[Query, bool]:
+        """
+        Apply the SearchRequest filters to a books query.
+        Returns: tuple[Query, bool]: The filtered query and whether it was matched against the full-text index.
+        """
         if search_filters.title or search_filters.author:
             filters = []
             if search_filters.title:
@@ -81,7 +188,97 @@ class BookService(GenericService[Book, BookRequest]):
                 filters.append(Book.author.ilike(f"%{search_filters.author}%"))
             query = query.filter(or_(*filters))
 
-        return self._paginate(query, page, page_size)
+        if not search_filters.query:
+            return query, False
+        # Any connection that can read will do; naming a SELECT keeps the check off a routed session's writer
+        if not has_books_fts(self.db.connection(bind_arguments={"clause": select(Book.id)})):
+            return query.filter(or_(Book.title.ilike(f"%{search_filters.query}%"),
+                                    Book.author.ilike(f"%{search_filters.query}%"))), False
+
+        terms = re.findall(r"\w+", search_filters.query)
+        # Every term quoted (so FTS5 operators in user input are inert) and prefix-matched; terms are ANDed
+        match = " ".join(f'"{term}"*' for term in terms) or '""'
+        query = (query.join(books_fts, books_fts.c.rowid == Book.id)
+                 .filter(literal_column(BOOKS_FTS_TABLE).op("MATCH")(match)))
+        return query, True
+
+    def _full_text_search(self, query: Query, page: int, page_size: int,
+                          include_total: bool, total_mode: str) -> PaginatedResponse[BookSearchResult]:
+        fts = literal_column(BOOKS_FTS_TABLE)
+        rank = func.bm25(fts)
+
+        total_items, total_mode = self._count(query, total_mode) if include_total else (None, None)
+        book_projection = projection(Book, BookSearchResult)
+        rows = (book_projection.apply(query)
+                .add_columns(func.snippet(fts, 0, "<mark>", "</mark>", "…", 12),
+                             func.snippet(fts, 1, "<mark>", "</mark>", "…", 12),
+                             rank)
+                .order_by(rank, Book.id)
+                .offset((page - 1) * page_size).limit(page_size).all())
+
+        items = book_projection.to_dicts(rows)
+        for item, (*_, title, author, score) in zip(items, rows):
+            item.update(title_highlight=title, author_highlight=author, rank=score)
+        return PaginatedResponse[BookSearchResult](
+            items=validate_page(BookSearchResult, items),
+            current_page=page,
+            total_pages=ceil(total_items / page_size) if include_total else None,
+            total_items=total_items,
+            total_mode=total_mode,
+        )
+
+    async def import_books(self, chunks: AsyncIterator[bytes], import_format: ImportFormat,
+                           batch_size: int, upsert: bool = False,
+                           max_errors: int = settings.IMPORT_MAX_ERRORS) -> ImportReport:
+        """
+        Import books from a streamed NDJSON or CSV body in batches.
+        Args:
+            chunks (AsyncIterator[bytes]): The request body stream.
+            import_format (ImportFormat): The body format.
+            batch_size (int): Rows per INSERT statement and transaction.
+            upsert (bool): Update books whose title already exists instead of reporting them. Defaults to False.
+            max_errors (int): Maximum number of row errors listed in the report.
+        Returns:
+            ImportReport: Counts and the per-row errors.
+        """
+        importer = BookImporter(self.db, upsert, max_errors)
+        batch = []
+        async for record in read_records(chunks, import_format):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                await self.run(self._import_batch, importer, batch)
+                batch = []
+        if batch:
+            await self.run(self._import_batch, importer, batch)
+
+        return importer.report
+
+    def _import_batch(self, importer: BookImporter, batch: list[tuple[int, dict | str]]):
+        self._db_operation(lambda: importer.import_batch(batch))
+
+    def export_books(self, search_filters: SearchRequest, export_format: ExportFormat,
+                     batch_size: int = settings.EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+        """
+        Stream every book matching the filters, in id order, as NDJSON or CSV.
+        Rows are fetched from a server-side cursor batch_size at a time and encoded without ORM objects or
+        Pydantic models, so memory stays flat however large the catalog is.
+        Args:
+            search_filters (SearchRequest): The same filters as search_books; empty exports the whole catalog.
+            export_format (ExportFormat): The body format.
+            batch_size (int): Rows fetched and encoded per chunk.
+        Returns:
+            Iterator[bytes]: The encoded body; the session must stay open until it is exhausted.
+        """
+        query, _ = self._filter_books(self.db.query(Book), search_filters)
+        statement = (query.outerjoin(Genre, Book.genre_id == Genre.id)
+                     .with_entities(Book.id, Book.title, Book.author, Book.year, Book.pages, Genre.name)
+                     .order_by(Book.id)
+                     .statement.execution_options(yield_per=batch_size))
+        result = self.db.execute(statement)
+        try:
+            yield from encode_rows(result.partitions(), export_format)
+        finally:
+            result.close()
 
     def add_book_to_genre(self, book_id: int, genre_id: int) -> BookResponse:
         """
@@ -99,11 +296,84 @@ class BookService(GenericService[Book, BookRequest]):
         if genre is None or book is None:
             raise HTTPException(status_code=404, detail=ErrorMessages.ENTITY_NOT_FOUND.value)
 
-        book.genre_id = genre_id
-        book.genre = genre
+        return self.update(book, {'genre_id': genre_id})
+
+
+    def assign_genre(self, genre_id: int, book_ids: list[int] | None = None,
+                     search_filters: SearchRequest | None = None) -> BulkUpdateReport:
+        """
+        Assign many books to a genre with set-based UPDATE statements, in one transaction.
+        Args:
+            genre_id (int): The ID of the genre to assign.
+            book_ids (list[int] | None): The IDs of the books to assign.
+            search_filters (SearchRequest | None): Assign every book matching these filters instead.
+        Returns:
+            BulkUpdateReport: How many books were targeted and updated, and the requested IDs that don't exist.
+        Raises:
+            HTTPException: If there are no IDs and the filters have no criteria (they would match every book), or
+                the genre is not found.
+        """
+        if book_ids is None and (search_filters is None or not search_filters.has_criteria):
+            raise HTTPException(status_code=400, detail=ErrorMessages.NO_FILTER_CRITERIA.value)
+        if self.db.query(Genre.id).filter(Genre.id == genre_id).first() is None:
+            raise HTTPException(status_code=404, detail=ErrorMessages.GENRE_NOT_FOUND.value)
+        if book_ids is None:
+            query, _ = self._filter_books(self.db.query(Book.id), search_filters)
+            book_ids = [book_id for book_id, in query.order_by(Book.id)]
+
+        return self._db_operation(lambda: self._update_in_chunks(list(dict.fromkeys(book_ids)),
+                                                                 lambda chunk: {Book.genre_id: genre_id}))
+
+    def update_books(self, patches: list[BookPatch]) -> BulkUpdateReport:
+        """
+        Apply many partial book updates with one UPDATE ... CASE statement per chunk, in one transaction.
+        Args: patches (list[BookPatch]): The changes per book ID; omitted or null fields are left unchanged.
+        Returns: BulkUpdateReport: How many books were targeted and updated, and the IDs that don't exist.
+        Raises:
+            HTTPException: If a referenced genre is not found or a title is already taken.
+        """
+        changes: dict[int, dict] = {}
+        for patch in patches:
+            changes.setdefault(patch.id, {}).update(patch.model_dump(exclude={"id"}, exclude_none=True))
+
+        genre_ids = {values["genre_id"] for values in changes.values() if "genre_id" in values}
+        if genre_ids and len(self.db.query(Genre.id).filter(Genre.id.in_(genre_ids)).all()) != len(genre_ids):
+            raise HTTPException(status_code=404, detail=ErrorMessages.GENRE_NOT_FOUND.value)
+
+        def values(chunk: list[int]) -> dict:
+            columns = {column for book_id in chunk for column in changes[book_id]}
+            return {
+                getattr(Book, column): case(
+                    {book_id: changes[book_id][column] for book_id in chunk if column in changes[book_id]},
+                    value=Book.id, else_=getattr(Book, column),
+                )
+                for column in sorted(columns)
+            }
+
+        try:
+            return self._db_operation(lambda: self._update_in_chunks(list(changes), values))
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail=ErrorMessages.DUPLICATE_TITLE.value)
+
+    def _update_in_chunks(self, book_ids: list[int], values: Callable[[list[int]], dict]) -> BulkUpdateReport:
+        returning = self.db.get_bind().dialect.update_returning
+        updated: list[int] = []
+        updated_count = 0
+        for start in range(0, len(book_ids), settings.BULK_UPDATE_CHUNK_SIZE):
+            chunk = book_ids[start:start + settings.BULK_UPDATE_CHUNK_SIZE]
+            statement = (update(Book).where(Book.id.in_(chunk)).values(values(chunk))
+                         .execution_options(synchronize_session=False))
+            if returning:
+                updated.extend(self.db.execute(statement.returning(Book.id)).scalars())
+            else:
+                updated_count += self.db.execute(statement).rowcount
 
-        return self._db_operation(lambda: self._refresh(book))
+        if not returning:
+            return BulkUpdateReport(requested=len(book_ids), updated=updated_count)
+        missing = set(book_ids).difference(updated)
+        return BulkUpdateReport(requested=len(book_ids), updated=len(updated),
+                                not_found=[book_id for book_id in book_ids if book_id in missing])
 
 
-def get_book_service(db: Session = Depends(get_db)):
-    return BookService(db)
+def get_book_service(db: Session | AsyncSession = Depends(get_session)) -> AsyncService[BookService]:
+    return AsyncService(BookService(db))
@@ -0,0 +1,66 @@
+import threading
+from typing import Hashable
+
+from sqlalchemy import BigInteger, cast, column, func, select, table as table_clause
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+from config import get_settings
+
+settings = get_settings()
+
+
+class CountCache:
+    """
+    Cached COUNT(*) totals per (table, statement, parameters).
+    Every write to a table bumps that table's generation, and the generation is part of the key, so a total
+    cached before the write is never served after it. The TTL bounds staleness for writes made by other processes.
+    """
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._totals: TTLCache[tuple[str, int, Hashable], int] = TTLCache(max_entries, ttl_seconds)
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def key(self, table: str, statement_key: Hashable) -> tuple[str, int, Hashable]:
+        # Take the key before counting: a write that lands mid-count moves the table to a new generation,
+        # so the possibly stale total is stored under a key nobody will look up again.
+        with self._lock:
+            return table, self._generations.get(table, 0), statement_key
+
+    def get(self, key: tuple[str, int, Hashable]) -> int | None:
+        return self._totals.get(key)
+
+    def set(self, key: tuple[str, int, Hashable], total: int):
+        self._totals.set(key, total)
+
+    def invalidate(self, table: str):
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+        self._totals.pop_where(lambda key, _: key[0] == table)
+
+    def stats(self) -> dict:
+        return self._totals.stats()
+
+
+def estimate_table_rows(db: Session, table: str) -> int | None:
+    """
+    Cheap row-count estimate for a whole table, without scanning it.
+    Args:
+        db (Session): The session to query with.
+        table (str): The table name.
+    Returns:
+        int | None: The estimate, or None when the backend offers no cheap estimate.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # MAX(rowid) is a single b-tree seek; it over-counts only by the number of deleted rows
+        statement = select(func.coalesce(func.max(column('rowid')), 0)).select_from(table_clause(table))
+        return db.execute(statement).scalar()
+    if dialect == 'postgresql':
+        estimate = db.execute(select(cast(column('reltuples'), BigInteger)).select_from(table_clause('pg_class'))
+                              .where(column('relname') == table)).scalar()
+        return estimate if estimate is not None and estimate >= 0 else None
+    return None
+
+
+count_cache = CountCache(settings.COUNT_CACHE_SIZE, settings.COUNT_CACHE_TTL_SECONDS)
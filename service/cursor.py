@@ -0,0 +1,48 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+from fastapi import HTTPException
+
+from error_messages import ErrorMessages
+
+NEXT = 'next'
+PREV = 'prev'
+
+
+def encode_cursor(sort_by: str, key: tuple[Any, int], direction: str) -> str:
+    """
+    Build the opaque cursor for a keyset page boundary.
+    Args:
+        sort_by (str): The column the listing is ordered by.
+        key (tuple[Any, int]): The (sort value, id) of the boundary row.
+        direction (str): NEXT to continue after the row, PREV to continue before it.
+    Returns:
+        str: A URL-safe cursor string.
+    """
+    payload = json.dumps({'s': sort_by, 'k': list(key), 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: str) -> tuple[tuple[Any, int], str]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Args:
+        cursor (str): The cursor sent by the client.
+        sort_by (str): The sort column of the current request; it must match the cursor's.
+    Returns:
+        tuple[tuple[Any, int], str]: The boundary (sort value, id) and the direction.
+    Raises:
+        HTTPException: If the cursor is malformed or was issued for another sort order.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        value, item_id = payload['k']
+        direction = payload['d']
+        if payload['s'] != sort_by or direction not in (NEXT, PREV) or not isinstance(item_id, int):
+            raise ValueError(cursor)
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail=ErrorMessages.INVALID_CURSOR.value)
+
+    return (value, item_id), direction
@@ -0,0 +1,77 @@
+import threading
+from typing import Callable, Hashable, Sequence, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+from config import get_settings
+
+settings = get_settings()
+
+R = TypeVar('R', bound=BaseModel)
+
+
+class EntityCache:
+    """
+    Read-through cache of serialized single-entity responses, bounded in bytes and by TTL.
+    Entries are stored with the entity's version (see service.versions) taken before it was loaded and are only
+    served while that version is current, so every committed write, local or replayed from another worker,
+    invalidates them without a scan; superseded entries age out of the LRU.
+    """
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self._entries: TTLCache[tuple[str, Hashable], tuple[str, bytes]] = TTLCache(
+            max_entries=max_bytes // 64, ttl_seconds=ttl_seconds, max_bytes=max_bytes,
+            sizeof=lambda entry: len(entry[1]),
+        )
+        # Counted here rather than by TTLCache: an entry at an old version is a miss
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def read_through(self, db: Session, keys: Sequence[Hashable], versions: Sequence[str],
+                     load: Callable[[list[Hashable]], dict[Hashable, R]], schema: Type[R]) -> dict[Hashable, R]:
+        """
+        Return the cached responses that are still at their version, loading the others together in one call.
+        Args:
+            db (Session): The session load uses; its database is part of the key.
+            keys (Sequence[Hashable]): The entities being read, without duplicates.
+            versions (Sequence[str]): Their current versions, taken before loading.
+            load (Callable[[list[Hashable]], dict[Hashable, R]]): Builds the responses of the missed keys; keys
+                absent from its result were not found and are not cached.
+            schema (Type[R]): The response model, used to deserialize cached entries.
+        Returns:
+            dict[Hashable, R]: The responses found, by key.
+        """
+        database = str(db.get_bind().url)
+        found: dict[Hashable, R] = {}
+        missed: dict[Hashable, str] = {}
+        for key, version in zip(keys, versions):
+            entry = self._entries.get((database, key))
+            if entry is not None and entry[0] == version:
+                found[key] = schema.model_validate_json(entry[1])
+            else:
+                missed[key] = version
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missed)
+
+        if missed:
+            for key, response in load(list(missed)).items():
+                found[key] = response
+                self._entries.set((database, key), (missed[key], response.model_dump_json().encode()))
+        return found
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        stats = self._entries.stats()
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats.update(hits=self.hits, misses=self.misses,
+                         hit_ratio=round(self.hits / lookups, 4) if lookups else 0.0)
+        return stats
+
+
+entity_cache = EntityCache(settings.ENTITY_CACHE_MAX_BYTES, settings.ENTITY_CACHE_TTL_SECONDS)
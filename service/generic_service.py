@@ -1,64 +1,241 @@
+from sqlalchemy import and_, func, insert, inspect, or_, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, Query
+from sqlalchemy.orm.attributes import set_committed_value
 from math import ceil
 from typing import TypeVar, Generic, Type, Any, Callable, Dict
 
+from database import run_in_session
+from enums import TotalMode
 from models import PaginatedResponse
+from serialization import validate_page
+from service.count_cache import count_cache, estimate_table_rows
+from service.cursor import NEXT, PREV, encode_cursor, decode_cursor
+from service.projection import projection
+from service.versions import change_feed, record_row
 
 T = TypeVar('T')
 M = TypeVar('M')
 
+# Backends whose ascending order puts NULLs after every value; SQLite and MySQL put them first
+NULLS_SORT_LAST_DIALECTS = {'postgresql', 'oracle'}
+
 
 class GenericService(Generic[T, M]):
-    def __init__(self, db: Session, model: Type[T], schema: Type[M]):
-        self.db = db
+    def __init__(self, db: Session | AsyncSession, model: Type[T], schema: Type[M]):
+        # Service code is written against the sync Session; with an AsyncSession it runs inside run_sync.
+        self.session = db
+        self.db = db.sync_session if isinstance(db, AsyncSession) else db
         self.model = model
         self.schema = schema
 
-    def _paginate(self, query: Query, page: int, page_size: int) -> PaginatedResponse[M]:
-        total_items = query.count()
-        total_pages = ceil(total_items / page_size)
+    async def run(self, operation: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await run_in_session(self.session, lambda _: operation(*args, **kwargs))
+
+    async def sync_changes(self):
+        """Apply writes committed by other worker processes to the local versions and caches, once per poll."""
+        if change_feed.due(self.db):
+            await self.run(change_feed.catch_up, self.db)
+
+    def _paginate(self, query: Query, page: int, page_size: int,
+                  cursor: str | None = None, sort_by: str = 'id',
+                  include_total: bool = True, total_mode: str = TotalMode.EXACT.value,
+                  to_schema: Callable[[list[T]], list[Any]] | None = None,
+                  schema: Type[Any] | None = None, project: bool = False) -> PaginatedResponse[M]:
+        """
+        Paginate a query ordered by (sort_by, id).
+        With cursor=None this is classic page-number pagination. Any other value (an empty string starts from
+        the beginning) switches to keyset pagination: the page is located with a seek predicate on the
+        (sort_by, id) index instead of OFFSET, so deep pages cost the same as the first one.
+        include_total=False skips counting altogether; total_mode="estimated" allows a cheap table estimate.
+        The page is a PaginatedResponse[schema] (default: self.schema), so it can be encoded without being
+        validated again. to_schema converts the page of entities (default: validated as schema in one call).
+        project=True selects only the columns schema needs (see Projection) and fetches plain rows instead of
+        entities; to_schema then receives those rows, which have an attribute per projected field.
+        """
+        schema = schema or self.schema
+        totals = self._count(query, total_mode) if include_total else None
+        if project:
+            # After counting: the count needs neither the projected columns nor their joins
+            page_projection = projection(self.model, schema)
+            query = page_projection.apply(query)
+            to_schema = to_schema or page_projection.validate
+        to_schema = to_schema or (lambda items: validate_page(schema, items))
+        total_items = totals[0] if totals else None
+        total_pages = ceil(total_items / page_size) if totals else None
+        total_fields = {
+            'total_items': total_items,
+            'total_pages': total_pages,
+            'total_mode': totals[1] if totals else None,
+        }
 
-        items = query.offset((page - 1) * page_size).limit(page_size).all()
-        schema_items = [self.schema.model_validate(item) for item in items]
+        if cursor is not None:
+            return self._paginate_keyset(query, page_size, cursor, sort_by, total_fields, to_schema, schema)
 
-        return PaginatedResponse(
-            items=schema_items,
+        sort_column = getattr(self.model, sort_by)
+        items = (query.order_by(sort_column, self.model.id)
+                 .offset((page - 1) * page_size).limit(page_size).all())
+        return PaginatedResponse[schema](
+            items=to_schema(items),
             current_page=page,
-            total_pages=total_pages,
-            total_items=total_items
+            **total_fields
+        )
+
+    def _count(self, query: Query, total_mode: str) -> tuple[int, str]:
+        """
+        Count the rows of a paginated query.
+        Unfiltered queries in estimated mode use a table estimate; everything else is an exact COUNT served from
+        the count cache when the table hasn't been written since.
+        Returns: tuple[int, str]: The total and the TotalMode value describing it.
+        """
+        table = self.model.__tablename__
+        if total_mode == TotalMode.ESTIMATED.value and query.whereclause is None:
+            estimate = estimate_table_rows(self.db, table)
+            if estimate is not None:
+                return estimate, TotalMode.ESTIMATED.value
+
+        # COUNT over the bare entity; eager loads and ordering add nothing to a total
+        count_query = query.with_entities(func.count(self.model.id)).order_by(None)
+        bind = self.db.get_bind()
+        compiled = count_query.statement.compile(dialect=bind.dialect)
+        key = count_cache.key(table, (str(bind.url), compiled.string, repr(sorted(compiled.params.items()))))
+        total = count_cache.get(key)
+        if total is None:
+            total = count_query.scalar()
+            count_cache.set(key, total)
+        return total, TotalMode.EXACT.value
+
+    def _paginate_keyset(self, query: Query, page_size: int, cursor: str, sort_by: str,
+                         total_fields: Dict[str, Any],
+                         to_schema: Callable[[list[T]], list[Any]], schema: Type[Any]) -> PaginatedResponse[M]:
+        sort_column = getattr(self.model, sort_by)
+        boundary, direction = decode_cursor(cursor, sort_by) if cursor else (None, NEXT)
+        backwards = direction == PREV
+
+        if boundary is not None:
+            query = query.filter(self._seek(sort_column, boundary, backwards))
+        if backwards:
+            query = query.order_by(sort_column.desc(), self.model.id.desc())
+        else:
+            query = query.order_by(sort_column, self.model.id)
+
+        # One extra row tells whether another page follows in the direction of travel
+        items = query.limit(page_size + 1).all()
+        has_more = len(items) > page_size
+        items = items[:page_size]
+        if backwards:
+            items.reverse()
+
+        def key_of(item: T) -> tuple[Any, int]:
+            return getattr(item, sort_by), item.id
+
+        has_next = has_more if not backwards else boundary is not None
+        has_prev = has_more if backwards else boundary is not None
+
+        return PaginatedResponse[schema](
+            items=to_schema(items),
+            current_page=None,
+            next_cursor=encode_cursor(sort_by, key_of(items[-1]), NEXT) if items and has_next else None,
+            prev_cursor=encode_cursor(sort_by, key_of(items[0]), PREV) if items and has_prev else None,
+            **total_fields
         )
 
+    def _seek(self, sort_column, boundary: tuple[Any, int], backwards: bool):
+        """
+        The keyset predicate for the rows after (or, backwards, before) a boundary in (sort_column, id) order.
+        A row value comparison is never true when the sort value is NULL, so NULLs are placed explicitly, where the
+        backend's ORDER BY puts them; a boundary with a value keeps the plain (sort_column, id) index seek.
+        """
+        value, item_id = boundary
+        nulls_last = self.db.get_bind().dialect.name in NULLS_SORT_LAST_DIALECTS
+        # Whether the NULLs lie beyond the boundary in the direction of travel
+        nulls_ahead = backwards != nulls_last
+        if value is None:
+            among_nulls = and_(sort_column.is_(None), self.model.id < item_id if backwards else self.model.id > item_id)
+            return among_nulls if nulls_ahead else or_(among_nulls, sort_column.is_not(None))
+        key_columns = tuple_(sort_column, self.model.id)
+        seek = key_columns < tuple_(value, item_id) if backwards else key_columns > tuple_(value, item_id)
+        return or_(seek, sort_column.is_(None)) if nulls_ahead else seek
+
     def _db_operation(self, operation: Callable[[], Any]) -> Any:
         try:
             result = operation()
             self.db.commit()
+            count_cache.invalidate(self.model.__tablename__)
             return result
         except Exception as e:
             print(f"Database operation failed: {e}")
             self.db.rollback()
             raise
 
-    def _add_and_refresh(self, item: T) -> M:
+    def _returning(self, statement) -> dict[str, Any]:
+        """Run a single-row INSERT/UPDATE with RETURNING every column; the row comes back keyed by attribute."""
+        mapper = inspect(self.model)
+        columns = [attr.columns[0].label(attr.key) for attr in mapper.column_attrs]
+        return dict(self.db.execute(statement.returning(*columns)).mappings().one())
+
+    def _supports_returning(self, kind: str) -> bool:
+        return getattr(self.db.get_bind().dialect, f'{kind}_returning', False)
+
+    def _flush(self, item: T) -> M:
         self.db.add(item)
         self.db.flush()
-        self.db.refresh(item)
-        return self.schema.model_validate(item)
-
-    def _refresh(self, item: T) -> M:
-        self.db.refresh(item)
+        # Primary keys (and eager server defaults) are already populated by the flush; reload only what isn't,
+        # rather than re-selecting the whole row
+        state = inspect(item)
+        unloaded = [attr.key for attr in state.mapper.column_attrs if attr.key in state.unloaded]
+        if unloaded:
+            self.db.refresh(item, attribute_names=unloaded)
         return self.schema.model_validate(item)
 
     def create(self, item: M) -> M:
-        db_item = self.model(**item.model_dump())
-        return self._db_operation(lambda: self._add_and_refresh(db_item))
+        """
+        Insert a new row and return it, in one round trip where the backend supports INSERT ... RETURNING.
+        Backends without RETURNING fall back to a unit-of-work flush.
+        """
+        values = item.model_dump()
+        if not self._supports_returning('insert'):
+            return self._db_operation(lambda: self._flush(self.model(**values)))
+
+        mapper = inspect(self.model)
+        columns = {attr.key: attr.columns[0] for attr in mapper.column_attrs}
+        # A missing primary key is left for the database to generate, as the ORM would
+        values = {columns[key]: value for key, value in values.items()
+                  if not (value is None and columns[key].primary_key)}
+
+        def insert_operation():
+            row = self._returning(insert(mapper.local_table).values(values))
+            record_row(self.db, mapper, row)
+            return self.schema.model_validate(row)
+
+        return self._db_operation(insert_operation)
 
     def update(self, db_item: T, update_data: Dict[str, Any]) -> M:
+        """
+        Update a loaded row and return it, in one round trip where the backend supports UPDATE ... RETURNING.
+        The loaded instance is brought up to date with the returned row. Backends without RETURNING fall back to
+        a unit-of-work flush.
+        """
+        if not self._supports_returning('update'):
+            def flush_operation():
+                for key, value in update_data.items():
+                    setattr(db_item, key, value)
+                return self._flush(db_item)
+
+            return self._db_operation(flush_operation)
+
+        state = inspect(db_item)
+        mapper = state.mapper
+        columns = {attr.key: attr.columns[0] for attr in mapper.column_attrs}
+        previous = {key: state.dict[key] for key in columns if key in state.dict}
+
         def update_operation():
-            for key, value in update_data.items():
-                setattr(db_item, key, value)
-            self.db.add(db_item)
-            self.db.flush()
-            self.db.refresh(db_item)
-            return self.schema.model_validate(db_item)
+            key_matches = [column == value for column, value in zip(mapper.primary_key, state.identity)]
+            row = self._returning(update(mapper.local_table).where(*key_matches)
+                                  .values({columns[key]: value for key, value in update_data.items()}))
+            for key, value in row.items():
+                set_committed_value(db_item, key, value)
+            record_row(self.db, mapper, row, previous)
+            return self.schema.model_validate(row)
 
         return self._db_operation(update_operation)
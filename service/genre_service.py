@@ -1,26 +1,138 @@
-from fastapi import Depends
-from sqlalchemy.orm import Session, joinedload
+from typing import Any
 
-from database import get_db
-from models import GenreRequest, Genre, PaginatedResponse, GenreResponse
+from fastapi import Depends, HTTPException
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from config import get_settings
+from database import get_session
+from enums import TotalMode
+from error_messages import ErrorMessages
+from models import GenreRequest, Genre, Book, BookRequest, PaginatedResponse, GenreResponse, GetManyResponse
+from service.async_service import AsyncService
+from service.entity_cache import entity_cache
 from service.generic_service import GenericService
+from service.versions import versions, change_feed
+
+settings = get_settings()
+
+# Genres per UNION ALL of preview seeks. Each seek binds two parameters, genre_id and the OFFSET SQLite always
+# renders (the limit is inlined), so a chunk stays within both SQLite's default of 500 terms per compound SELECT
+# and its pre-3.32 cap of 999 bound parameters
+MAX_COMPOUND_SELECT = 999 // 2
 
 
 class GenreService(GenericService[Genre, GenreRequest]):
-    def __init__(self, db: Session):
+    def __init__(self, db: Session | AsyncSession):
         super().__init__(db, Genre, GenreRequest)
 
     def create_genre(self, genre: GenreRequest) -> GenreRequest:
         return self.create(genre)
 
-    def get_genre(self, genre_id: int) -> GenreResponse | None:
-        genre = (self.db.query(Genre).options(joinedload(self.model.books)).filter(Genre.id == genre_id).first())
-        return GenreResponse.model_validate(genre) if genre else None
+    def get_genre(self, genre_id: int, books_limit: int = settings.GENRE_BOOK_PREVIEW_SIZE) -> GenreResponse | None:
+        """
+        Retrieve a genre with its book count and first books.
+        Args:
+            genre_id (int): The ID of the genre to retrieve.
+            books_limit (int): Maximum number of books listed with the genre.
+        Returns:
+            GenreResponse | None: The genre response if found, otherwise None.
+        """
+        change_feed.catch_up(self.db)
+        return self._cached_genres([genre_id], books_limit).get(genre_id)
+
+    def get_genres_by_ids(self, genre_ids: list[int],
+                          books_limit: int = settings.GENRE_BOOK_PREVIEW_SIZE) -> GetManyResponse[GenreResponse]:
+        """
+        Retrieve many genres by ID; those not already cached are loaded together.
+        Args:
+            genre_ids (list[int]): The IDs of the genres to retrieve, at most GET_MANY_MAX_IDS.
+            books_limit (int): Maximum number of books listed per genre.
+        Returns:
+            GetManyResponse[GenreResponse]: The genres in request order, null where not found.
+        Raises:
+            HTTPException: If too many IDs are requested.
+        """
+        if len(genre_ids) > settings.GET_MANY_MAX_IDS:
+            raise HTTPException(status_code=400, detail=ErrorMessages.TOO_MANY_IDS.value)
+
+        change_feed.catch_up(self.db)
+        genres = self._cached_genres(list(dict.fromkeys(genre_ids)), books_limit)
+        return GetManyResponse[GenreResponse](items=[genres.get(genre_id) for genre_id in genre_ids],
+                                              not_found=[genre_id for genre_id in dict.fromkeys(genre_ids)
+                                                         if genre_id not in genres])
+
+    def _cached_genres(self, genre_ids: list[int], books_limit: int) -> dict[int, GenreResponse]:
+        table = Genre.__tablename__
+        found = entity_cache.read_through(
+            self.db, [(table, genre_id, books_limit) for genre_id in genre_ids],
+            [versions.entity_etag(table, genre_id, Book.__tablename__) for genre_id in genre_ids],
+            lambda keys: self._load_genres(keys, books_limit), GenreResponse,
+        )
+        return {genre_id: genre for (_, genre_id, _), genre in found.items()}
+
+    def _load_genres(self, keys: list[tuple[str, int, int]], books_limit: int) -> dict[tuple, GenreResponse]:
+        genres = self.db.query(Genre).filter(Genre.id.in_([genre_id for _, genre_id, _ in keys])).all()
+        return {(Genre.__tablename__, genre.id, books_limit): response
+                for genre, response in zip(genres, self._genre_responses(genres, books_limit))}
+
+    def get_genres(self, page: int = 1, page_size = 10,
+                   cursor: str | None = None, sort_by: str = 'id',
+                   include_total: bool = True,
+                   total_mode: str = TotalMode.EXACT.value,
+                   books_limit: int = settings.GENRE_BOOK_PREVIEW_SIZE) -> PaginatedResponse[GenreResponse]:
+        """
+        Retrieve all genres with pagination.
+        Pagination runs over genre rows only; book counts and previews are loaded for the whole page at once.
+        Args:
+            page (int): The page number to retrieve. Defaults to 1.
+            page_size (int): The number of genres per page. Defaults to 10.
+            cursor (str | None): Keyset cursor from a previous page; "" starts cursor mode. Defaults to None.
+            sort_by (str): The column to order by (id or name). Defaults to id.
+            include_total (bool): Whether to count the genres. Defaults to True.
+            total_mode (str): "exact" or "estimated" total. Defaults to exact.
+            books_limit (int): Maximum number of books listed per genre.
+        Returns:
+            PaginatedResponse[GenreResponse]: A paginated response of genres.
+        """
+        return self._paginate(self.db.query(Genre), page, page_size, cursor, sort_by, include_total, total_mode,
+                              to_schema=lambda genres: self._genre_responses(genres, books_limit),
+                              schema=GenreResponse, project=True)
+
+    def _genre_responses(self, genres: list[Any], books_limit: int) -> list[GenreResponse]:
+        # Genre entities, or the id/name rows of a projected listing
+        # One GROUP BY for the counts and one ranked query for the previews, whatever the page size
+        genre_ids = [genre.id for genre in genres]
+        counts = dict(self.db.query(Book.genre_id, func.count(Book.id))
+                      .filter(Book.genre_id.in_(genre_ids))
+                      .group_by(Book.genre_id).all()) if genre_ids else {}
+        previews = self._book_previews([genre_id for genre_id in genre_ids if counts.get(genre_id)], books_limit)
+
+        return [
+            GenreResponse(id=genre.id, name=genre.name, book_count=counts.get(genre.id, 0),
+                          books=previews.get(genre.id, []))
+            for genre in genres
+        ]
 
-    def get_genres(self, page: int = 1, page_size = 10) -> PaginatedResponse[GenreResponse]:
-        query = self.db.query(Genre).options(joinedload(self.model.books))
-        return self._paginate(query, page, page_size)
+    def _book_previews(self, genre_ids: list[int], books_limit: int) -> dict[int, list[BookRequest]]:
+        # selectinload cannot cap a collection per parent, so UNION ALL one LIMITed seek on (genre_id, id) per genre
+        # of the page; ranking with a window function would read every book of those genres instead.
+        # Genre.books is left unloaded, never half-populated.
+        previews: dict[int, list[BookRequest]] = {}
+        if books_limit <= 0:
+            return previews
+        limit = literal(books_limit, literal_execute=True)
+        for start in range(0, len(genre_ids), MAX_COMPOUND_SELECT):
+            seeks = [select(Book).where(Book.genre_id == genre_id).order_by(Book.id).limit(limit)
+                     .subquery().select()
+                     for genre_id in genre_ids[start:start + MAX_COMPOUND_SELECT]]
+            firsts = union_all(*seeks).subquery()
+            book = aliased(Book, firsts)
+            for row in self.db.query(book).order_by(firsts.c.genre_id, firsts.c.id):
+                previews.setdefault(row.genre_id, []).append(BookRequest.model_validate(row))
+        return previews
 
 
-def get_genre_service(db: Session = Depends(get_db)):
-    return GenreService(db)
+def get_genre_service(db: Session | AsyncSession = Depends(get_session)) -> AsyncService[GenreService]:
+    return AsyncService(GenreService(db))
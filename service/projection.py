@@ -0,0 +1,88 @@
+from functools import lru_cache
+from typing import Any, Sequence, Type, get_args
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query, aliased
+from sqlalchemy.orm.interfaces import MANYTOONE
+
+from serialization import validate_page
+
+
+def _nested_schema(annotation: Any) -> Type[BaseModel] | None:
+    """The model of a field annotated with a model, Optional[model] included."""
+    for candidate in (annotation, *get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+class Projection:
+    """
+    The columns a response schema needs from a model, for listings that are only read and serialized.
+    Schema fields backed by a column are selected as columns labelled with the field name; a field backed by a
+    many-to-one relationship (BookResponse.genre) selects the related schema's columns through an outer join.
+    Rows come back as plain tuples: no entities, identity map or relationship loaders. Fields backed by neither
+    (collections, computed values) are left to their defaults or to the caller.
+    """
+    def __init__(self, model: Type[Any], schema: Type[BaseModel]):
+        mapper = inspect(model)
+        self.schema = schema
+        self.columns: list[Any] = []
+        self.joins: list[Any] = []
+        # field -> row index, and per nested field (field, primary key row index, [(nested field, row index)])
+        self._fields: list[tuple[str, int]] = []
+        self._nested: list[tuple[str, int, list[tuple[str, int]]]] = []
+
+        for name, field in schema.model_fields.items():
+            if name in mapper.column_attrs:
+                self._fields.append((name, len(self.columns)))
+                self.columns.append(getattr(model, name).label(name))
+                continue
+            relationship = mapper.relationships.get(name)
+            nested = _nested_schema(field.annotation)
+            if relationship is None or relationship.direction is not MANYTOONE or nested is None:
+                continue
+
+            target = aliased(relationship.mapper.class_)
+            target_columns = relationship.mapper.column_attrs
+            # The related primary key tells a missing relation (outer join, all NULL) from a present one
+            primary_key = relationship.mapper.get_property_by_column(relationship.mapper.primary_key[0]).key
+            key_index = len(self.columns)
+            self.columns.append(getattr(target, primary_key).label(f'{name}__{primary_key}'))
+            nested_fields = [(primary_key, key_index)] if primary_key in nested.model_fields else []
+            for nested_name in nested.model_fields:
+                if nested_name in target_columns and nested_name != primary_key:
+                    nested_fields.append((nested_name, len(self.columns)))
+                    self.columns.append(getattr(target, nested_name).label(f'{name}__{nested_name}'))
+            self.joins.append(getattr(model, name).of_type(target))
+            self._nested.append((name, key_index, nested_fields))
+
+    def apply(self, query: Query) -> Query:
+        """The query selecting the projected columns instead of its entities; filters and joins are kept."""
+        query = query.with_entities(*self.columns)
+        for join in self.joins:
+            query = query.outerjoin(join)
+        return query
+
+    def to_dicts(self, rows: Sequence[Row]) -> list[dict[str, Any]]:
+        """The projected rows as schema input, nested relations included; extra trailing columns are ignored."""
+        fields, nested = self._fields, self._nested
+        items = []
+        for row in rows:
+            item = {name: row[index] for name, index in fields}
+            for name, key_index, nested_fields in nested:
+                item[name] = None if row[key_index] is None else {key: row[index] for key, index in nested_fields}
+            items.append(item)
+        return items
+
+    def validate(self, rows: Sequence[Row]) -> list[Any]:
+        """The projected rows validated as schema instances with one call on the compiled list validator."""
+        return validate_page(self.schema, self.to_dicts(rows))
+
+
+@lru_cache(maxsize=None)
+def projection(model: Type[Any], schema: Type[BaseModel]) -> Projection:
+    """The Projection of a schema over a model, built once per pair."""
+    return Projection(model, schema)
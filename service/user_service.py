@@ -1,67 +1,72 @@
 from fastapi import Depends, HTTPException
-from passlib.context import CryptContext
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from auth import generate_jwt
-from database import get_db
+from database import get_session
 from enums import UserRole
 from error_messages import ErrorMessages
+from hashing import password_hasher
 from models import UserRequest, LoginRequest, LoginResponse, ChangePasswordRequest
 from models.entities import User
+from service.async_service import AsyncService
 from service.generic_service import GenericService
 
 
 class UserService(GenericService[User, UserRequest]):
-    def __init__(self, db: Session):
+    def __init__(self, db: Session | AsyncSession):
         super().__init__(db, User, UserRequest)
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
     def get_all_users(self) -> list[UserRequest]:
         user = self.db.query(User).all()
         return [UserRequest.model_validate(user) for user in user]
 
-    def sign_up(self, user: UserRequest) -> UserRequest:
+    async def sign_up(self, user: UserRequest) -> UserRequest:
         new_user = UserRequest(
             username=user.username,
             email=user.email,
-            password=self._get_password_hash(user.password),
+            password=await password_hasher.hash(user.password),
             role=UserRole.USER.value
         )
 
-        return self.create(new_user)
+        try:
+            return await self.run(self.create, new_user)
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail=ErrorMessages.DUPLICATE_USER.value)
 
-    def login(self, login_request: LoginRequest) -> LoginResponse:
-        user = self.db.query(User).filter(User.username == login_request.username).first()
+    async def login(self, login_request: LoginRequest) -> LoginResponse:
+        user = await self.run(self._get_user_by_username, login_request.username)
         if not user:
             raise HTTPException(status_code=401, detail=ErrorMessages.INCORRECT_CREDENTIALS.value)
-        if self._verify_password(login_request.password, user.password):
-            token = generate_jwt(data={"sub": user.username, "role": user.role})
+        if await password_hasher.verify(login_request.password, user.password):
+            token = generate_jwt(data={"sub": user.username, "role": user.role, "uid": user.id})
             return LoginResponse(access_token=token, token_type="Bearer", username=user.username)
         else:
             raise HTTPException(status_code=401, detail=ErrorMessages.INCORRECT_CREDENTIALS.value)
 
-    def change_password(self, change_password_request: ChangePasswordRequest) -> UserRequest:
-        user = self.db.query(User).filter(User.id == change_password_request.id).first()
+    async def change_password(self, change_password_request: ChangePasswordRequest) -> UserRequest:
+        user = await self.run(self._get_user_by_id, change_password_request.id)
         if not user:
             raise HTTPException(status_code=401, detail=ErrorMessages.INCORRECT_CREDENTIALS.value)
-        if self._verify_password(change_password_request.old_password, user.password):
+        if await password_hasher.verify(change_password_request.old_password, user.password):
             update_user = UserRequest(
                 id=user.id,
                 username=user.username,
                 email=user.email,
-                password=self._get_password_hash(change_password_request.new_password),
+                password=await password_hasher.hash(change_password_request.new_password),
                 role=user.role
             )
-            return self.update(user, update_user.model_dump(exclude_unset=True))
+            return await self.run(self.update, user, update_user.model_dump(exclude_unset=True))
         else:
             raise HTTPException(status_code=401, detail=ErrorMessages.INCORRECT_CREDENTIALS.value)
 
-    def _get_password_hash(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    def _get_user_by_username(self, username: str) -> User | None:
+        return self.db.query(User).filter(User.username == username).first()
 
-    def _verify_password(self, password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(password, hashed_password)
+    def _get_user_by_id(self, user_id: int) -> User | None:
+        return self.db.query(User).filter(User.id == user_id).first()
 
 
-def get_user_service(db: Session = Depends(get_db)):
-    return UserService(db)
+def get_user_service(db: Session | AsyncSession = Depends(get_session)) -> AsyncService[UserService]:
+    return AsyncService(UserService(db))
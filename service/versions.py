@@ -0,0 +1,320 @@
+import os
+import secrets
+import threading
+import time
+from itertools import chain
+from typing import Any, Hashable, Mapping
+
+from sqlalchemy import event, inspect, insert, delete, select, func
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapper, Session, ORMExecuteState
+from sqlalchemy.orm.interfaces import MANYTOONE, ONETOMANY
+
+from auth import invalidate_principals
+from config import get_settings
+from database import Base
+from models import ChangeLog, User
+from service.count_cache import count_cache
+
+settings = get_settings()
+
+_PENDING = 'pending_version_changes'
+CHANGE_LOG = ChangeLog.__table__
+
+
+class VersionRegistry:
+    """
+    Change counters used as HTTP validators: one per table (lists) and one per row (single entities).
+    Counters are bumped after a write commits, and readers take them before querying, so a representation is
+    never labelled with a version newer than the data it was built from.
+    Counters are process-local: ChangeFeed brings in writes made by other processes, and the epoch keeps
+    validators issued by another process from ever matching.
+    """
+    def __init__(self):
+        self.epoch = secrets.token_hex(4)
+        self._tables: dict[str, int] = {}
+        # Bumped when any row of the table may have changed without us knowing which (bulk statements)
+        self._resets: dict[str, int] = {}
+        self._rows: dict[tuple[str, Hashable], int] = {}
+        self._modified: dict[str, float] = {}
+        self._started = time.time()
+        self._lock = threading.Lock()
+
+    def changed(self, table: str, row_id: Hashable | None = None):
+        """
+        Record a committed change.
+        Args:
+            table (str): The table written to.
+            row_id (Hashable | None): The primary key of the changed row; None when any row may have changed.
+        """
+        with self._lock:
+            self._tables[table] = self._tables.get(table, 0) + 1
+            self._modified[table] = time.time()
+            if row_id is None:
+                self._resets[table] = self._resets.get(table, 0) + 1
+            else:
+                self._rows[(table, row_id)] = self._rows.get((table, row_id), 0) + 1
+
+    def table_etag(self, *tables: str) -> str:
+        """Strong ETag for a representation built from whole tables."""
+        with self._lock:
+            versions = '.'.join(str(self._tables.get(table, 0)) for table in tables)
+            return f'"{self.epoch}-{versions}"'
+
+    def entity_etag(self, table: str, row_id: Hashable, *related: str) -> str:
+        """Strong ETag for one row, also covering bulk changes to the related tables it embeds."""
+        with self._lock:
+            resets = '.'.join(str(self._resets.get(name, 0)) for name in (table, *related))
+            return f'"{self.epoch}-{resets}-{self._rows.get((table, row_id), 0)}"'
+
+    def last_modified(self, *tables: str) -> float:
+        """Time of the last change to any of the tables seen by this process (its start time if none)."""
+        with self._lock:
+            return max([self._started, *(self._modified.get(table, 0) for table in tables)])
+
+    def _after_fork(self):
+        # Forked server workers would otherwise share the epoch and count on from the same numbers, labelling
+        # different data with the same validators
+        self.epoch = secrets.token_hex(4)
+        self._tables = {}
+        self._resets = {}
+        self._rows = {}
+        self._modified = {}
+        self._started = time.time()
+        self._lock = threading.Lock()
+
+
+class ChangeFeed:
+    """
+    Carries committed writes between worker processes through the change_log table.
+    Every write appends its (table, row) changes in the writing transaction; readers replay rows appended since
+    their last look, at most once per poll interval, into the local versions and count cache. Rows this process
+    appended are skipped: its own commits were applied when they happened.
+    A process that has not looked for longer than the retention may have missed pruned rows and invalidates
+    everything instead.
+    """
+    def __init__(self, poll_seconds: float, retention_seconds: float):
+        self.poll_seconds = poll_seconds
+        self.retention_seconds = retention_seconds
+        # Per database: (last replayed seq, monotonic time of the last look)
+        self._positions: dict[str, tuple[int, float]] = {}
+        # Per database: seqs of rows this process appended that the position hasn't passed yet
+        self._own: dict[str, set[int]] = {}
+        self._pruned_at = 0.0
+        # Set in a forked worker whose parent had looked: its inherited caches predate the child's first look
+        self._inherited = False
+        self._lock = threading.Lock()
+        self.replayed = 0
+        self.resets = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.poll_seconds > 0
+
+    def append(self, connection: Connection, changes: set[tuple[str, Hashable | None]]):
+        if not self.enabled or not changes:
+            return
+        now = time.time()
+        seqs = connection.execute(insert(CHANGE_LOG).returning(CHANGE_LOG.c.seq), [
+            {'table_name': table, 'row_id': row_id if isinstance(row_id, int) else None, 'changed_at': now}
+            for table, row_id in changes
+        ]).scalars().all()
+        # Marked before the commit, so a concurrent catch_up can never see them as someone else's; seqs of a
+        # rolled-back transaction are never reused and are dropped once the position passes them
+        with self._lock:
+            self._own.setdefault(_database(connection), set()).update(seqs)
+        # Writers keep the log short; a tenth of the retention between prunes bounds it to ~1.1x
+        if now - self._pruned_at > self.retention_seconds / 10:
+            self._pruned_at = now
+            connection.execute(delete(CHANGE_LOG).where(CHANGE_LOG.c.changed_at < now - self.retention_seconds))
+
+    def due(self, db: Session) -> bool:
+        if not self.enabled:
+            return False
+        position = self._positions.get(_database(db))
+        return position is None or time.monotonic() - position[1] >= self.poll_seconds
+
+    def catch_up(self, db: Session) -> int:
+        """
+        Apply the changes committed since the last look, by any process, if the poll interval has elapsed.
+        Args: db (Session): The session of the current request, so the log is read in the same snapshot as the data.
+        Returns: int: The number of changes applied.
+        """
+        if not self.due(db):
+            return 0
+        url = _database(db)
+        now = time.monotonic()
+        with self._lock:
+            position = self._positions.get(url)
+        if position is None or now - position[1] > self.retention_seconds:
+            last_seq = db.execute(select(func.max(CHANGE_LOG.c.seq))).scalar() or 0
+            if position is not None or self._inherited:
+                self._inherited = False
+                self._reset_all()
+            with self._lock:
+                self._positions[url] = (last_seq, now)
+                self._forget_own(url, last_seq)
+            return 0
+
+        rows = db.execute(select(CHANGE_LOG.c.seq, CHANGE_LOG.c.table_name, CHANGE_LOG.c.row_id)
+                          .where(CHANGE_LOG.c.seq > position[0])
+                          .order_by(CHANGE_LOG.c.seq)).all()
+        with self._lock:
+            own = self._own.get(url, set())
+            remote = [row for row in rows if row.seq not in own]
+        for _, table, row_id in remote:
+            _apply(table, row_id)
+        for table in {table for _, table, _ in remote}:
+            count_cache.invalidate(table)
+        with self._lock:
+            self._positions[url] = (max(rows[-1].seq, self._positions[url][0]) if rows else position[0], now)
+            self._forget_own(url, self._positions[url][0])
+            self.replayed += len(remote)
+        return len(remote)
+
+    def _forget_own(self, url: str, position: int):
+        own = self._own.get(url)
+        if own:
+            own.difference_update([seq for seq in own if seq <= position])
+
+    def clear(self):
+        """Forget every database's position; the next look starts from the end of the log."""
+        with self._lock:
+            self._positions.clear()
+            self._own.clear()
+
+    def _after_fork(self):
+        # A forked worker looks at the log from its own position; the parent's appends aren't its own
+        self._inherited = bool(self._positions)
+        self._positions = {}
+        self._own = {}
+        self._lock = threading.Lock()
+        self.replayed = 0
+        self.resets = 0
+
+    def _reset_all(self):
+        with self._lock:
+            self.resets += 1
+        for table in Base.metadata.tables:
+            _apply(table, None)
+            count_cache.invalidate(table)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'poll_seconds': self.poll_seconds,
+                'retention_seconds': self.retention_seconds,
+                'last_seq': {url: seq for url, (seq, _) in self._positions.items()},
+                'replayed': self.replayed,
+                'resets': self.resets,
+            }
+
+
+def _database(bind: Session | Connection) -> str:
+    # The key of a database: sync and async sessions on the same file share one position
+    url = bind.get_bind().url if isinstance(bind, Session) else bind.engine.url
+    return url.set(drivername=url.get_backend_name()).render_as_string(hide_password=False)
+
+
+def _pending(session: Session) -> set[tuple[str, Hashable | None]]:
+    return session.info.setdefault(_PENDING, set())
+
+
+def _record(session: Session, changes: set[tuple[str, Hashable | None]]):
+    changes = {change for change in changes if change[0] != CHANGE_LOG.name}
+    _pending(session).update(changes)
+    change_feed.append(session.connection(), changes)
+
+
+def _record_flush(session: Session, flush_context):
+    changes: set[tuple[str, Hashable | None]] = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        state = inspect(obj)
+        mapper = state.mapper
+        identity = mapper.primary_key_from_instance(obj)
+        changes.add((mapper.local_table.name, identity[0] if len(identity) == 1 else tuple(identity)))
+
+        for relationship in mapper.relationships:
+            target = relationship.mapper.local_table.name
+            if relationship.direction is MANYTOONE:
+                # The parent embeds this row (a genre lists its books): bump the old and the new parent
+                for column in relationship.local_columns:
+                    history = state.attrs[mapper.get_property_by_column(column).key].history
+                    for parent_id in chain(history.added or (), history.unchanged or (), history.deleted or ()):
+                        if parent_id is not None:
+                            changes.add((target, parent_id))
+            elif relationship.direction is ONETOMANY and obj not in session.new:
+                # Children embed this row (a book shows its genre)
+                changes.add((target, None))
+    _record(session, changes)
+
+
+def record_row(session: Session, mapper: Mapper, values: Mapping[str, Any],
+               previous: Mapping[str, Any] | None = None):
+    """
+    Record a single-row write made with a Core INSERT/UPDATE ... RETURNING, which the flush hooks never see.
+    Args:
+        session (Session): The session the statement ran in.
+        mapper (Mapper): The mapper of the written entity.
+        values (Mapping[str, Any]): The row as returned by the statement, keyed by attribute name.
+        previous (Mapping[str, Any] | None): The loaded attributes before an UPDATE; None for an INSERT.
+    """
+    identity = [values[mapper.get_property_by_column(column).key] for column in mapper.primary_key]
+    changes: set[tuple[str, Hashable | None]] = {
+        (mapper.local_table.name, identity[0] if len(identity) == 1 else tuple(identity))
+    }
+    for relationship in mapper.relationships:
+        target = relationship.mapper.local_table.name
+        if relationship.direction is MANYTOONE:
+            for column in relationship.local_columns:
+                key = mapper.get_property_by_column(column).key
+                if previous is not None and key not in previous:
+                    # The old parent was never loaded, so any parent may have lost this row
+                    changes.add((target, None))
+                for parent_id in {values.get(key), (previous or {}).get(key)}:
+                    if parent_id is not None:
+                        changes.add((target, parent_id))
+        elif relationship.direction is ONETOMANY and previous is not None:
+            changes.add((target, None))
+    _record(session, changes)
+
+
+def _record_bulk(orm_execute_state: ORMExecuteState):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    changes = {(mapper.local_table.name, None)}
+    for relationship in mapper.relationships:
+        changes.add((relationship.mapper.local_table.name, None))
+    _record(orm_execute_state.session, changes)
+
+
+def _apply(table: str, row_id: Hashable | None):
+    # A committed change, local or replayed: bump its versions and drop cached principals of a changed user
+    versions.changed(table, row_id)
+    if table == User.__tablename__:
+        invalidate_principals(row_id)
+
+
+def _publish(session: Session):
+    for table, row_id in session.info.pop(_PENDING, ()):
+        _apply(table, row_id)
+
+
+def _discard(session: Session, *args):
+    session.info.pop(_PENDING, None)
+
+
+versions = VersionRegistry()
+change_feed = ChangeFeed(settings.CHANGE_FEED_POLL_SECONDS, settings.CHANGE_FEED_RETENTION_SECONDS)
+os.register_at_fork(after_in_child=versions._after_fork)
+os.register_at_fork(after_in_child=change_feed._after_fork)
+
+event.listen(Session, 'after_flush', _record_flush)
+event.listen(Session, 'do_orm_execute', _record_bulk)
+event.listen(Session, 'after_commit', _publish)
+event.listen(Session, 'after_rollback', _discard)
@@ -0,0 +1,145 @@
+import os
+import time
+from contextlib import AsyncExitStack, contextmanager
+from typing import Any, Iterator
+
+# main.py imports this module first, so a worker's import-to-ready time starts here
+IMPORT_STARTED = time.perf_counter()
+
+
+def _warm_count(pool, wanted: int) -> int:
+    from sqlalchemy.pool import NullPool, QueuePool
+
+    if isinstance(pool, QueuePool):
+        # Connections beyond the pool size would be closed again on check-in
+        return min(wanted, pool.size())
+    return 0 if isinstance(pool, NullPool) else min(wanted, 1)
+
+
+def check_schema():
+    """
+    Fail fast unless the database is at the schema revision this build expects; one indexed SELECT.
+    Raises:
+        RuntimeError: If the database is not migrated (or is newer than this build).
+    """
+    from database import engine
+    from initialization import SCHEMA_REVISION, schema_revision
+
+    with engine.connect() as connection:
+        current = schema_revision(connection)
+    if current != SCHEMA_REVISION:
+        raise RuntimeError(f'Database schema is at revision {current}, this build expects {SCHEMA_REVISION}; '
+                           f'run "python -m initialization" first')
+
+
+def warm_sync_pools(count: int) -> int:
+    """Open up to count connections per sync pool at once and return them to it. Returns: int: Connections opened."""
+    from database import engine, read_engine
+
+    opened = 0
+    for sync_engine in (engine, read_engine):
+        if sync_engine is None:
+            continue
+        connections = []
+        try:
+            for _ in range(_warm_count(sync_engine.pool, count)):
+                connections.append(sync_engine.connect())
+        finally:
+            opened += len(connections)
+            for connection in connections:
+                connection.close()
+    return opened
+
+
+async def warm_async_pools(count: int) -> int:
+    """The async engines' counterpart of warm_sync_pools."""
+    from database import async_engine, async_read_engine
+
+    opened = 0
+    for async_db_engine in (async_engine, async_read_engine):
+        if async_db_engine is None:
+            continue
+        async with AsyncExitStack() as stack:
+            for _ in range(_warm_count(async_db_engine.sync_engine.pool, count)):
+                await stack.enter_async_context(async_db_engine.connect())
+                opened += 1
+    return opened
+
+
+class WorkerStartup:
+    """
+    Import-to-ready timing of this worker process, by phase: importing the application, the schema check and the
+    pool warm-up. Phases are measured from IMPORT_STARTED; "ready" is the total.
+    """
+    def __init__(self, started: float):
+        self.started = started
+        self.pid = os.getpid()
+        self.phases: dict[str, float] = {}
+        self.ready = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def forked(self):
+        """
+        Start over in a worker forked from a preloading master: the application is imported already, so the
+        worker's time to ready runs from the fork.
+        """
+        self.started = time.perf_counter()
+        self.pid = os.getpid()
+        self.phases = {}
+        self.ready = False
+
+    def imported(self):
+        """Called once the application module has been built."""
+        self.phases['import'] = time.perf_counter() - self.started
+
+    async def start(self):
+        """
+        Get the worker ready to serve: check the schema revision and warm the connection pools, then report the
+        import-to-ready time. Schema changes and the admin account are `python -m initialization`'s job.
+        Raises:
+            RuntimeError: If the schema check fails.
+        """
+        from starlette.concurrency import run_in_threadpool
+
+        from config import get_settings
+
+        settings = get_settings()
+        if settings.STARTUP_CHECK_SCHEMA:
+            with self.phase('schema_check'):
+                await run_in_threadpool(check_schema)
+        with self.phase('pool_warmup'):
+            await run_in_threadpool(warm_sync_pools, settings.STARTUP_WARM_CONNECTIONS)
+            await warm_async_pools(settings.STARTUP_WARM_CONNECTIONS)
+        self.phases['ready'] = time.perf_counter() - self.started
+        self.ready = True
+        if settings.METRICS_ENABLED:
+            self._register_metrics()
+        phases = ', '.join(f'{name} {seconds * 1000:.1f} ms' for name, seconds in self.phases.items()
+                           if name != 'ready')
+        print(f"Worker {self.pid} ready in {self.phases['ready'] * 1000:.1f} ms ({phases})")
+
+    def _register_metrics(self):
+        from metrics import Gauge, registry
+
+        if getattr(self, '_gauge', None) is None:
+            self._gauge = registry.register(Gauge(
+                'app_startup_seconds', "This worker's import-to-ready time by phase; ready is the total.", ('phase',),
+                lambda: [((name,), seconds) for name, seconds in self.phases.items()]))
+
+    def report(self) -> dict[str, Any]:
+        return {
+            'pid': self.pid,
+            'ready': self.ready,
+            'phases_ms': {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()},
+        }
+
+
+worker_startup = WorkerStartup(IMPORT_STARTED)
+os.register_at_fork(after_in_child=worker_startup.forked)
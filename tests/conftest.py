@@ -1,7 +1,8 @@
 import pytest
 import os
 import sys
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from fastapi.testclient import TestClient
 import tempfile
@@ -9,11 +10,16 @@ import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from config.test import TestSettings
-from database import Base, get_db
+from auth import get_current_user
+from database import Base, get_db, get_session, to_async_url
 from main import app
-from models import GenreRequest, Book, BookRequest
+from models import GenreRequest, Book, BookRequest, Principal
 from service.book_service import BookService
+from service.entity_cache import entity_cache
+from service.versions import change_feed
 from service.genre_service import GenreService
+from service.user_service import UserService
+from query_tracker import install as install_query_tracker, track_queries
 from initialization import initialize_db
 
 import config
@@ -43,6 +49,10 @@ def test_db(test_settings: TestSettings) -> Session:
     # Initialize database
     initialize_db()
 
+    # Temporary paths get reused, so nothing cached for an earlier test database may leak into this one
+    entity_cache.clear()
+    change_feed.clear()
+
     # Get database session
     db = TestingSessionLocal()
     try:
@@ -54,6 +64,31 @@ def test_db(test_settings: TestSettings) -> Session:
         os.unlink(db_path)
 
 
+@pytest.fixture
+def statements(test_db):
+    # SQL statements issued on the test database while the test runs
+    executed = []
+    engine = test_db.get_bind()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def sql_budget(test_db):
+    # Strict SQL tracking on the test database: `with sql_budget(3):` fails on a 4th statement or an N+1 shape
+    install_query_tracker(test_db.get_bind())
+
+    def budget(max_statements: int | None = None, **kwargs):
+        return track_queries(max_statements, strict=True, **kwargs)
+
+    return budget
+
+
 @pytest.fixture
 def book_service(test_db):
     return BookService(test_db)
@@ -78,4 +113,25 @@ def sample_book(book_service):
         year=2010,
         pages=300
     )
-    return book_service.create_new_book(book_data)
\ No newline at end of file
+    return book_service.create_new_book(book_data)
+
+@pytest.fixture
+def async_test_engine(test_db):
+    # Async engine over the same temporary database file as test_db
+    return create_async_engine(to_async_url(test_db.get_bind().url.render_as_string()))
+
+
+@pytest.fixture
+def user_service(test_db):
+    return UserService(test_db)
+
+
+@pytest.fixture
+def client(test_db):
+    # API client on the test database, authenticated as an admin
+    app.dependency_overrides[get_session] = lambda: test_db
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=1, username="admin", role="ADMIN")
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from error_messages import ErrorMessages
+from models import BookRequest, BookResponse, PaginatedResponse
+from service import AsyncService, BookService
+
+
+def run_with_book_service(async_test_engine, scenario):
+    async def runner():
+        try:
+            async with AsyncSession(async_test_engine, autoflush=False) as db:
+                return await scenario(AsyncService(BookService(db)))
+        finally:
+            await async_test_engine.dispose()
+
+    return asyncio.run(runner())
+
+
+class TestAsyncBookService:
+    def test_create_and_get_book(self, async_test_engine):
+        async def scenario(service):
+            created = await service.create_new_book(
+                BookRequest(title="Async Book", author="Async Author", year=2024, pages=100)
+            )
+            return created, await service.get_book(created.id)
+
+        created, book = run_with_book_service(async_test_engine, scenario)
+
+        assert isinstance(book, BookResponse)
+        assert book.id == created.id
+        assert book.title == "Async Book"
+
+    def test_get_all_books_pagination(self, async_test_engine):
+        async def scenario(service):
+            for i in range(12):
+                await service.create_new_book(
+                    BookRequest(title=f"Async Book {i}", author="Async Author", year=2024, pages=100)
+                )
+            return await service.get_all_books(page=2, page_size=10)
+
+        result = run_with_book_service(async_test_engine, scenario)
+
+        assert isinstance(result, PaginatedResponse)
+        assert result.total_items == 12
+        assert len(result.items) == 2
+
+    def test_update_book_not_found(self, async_test_engine):
+        async def scenario(service):
+            await service.update_book(
+                999, BookRequest(title="Updated Title", author="Updated Author", year=2023, pages=250)
+            )
+
+        with pytest.raises(HTTPException) as exc_info:
+            run_with_book_service(async_test_engine, scenario)
+
+        assert exc_info.value.status_code == 404
+        assert exc_info.value.detail == ErrorMessages.BOOK_NOT_FOUND.value
@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import text
+
+import auth
+from auth import generate_jwt, get_current_user, principal_cache
+from models import UserRequest, ChangePasswordRequest
+from service.versions import change_feed
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture
+def reader(user_service):
+    return asyncio.run(user_service.sign_up(
+        UserRequest(username="reader", email="reader@example.com", password="secret", role="USER")
+    ))
+
+
+def current_user(token, db):
+    return asyncio.run(get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db))
+
+
+class TestPrincipalCache:
+    def test_second_lookup_is_served_from_cache(self, test_db, reader, statements):
+        token = generate_jwt({"sub": reader.username, "role": reader.role})
+        change_feed.catch_up(test_db)  # the first look at the change log, due once per poll interval
+        statements.clear()
+
+        first = current_user(token, test_db)
+        queries_after_first = len(statements)
+        second = current_user(token, test_db)
+
+        assert first == second
+        assert first.username == "reader"
+        assert queries_after_first == 1
+        assert len(statements) == queries_after_first
+        assert principal_cache.stats()["hits"] == 1
+        assert principal_cache.stats()["misses"] == 1
+
+    def test_change_password_invalidates(self, test_db, user_service, reader):
+        token = generate_jwt({"sub": reader.username, "role": reader.role})
+        current_user(token, test_db)
+
+        asyncio.run(user_service.change_password(
+            ChangePasswordRequest(id=reader.id, username="reader", old_password="secret", new_password="changed")
+        ))
+
+        assert principal_cache.stats()["size"] == 0
+
+    def test_role_change_in_another_worker_invalidates(self, test_db, reader, monkeypatch):
+        token = generate_jwt({"sub": reader.username, "role": reader.role})
+        assert current_user(token, test_db).role == "USER"
+
+        # Another worker process promotes the user: its own connection and change_log row, nothing seen locally
+        with test_db.get_bind().connect() as connection:
+            connection.execute(text("UPDATE users SET role = 'ADMIN' WHERE id = :id"), {"id": reader.id})
+            connection.execute(text("INSERT INTO change_log (table_name, row_id, changed_at) "
+                                    "VALUES ('users', :id, :at)"), {"id": reader.id, "at": time.time()})
+            connection.commit()
+        test_db.rollback()
+
+        monkeypatch.setattr(change_feed, "poll_seconds", 3600)
+        assert current_user(token, test_db).role == "USER"
+        # Once the poll interval has elapsed, well within the cache TTL
+        monkeypatch.setattr(change_feed, "poll_seconds", 1e-9)
+        assert current_user(token, test_db).role == "ADMIN"
+
+    def test_trusted_role_claim_skips_database(self, test_db, statements, monkeypatch):
+        monkeypatch.setattr(auth.settings, "TRUST_JWT_ROLE_CLAIM", True)
+        token = generate_jwt({"sub": "ghost", "role": "ADMIN", "uid": 7})
+
+        principal = current_user(token, test_db)
+
+        assert principal.role == "ADMIN"
+        assert principal.id == 7
+        assert statements == []
@@ -0,0 +1,84 @@
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from error_messages import ErrorMessages
+from models import AssignGenreRequest, BookRequest, BookPatch, SearchRequest
+from service.book_service import settings
+
+
+@pytest.fixture
+def books(book_service):
+    return [book_service.create_new_book(BookRequest(title=f"Bulk Book {i}", author=f"Author {i % 2}",
+                                                     year=2000 + i, pages=100 + i))
+            for i in range(5)]
+
+
+class TestBookBulkUpdate:
+    def test_assign_genre_by_ids_in_chunks(self, book_service, books, sample_genre, statements, monkeypatch):
+        monkeypatch.setattr(settings, "BULK_UPDATE_CHUNK_SIZE", 2)
+        statements.clear()
+
+        report = book_service.assign_genre(sample_genre.id, [book.id for book in books] + [999])
+
+        assert (report.requested, report.updated, report.not_found) == (6, 5, [999])
+        updates = [statement for statement in statements if statement.startswith("UPDATE books")]
+        assert len(updates) == 3
+        assert all(book_service.get_book(book.id).genre.id == sample_genre.id for book in books)
+
+    def test_assign_genre_by_filter(self, book_service, books, sample_genre):
+        report = book_service.assign_genre(sample_genre.id, search_filters=SearchRequest(author="Author 1"))
+
+        assert (report.requested, report.updated) == (2, 2)
+        assigned = [book.id for book in books if book_service.get_book(book.id).genre is not None]
+        assert assigned == [books[1].id, books[3].id]
+
+    def test_assign_genre_refuses_filter_without_criteria(self, book_service, books, sample_genre):
+        for search_filters in (None, SearchRequest(), SearchRequest(title="")):
+            with pytest.raises(HTTPException) as exc_info:
+                book_service.assign_genre(sample_genre.id, search_filters=search_filters)
+
+            assert exc_info.value.status_code == 400
+            assert exc_info.value.detail == ErrorMessages.NO_FILTER_CRITERIA.value
+        assert all(book_service.get_book(book.id).genre is None for book in books)
+
+    def test_assign_genre_request_refuses_empty_filters(self):
+        with pytest.raises(ValidationError):
+            AssignGenreRequest(genre_id=1, filters={})
+
+    def test_assign_genre_unknown_genre(self, book_service, books):
+        with pytest.raises(HTTPException) as exc_info:
+            book_service.assign_genre(999, [books[0].id])
+
+        assert exc_info.value.status_code == 404
+        assert exc_info.value.detail == ErrorMessages.GENRE_NOT_FOUND.value
+
+    def test_update_books_single_case_statement(self, book_service, books, sample_genre, statements):
+        statements.clear()
+
+        report = book_service.update_books([
+            BookPatch(id=books[0].id, title="Patched Title"),
+            BookPatch(id=books[1].id, pages=999, genre_id=sample_genre.id),
+            BookPatch(id=12345, year=1999),
+        ])
+
+        assert (report.requested, report.updated, report.not_found) == (3, 2, [12345])
+        assert len([statement for statement in statements if statement.startswith("UPDATE books")]) == 1
+        first, second, third = (book_service.get_book(book.id) for book in books[:3])
+        assert (first.title, first.pages) == ("Patched Title", books[0].pages)
+        assert (second.pages, second.genre.id, second.title) == (999, sample_genre.id, books[1].title)
+        assert third.title == books[2].title
+
+    def test_book_patch_requires_a_change(self):
+        with pytest.raises(ValidationError):
+            BookPatch(id=99999)
+        with pytest.raises(ValidationError):
+            BookPatch(id=99999, title=None)
+
+    def test_update_books_duplicate_title_rolls_back(self, book_service, books):
+        with pytest.raises(HTTPException) as exc_info:
+            book_service.update_books([BookPatch(id=books[0].id, author="Changed Author"),
+                                       BookPatch(id=books[1].id, title=books[2].title)])
+
+        assert exc_info.value.status_code == 409
+        assert book_service.get_book(books[0].id).author == books[0].author
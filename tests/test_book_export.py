@@ -0,0 +1,59 @@
+import asyncio
+import gzip
+import json
+
+from enums import ExportFormat, ImportFormat
+from models import BookRequest, SearchRequest
+from service.book_export import gzip_chunks
+
+
+def export_books(book_service, search_filters=None, export_format=ExportFormat.NDJSON, batch_size=2) -> str:
+    return b"".join(book_service.export_books(search_filters or SearchRequest(), export_format, batch_size)).decode()
+
+
+def add_books(book_service, count: int):
+    for i in range(count):
+        book_service.create_new_book(BookRequest(title=f"Export Book {i}", author=f"Author {i % 2}",
+                                                 year=2000 + i, pages=100 + i))
+
+
+class TestBookExport:
+    def test_ndjson_export_streams_in_batches(self, book_service, sample_book, sample_genre):
+        book_service.add_book_to_genre(sample_book.id, sample_genre.id)
+        add_books(book_service, 4)
+
+        chunks = list(book_service.export_books(SearchRequest(), ExportFormat.NDJSON, batch_size=2))
+
+        assert len(chunks) == 3
+        rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+        assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+        assert rows[0] == {"id": sample_book.id, "title": sample_book.title, "author": sample_book.author,
+                           "year": sample_book.year, "pages": sample_book.pages, "genre": sample_genre.name}
+        assert rows[1]["genre"] is None
+
+    def test_export_applies_search_filters(self, book_service):
+        add_books(book_service, 4)
+
+        body = export_books(book_service, SearchRequest(author="Author 1"))
+
+        assert [json.loads(line)["title"] for line in body.splitlines()] == ["Export Book 1", "Export Book 3"]
+
+    def test_csv_export_round_trips_through_import(self, book_service, sample_book, sample_genre):
+        book_service.add_book_to_genre(sample_book.id, sample_genre.id)
+        add_books(book_service, 3)
+        body = export_books(book_service, export_format=ExportFormat.CSV)
+        assert body.splitlines()[0] == "id,title,author,year,pages,genre"
+
+        async def chunks():
+            yield body.encode()
+
+        report = asyncio.run(book_service.import_books(chunks(), ImportFormat.CSV, batch_size=10, upsert=True))
+
+        assert report.failed == 0
+        assert report.imported == 4
+        assert book_service.get_book(sample_book.id).genre.id == sample_genre.id
+
+    def test_gzip_chunks(self):
+        chunks = [b"first line\n", b"", b"second line\n"]
+
+        assert gzip.decompress(b"".join(gzip_chunks(chunks))) == b"".join(chunks)
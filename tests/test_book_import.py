@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from enums import ImportFormat
+from error_messages import ErrorMessages
+from models import SearchRequest
+
+
+def chunked(body: str, size: int = 7):
+    async def chunks():
+        data = body.encode()
+        for start in range(0, len(data), size):
+            yield data[start:start + size]
+
+    return chunks()
+
+
+def import_books(book_service, body: str, import_format=ImportFormat.NDJSON, batch_size=2, upsert=False):
+    return asyncio.run(book_service.import_books(chunked(body), import_format, batch_size, upsert))
+
+
+class TestBookImport:
+    def test_ndjson_import_with_row_errors(self, book_service, sample_genre):
+        body = "\n".join([
+            json.dumps({"title": "Imported One", "author": "Author A", "year": 2001, "pages": 100,
+                        "genre": sample_genre.name}),
+            json.dumps({"title": "Imported Two", "author": "Author B", "year": 2002, "pages": 200}),
+            "{not json",
+            json.dumps({"title": "Bad", "author": "Author C", "year": 2003, "pages": 0}),
+            json.dumps({"title": "Imported Three", "author": "Author D", "year": 2004, "pages": 300,
+                        "genre": "No Such Genre"}),
+            "",
+            json.dumps({"title": "Imported Four", "author": "Author E", "year": 2005, "pages": 400}),
+        ])
+
+        report = import_books(book_service, body)
+
+        assert report.rows_read == 6
+        assert report.imported == 3
+        assert report.failed == 3
+        assert [error.line for error in report.errors] == [3, 4, 5]
+        assert report.errors[1].errors[0].startswith("pages:")
+        books = book_service.get_all_books(page_size=10).items
+        assert {book.title for book in books} == {"Imported One", "Imported Two", "Imported Four"}
+        imported_one = next(book for book in books if book.title == "Imported One")
+        assert book_service.get_book(imported_one.id).genre.id == sample_genre.id
+
+    def test_csv_import_with_quoted_newline(self, book_service):
+        body = 'title,author,year,pages\n"Multi\nLine Title",Author A,2001,100\nPlain Title,"Doe, Jane",2002,200\n'
+
+        report = import_books(book_service, body, ImportFormat.CSV)
+
+        assert report.imported == 2
+        assert report.failed == 0
+        result = book_service.search_books(SearchRequest(author="Doe, Jane"))
+        assert result.items[0].title == "Plain Title"
+
+    def test_duplicate_title_is_reported(self, book_service, sample_book):
+        body = json.dumps({"title": sample_book.title, "author": "Someone Else", "year": 2001, "pages": 10})
+
+        report = import_books(book_service, body)
+
+        assert report.imported == 0
+        assert report.errors[0].errors == [ErrorMessages.IMPORT_DUPLICATE_TITLE.value]
+
+    def test_upsert_updates_existing_title(self, book_service, sample_book):
+        body = json.dumps({"title": sample_book.title, "author": "Someone Else", "year": 2001, "pages": 10})
+
+        report = import_books(book_service, body, upsert=True)
+
+        assert report.imported == 1
+        assert report.failed == 0
+        assert book_service.get_book(sample_book.id).author == "Someone Else"
@@ -1,7 +1,19 @@
+import time
+from typing import Optional
+
 import pytest
 from fastapi import HTTPException
-from models import BookRequest, SearchRequest, PaginatedResponse, BookResponse
+from pydantic import BaseModel
+from models import Book, BookRequest, GenreRequest, SearchRequest, PaginatedResponse, BookResponse
+from enums import TotalMode
 from error_messages import ErrorMessages
+from service.book_service import settings
+from service.versions import change_feed, versions
+
+
+class YearRow(BaseModel):
+    id: int
+    year: Optional[int]
 
 
 class TestBookService:
@@ -135,6 +147,40 @@ class TestBookService:
         assert result.total_pages == 1
         assert "Smith" in result.items[0].author
 
+    def test_listing_sql_budgets(self, book_service, genre_service, sql_budget):
+        genre = genre_service.create_genre(GenreRequest(name="Budget Genre"))
+        for i in range(12):
+            book = book_service.create_new_book(BookRequest(title=f"Budget Book {i}", author="Budget Author",
+                                                            year=2000, pages=100))
+            book_service.add_book_to_genre(book.id, genre.id)
+
+        with sql_budget(2):  # total, page with genres joined
+            result = book_service.get_all_books(page_size=20)
+            assert len(result.items) == 12
+        with sql_budget(2):  # total, page
+            book_service.search_books(SearchRequest(author="Budget"))
+        with sql_budget(3):  # full-text index check, total, page
+            book_service.search_books(SearchRequest(query="budget"))
+
+    def test_projected_listing_matches_entities(self, book_service, genre_service, test_db, sample_book):
+        genre = genre_service.create_genre(GenreRequest(name="Projected Genre"))
+        other = book_service.create_new_book(BookRequest(title="Projected Book", author="Projected Author",
+                                                         year=1999, pages=120))
+        book_service.add_book_to_genre(other.id, genre.id)
+        test_db.expunge_all()
+
+        result = book_service.get_all_books(page_size=20)
+        assert len(test_db.identity_map) == 0  # rows only, no entities
+        expected = [BookResponse.model_validate(book) for book in test_db.query(Book).order_by(Book.id)]
+        assert result.items == expected
+        assert result.items[0].genre is None
+        assert result.items[1].genre == GenreRequest(id=genre.id, name="Projected Genre")
+
+        page = book_service.get_all_books(page_size=1, cursor="", sort_by="title")
+        assert page.items[0].title == "Projected Book"
+        assert book_service.get_all_books(page_size=1, cursor=page.next_cursor, sort_by="title").items[0].title \
+            == sample_book.title
+
     def test_search_books_no_results(self, book_service, sample_book):
         search_filters = SearchRequest(title="NonexistentBook")
         result = book_service.search_books(search_filters)
@@ -156,3 +202,185 @@ class TestBookService:
         assert exc_info.value.status_code == 404
         assert exc_info.value.detail == ErrorMessages.ENTITY_NOT_FOUND.value
 
+    def test_get_all_books_cursor_pagination(self, book_service):
+        for i in range(25):
+            book_service.create_new_book(
+                BookRequest(title=f"Book {i:02d}", author=f"Author {i}", year=2000 + i % 3, pages=200)
+            )
+
+        seen = []
+        page = book_service.get_all_books(page_size=10, cursor="", sort_by="year")
+        pages = [page]
+        while page.next_cursor:
+            page = book_service.get_all_books(page_size=10, cursor=page.next_cursor, sort_by="year")
+            pages.append(page)
+        for page in pages:
+            seen.extend((book.year, book.id) for book in page.items)
+
+        assert [len(page.items) for page in pages] == [10, 10, 5]
+        assert seen == sorted(seen)
+        assert len(set(seen)) == 25
+        assert pages[0].prev_cursor is None
+
+        previous = book_service.get_all_books(page_size=10, cursor=pages[2].prev_cursor, sort_by="year")
+        assert [book.id for book in previous.items] == [book.id for book in pages[1].items]
+
+    def test_cursor_pages_across_null_sort_values(self, book_service):
+        # The API requires a year, but the column is nullable; page the rows with the generic keyset code
+        book_service.db.add_all([Book(title=f"Undated {i}", author="Anonymous", year=None, pages=100)
+                                 for i in range(3)])
+        book_service.db.add_all([Book(title=f"Dated {i}", author="Someone", year=2000 + i, pages=100)
+                                 for i in range(3)])
+        book_service.db.commit()
+
+        def get_page(cursor: str):
+            return book_service._paginate(book_service.db.query(Book), 1, 2, cursor=cursor, sort_by="year",
+                                          include_total=False, schema=YearRow)
+
+        expected = [row.id for row in book_service.db.query(Book).order_by(Book.year, Book.id)]
+        pages = [get_page("")]
+        while pages[-1].next_cursor:
+            pages.append(get_page(pages[-1].next_cursor))
+        backwards = [pages[-1]]
+        while backwards[-1].prev_cursor:
+            backwards.append(get_page(backwards[-1].prev_cursor))
+
+        assert len(expected) == 6
+        assert [row.id for page in pages for row in page.items] == expected
+        assert [row.id for page in reversed(backwards) for row in page.items] == expected
+
+    def test_get_all_books_invalid_cursor(self, book_service):
+        with pytest.raises(HTTPException) as exc_info:
+            book_service.get_all_books(cursor="not-a-cursor")
+
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail == ErrorMessages.INVALID_CURSOR.value
+
+    def test_get_all_books_total_is_cached_until_write(self, book_service, sample_book, statements):
+        book_service.get_all_books()
+        book_service.get_all_books()
+        counts = [statement for statement in statements if "count(" in statement]
+        assert len(counts) == 1
+
+        book_service.create_new_book(BookRequest(title="Another Book", author="Author", year=2024, pages=10))
+        result = book_service.get_all_books()
+
+        assert result.total_items == 2
+        assert result.total_mode == TotalMode.EXACT
+
+    def test_get_all_books_without_total(self, book_service, sample_book, statements):
+        result = book_service.get_all_books(include_total=False)
+
+        assert len(result.items) == 1
+        assert result.total_items is None
+        assert result.total_pages is None
+        assert result.total_mode is None
+        assert not any("count(" in statement for statement in statements)
+
+    def test_get_all_books_estimated_total(self, book_service, sample_book):
+        result = book_service.get_all_books(total_mode=TotalMode.ESTIMATED.value)
+
+        assert result.total_items == 1
+        assert result.total_mode == TotalMode.ESTIMATED
+
+    def test_search_books_estimated_total_is_exact(self, book_service, sample_book):
+        result = book_service.search_books(SearchRequest(title="Test"), total_mode=TotalMode.ESTIMATED.value)
+
+        assert result.total_items == 1
+        assert result.total_mode == TotalMode.EXACT
+
+    def test_search_books_full_text_ranked_prefix(self, book_service):
+        book_service.create_new_book(
+            BookRequest(title="Python Programming", author="John Doe", year=2024, pages=200)
+        )
+        book_service.create_new_book(
+            BookRequest(title="Cooking for Pythonistas", author="Python Fan", year=2024, pages=200)
+        )
+        book_service.create_new_book(
+            BookRequest(title="Java Programming", author="Jane Smith", year=2024, pages=200)
+        )
+
+        result = book_service.search_books(SearchRequest(query="pyth prog"))
+
+        assert result.total_items == 1
+        assert result.items[0].title == "Python Programming"
+        assert result.items[0].title_highlight == "<mark>Python</mark> <mark>Programming</mark>"
+        assert result.items[0].rank is not None
+
+    def test_search_books_full_text_follows_updates(self, book_service, sample_book):
+        book_service.update_book(
+            sample_book.id, BookRequest(title="Renamed Volume", author="Test Author", year=2010, pages=300)
+        )
+
+        assert book_service.search_books(SearchRequest(query="renamed")).total_items == 1
+        assert book_service.search_books(SearchRequest(query="test book")).total_items == 0
+
+    def test_search_books_full_text_rejects_cursor(self, book_service):
+        with pytest.raises(HTTPException) as exc_info:
+            book_service.search_books(SearchRequest(query="python"), cursor="")
+
+        assert exc_info.value.status_code == 400
+
+    def test_get_books_by_ids_in_request_order(self, book_service, sample_book, sample_genre, statements):
+        other = book_service.create_new_book(BookRequest(title="Other Book", author="Someone", year=2000, pages=10))
+        book_service.add_book_to_genre(other.id, sample_genre.id)
+        change_feed.catch_up(book_service.db)
+        statements.clear()
+
+        result = book_service.get_books_by_ids([other.id, 999, sample_book.id, other.id])
+
+        assert [book.id if book else None for book in result.items] == [other.id, None, sample_book.id, other.id]
+        assert result.items[0].genre.id == sample_genre.id
+        assert result.not_found == [999]
+        assert len(statements) == 1
+
+        statements.clear()
+        book_service.get_books_by_ids([sample_book.id, other.id])
+        assert statements == []
+
+    def test_get_books_by_ids_too_many(self, book_service, monkeypatch):
+        monkeypatch.setattr(settings, "GET_MANY_MAX_IDS", 2)
+
+        with pytest.raises(HTTPException) as exc_info:
+            book_service.get_books_by_ids([1, 2, 3])
+
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail == ErrorMessages.TOO_MANY_IDS.value
+
+    def test_create_book_statements(self, book_service, statements, monkeypatch):
+        # The change log is pruned at most once per tenth of its retention; keep that out of this write
+        monkeypatch.setattr(change_feed, "_pruned_at", time.time())
+
+        book = book_service.create_new_book(BookRequest(title="Returned", author="Writer", year=2001, pages=12))
+
+        # One round trip for the book itself, plus the change_log append other workers invalidate from
+        assert len(statements) == 2
+        assert statements[0].startswith("INSERT INTO books") and "RETURNING" in statements[0]
+        assert statements[1].startswith("INSERT INTO change_log")
+        assert book.id is not None and book.title == "Returned"
+
+    def test_update_book_statements(self, book_service, sample_book, statements, monkeypatch):
+        monkeypatch.setattr(change_feed, "_pruned_at", time.time())
+        db_book = book_service.db.query(Book).filter(Book.id == sample_book.id).one()
+        statements.clear()
+
+        updated = book_service.update(db_book, {"title": "Renamed"})
+
+        # As for creates: the UPDATE ... RETURNING and the change_log append
+        assert len(statements) == 2
+        assert statements[0].startswith("UPDATE books") and "RETURNING" in statements[0]
+        assert statements[1].startswith("INSERT INTO change_log")
+        assert updated.title == "Renamed" and updated.author == sample_book.author
+        assert db_book.title == "Renamed"
+
+    def test_add_book_to_genre_bumps_book_and_genres(self, book_service, sample_book, sample_genre):
+        book_etag = versions.entity_etag("books", sample_book.id, "genres")
+        genre_etag = versions.entity_etag("genres", sample_genre.id, "books")
+        other_etag = versions.entity_etag("books", 999, "genres")
+
+        book_service.add_book_to_genre(sample_book.id, sample_genre.id)
+
+        assert versions.entity_etag("books", sample_book.id, "genres") != book_etag
+        assert versions.entity_etag("genres", sample_genre.id, "books") != genre_etag
+        assert versions.entity_etag("books", 999, "genres") == other_etag
+        assert book_service.get_book(sample_book.id).genre.id == sample_genre.id
@@ -0,0 +1,110 @@
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+import conditional
+from models import Book, BookRequest
+from service.versions import versions
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # The time conditional GETs are answered at; set now to move it
+    clock = SimpleNamespace(now=time.time())
+    monkeypatch.setattr(conditional, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+class TestConditionalGet:
+    def test_book_etag_and_not_modified(self, client, sample_book, statements):
+        first = client.get(f"/book/get/{sample_book.id}")
+        etag = first.headers["etag"]
+        assert first.status_code == 200
+        assert first.headers["cache-control"] == "private, no-cache"
+
+        statements.clear()
+        second = client.get(f"/book/get/{sample_book.id}", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.headers["etag"] == etag
+        assert second.content == b""
+        assert statements == []
+
+    def test_book_update_changes_etag(self, client, book_service, sample_book, sample_genre):
+        etag = client.get(f"/book/get/{sample_book.id}").headers["etag"]
+        other = book_service.create_new_book(BookRequest(title="Other Book", author="Someone", year=2000, pages=10))
+        other_etag = client.get(f"/book/get/{other.id}").headers["etag"]
+
+        book_service.add_book_to_genre(sample_book.id, sample_genre.id)
+
+        response = client.get(f"/book/get/{sample_book.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["genre"]["id"] == sample_genre.id
+        # Only the written book (and its genre) move on
+        assert client.get(f"/book/get/{other.id}", headers={"If-None-Match": other_etag}).status_code == 304
+
+    def test_genre_etag_follows_its_books(self, client, book_service, sample_book, sample_genre):
+        etag = client.get(f"/genre/get/{sample_genre.id}").headers["etag"]
+        assert client.get(f"/genre/get/{sample_genre.id}", headers={"If-None-Match": etag}).status_code == 304
+
+        book_service.add_book_to_genre(sample_book.id, sample_genre.id)
+
+        response = client.get(f"/genre/get/{sample_genre.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["book_count"] == 1
+
+    def test_list_validators(self, client, book_service, sample_book, clock):
+        clock.now += 1
+        first = client.get("/book/get-all")
+        etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+        assert client.get("/book/get-all", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/book/get-all", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+        book_service.update_book(sample_book.id, BookRequest(title="Renamed Book", author="Test Author",
+                                                              year=2010, pages=300))
+
+        response = client.get("/book/get-all", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["items"][0]["title"] == "Renamed Book"
+
+    def test_two_writes_within_one_second(self, client, book_service, sample_book, clock, monkeypatch):
+        second = int(versions.last_modified("books")) + 1
+        monkeypatch.setattr(versions, "_modified", {"books": second + 0.2})
+        clock.now = second + 0.5
+
+        # The second isn't over: a change later in it would carry the same whole-second date
+        first = client.get("/book/get-all")
+        assert "last-modified" not in first.headers
+        stale = {"If-Modified-Since": formatdate(second, usegmt=True)}
+        assert client.get("/book/get-all", headers=stale).status_code == 200
+
+        book_service.update_book(sample_book.id, BookRequest(title="Renamed Book", author="Test Author",
+                                                              year=2010, pages=300))
+        monkeypatch.setattr(versions, "_modified", {"books": second + 0.8})
+        clock.now = second + 1.1
+
+        # Once it is, its date covers both writes
+        response = client.get("/book/get-all")
+        assert response.json()["items"][0]["title"] == "Renamed Book"
+        assert response.headers["last-modified"] == formatdate(second, usegmt=True)
+        assert client.get("/book/get-all", headers=stale).status_code == 304
+
+    def test_rolled_back_write_keeps_etag(self, client, test_db, sample_book):
+        etag = client.get("/book/get-all").headers["etag"]
+
+        test_db.add(Book(title="Never Committed", author="Nobody", year=2000, pages=1))
+        test_db.flush()
+        test_db.rollback()
+
+        assert client.get("/book/get-all", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_bulk_import_changes_every_book_etag(self, client, sample_book):
+        etag = client.get(f"/book/get/{sample_book.id}").headers["etag"]
+        body = '{"title": "Test Book", "author": "Bulk Author", "year": 2011, "pages": 301}\n'
+
+        client.post("/book/import?upsert=true", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+        response = client.get(f"/book/get/{sample_book.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["author"] == "Bulk Author"
@@ -0,0 +1,74 @@
+import os
+import tempfile
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from config import get_settings
+from engine_profile import TimedQueuePool, apply_profile, engine_info, engine_options, sqlite_pragmas
+
+
+def profile(**overrides):
+    return get_settings().model_copy(update=overrides)
+
+
+class TestEngineProfile:
+    def test_engine_options_pool_sizing(self):
+        settings = profile(DATABASE_POOL_SIZE=3, DATABASE_MAX_OVERFLOW=1)
+
+        file_options = engine_options("sqlite:///books.db", settings)
+        assert file_options["pool_size"] == 3 and file_options["max_overflow"] == 1
+        assert file_options["connect_args"] == {"check_same_thread": False}
+        # SQLAlchemy's in-memory SQLite pool takes no overflow
+        assert "max_overflow" not in engine_options("sqlite://", settings)
+
+        null_options = engine_options("sqlite:///books.db", profile(DATABASE_POOL_CLASS="null"))
+        assert null_options["poolclass"] is NullPool and "pool_size" not in null_options
+
+        async_options = engine_options("sqlite+aiosqlite:///books.db", profile(DATABASE_POOL_CLASS="queue"),
+                                       is_async=True)
+        assert async_options["poolclass"] is AsyncAdaptedQueuePool and "connect_args" not in async_options
+
+    def test_timed_pool_keeps_its_name(self):
+        database_url = "sqlite:///books.db"
+        options = engine_options(database_url, profile(METRICS_ENABLED=True), pool_name="writer")
+        engine = create_engine(database_url, **options)
+        try:
+            assert isinstance(engine.pool, TimedQueuePool) and engine.pool.pool_name == "writer"
+            # dispose() recreates the pool from its class
+            engine.dispose()
+            assert engine.pool.pool_name == "writer"
+        finally:
+            engine.dispose()
+
+    def test_pragmas_applied_on_connect(self):
+        settings = profile(SQLITE_JOURNAL_MODE="WAL", SQLITE_SYNCHRONOUS="NORMAL", SQLITE_CACHE_SIZE=-2048,
+                           SQLITE_MMAP_SIZE=None, SQLITE_BUSY_TIMEOUT_MS=1234, SQLITE_TEMP_STORE="MEMORY")
+        assert "mmap_size" not in sqlite_pragmas(settings)
+
+        db_fd, db_path = tempfile.mkstemp(suffix=".db")
+        database_url = f"sqlite:///{db_path}"
+        engine = create_engine(database_url, **engine_options(database_url, settings))
+        apply_profile(engine, settings)
+        try:
+            with engine.connect() as connection:
+                info = engine_info(connection)
+        finally:
+            engine.dispose()
+            os.close(db_fd)
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.unlink(db_path + suffix)
+
+        assert info["pool"]["class"] == "QueuePool"
+        assert info["pragmas"] == {"journal_mode": "wal", "synchronous": 1, "cache_size": -2048, "mmap_size": 0,
+                                   "busy_timeout": 1234, "temp_store": 2}
+
+    def test_db_info(self, client):
+        response = client.get("/admin/db-info")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["profile"]["sqlite_pragmas"] == sqlite_pragmas(get_settings())
+        assert body["engines"]["writer"]["dialect"] == "sqlite"
+        assert "pragmas" in body["engines"]["writer"]
@@ -0,0 +1,91 @@
+import time
+
+from sqlalchemy import text
+
+from cache import TTLCache
+from models import BookRequest
+from service.entity_cache import entity_cache
+from service.versions import change_feed, versions
+
+
+def remote_write(test_db, sql: str, table: str, row_id: int):
+    # What another worker process does: its own connection, its own change_log row, nothing seen locally
+    with test_db.get_bind().connect() as connection:
+        connection.execute(text(sql))
+        connection.execute(text("INSERT INTO change_log (table_name, row_id, changed_at) VALUES (:t, :r, :at)"),
+                           {"t": table, "r": row_id, "at": time.time()})
+        connection.commit()
+    test_db.rollback()  # end the session's read snapshot, as the end of a request would
+
+
+class TestEntityCache:
+    def test_repeat_read_is_served_from_cache(self, book_service, sample_book, statements):
+        assert book_service.get_book(sample_book.id).title == sample_book.title
+        hits = entity_cache.hits
+
+        statements.clear()
+        book = book_service.get_book(sample_book.id)
+
+        assert book.title == sample_book.title
+        assert statements == []
+        assert entity_cache.hits == hits + 1
+
+    def test_local_write_invalidates(self, book_service, genre_service, sample_book, sample_genre):
+        book_service.get_book(sample_book.id)
+        genre_service.get_genre(sample_genre.id)
+
+        book_service.add_book_to_genre(sample_book.id, sample_genre.id)
+
+        assert book_service.get_book(sample_book.id).genre.id == sample_genre.id
+        genre = genre_service.get_genre(sample_genre.id)
+        assert genre.book_count == 1
+        assert genre.books[0].title == sample_book.title
+
+    def test_writes_are_appended_to_the_change_log(self, test_db, book_service, sample_book):
+        book_service.update_book(sample_book.id, BookRequest(title="Logged Update", author="Test Author",
+                                                              year=2010, pages=300))
+
+        rows = test_db.execute(text("SELECT table_name, row_id FROM change_log")).all()
+        assert ("books", sample_book.id) in rows
+
+    def test_local_write_counts_once(self, test_db, book_service, sample_book, monkeypatch):
+        monkeypatch.setattr(change_feed, "poll_seconds", 1e-9)
+        change_feed.catch_up(test_db)
+        etag = versions.entity_etag("books", sample_book.id, "genres")
+        list_etag = versions.table_etag("books")
+
+        book_service.update_book(sample_book.id, BookRequest(title="Counted Once", author="Test Author",
+                                                              year=2010, pages=300))
+        # The feed brings back this process's own change_log rows; they were applied at commit already
+        assert change_feed.catch_up(test_db) == 0
+
+        assert int(versions.entity_etag("books", sample_book.id, "genres").strip('"').split("-")[-1]) == \
+            int(etag.strip('"').split("-")[-1]) + 1
+        assert int(versions.table_etag("books").strip('"').split("-")[-1]) == \
+            int(list_etag.strip('"').split("-")[-1]) + 1
+
+    def test_remote_write_is_seen_after_the_poll_interval(self, test_db, book_service, sample_book, monkeypatch):
+        monkeypatch.setattr(change_feed, "poll_seconds", 3600)
+        book_service.get_book(sample_book.id)
+
+        remote_write(test_db, f"UPDATE books SET author = 'Remote Author' WHERE id = {sample_book.id}",
+                     "books", sample_book.id)
+
+        # Within the bound a cached copy may still be served...
+        assert book_service.get_book(sample_book.id).author == sample_book.author
+        # ...and once it has elapsed the change is replayed before reading
+        monkeypatch.setattr(change_feed, "poll_seconds", 1e-9)
+        assert book_service.get_book(sample_book.id).author == "Remote Author"
+
+    def test_byte_bound_evicts_least_recently_used(self):
+        cache = TTLCache(max_entries=100, ttl_seconds=60, max_bytes=10, sizeof=len)
+        cache.set("a", b"1234")
+        cache.set("b", b"1234")
+        cache.get("a")
+        cache.set("c", b"1234")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1234"
+        assert cache.stats()["bytes"] == 8
+        cache.set("huge", b"x" * 11)
+        assert cache.get("huge") is None
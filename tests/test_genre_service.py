@@ -0,0 +1,111 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+
+from config import get_settings
+from models import Book, BookRequest, Genre, GenreRequest
+from service.genre_service import MAX_COMPOUND_SELECT
+from service.versions import change_feed
+
+settings = get_settings()
+
+
+@pytest.fixture
+def genres_with_books(book_service, genre_service):
+    # Three genres holding 5, 2 and 0 books
+    genres = [genre_service.create_genre(GenreRequest(name=f"Genre {name}")) for name in ("Big", "Small", "Empty")]
+    for genre, count in zip(genres, (5, 2, 0)):
+        for i in range(count):
+            book = book_service.create_new_book(BookRequest(title=f"{genre.name} Book {i}", author="Author",
+                                                            year=2000, pages=100))
+            book_service.add_book_to_genre(book.id, genre.id)
+    return genres
+
+
+class TestGenreService:
+    def test_get_genres_counts_and_caps_books(self, genre_service, genres_with_books):
+        result = genre_service.get_genres(page_size=10, books_limit=3)
+
+        by_name = {genre.name: genre for genre in result.items}
+        assert result.total_items == 3
+        assert [by_name[genre.name].book_count for genre in genres_with_books] == [5, 2, 0]
+        assert [len(by_name[genre.name].books) for genre in genres_with_books] == [3, 2, 0]
+        assert [book.title for book in by_name["Genre Big"].books] == [f"Genre Big Book {i}" for i in range(3)]
+
+    def test_get_genres_statements_per_page(self, genre_service, genres_with_books, statements):
+        genre_service.get_genres(page_size=2, include_total=False)
+        assert len(statements) == 3  # genres page, book counts, book previews
+
+        statements.clear()
+        genre_service.get_genres(page=2, page_size=2, include_total=False)
+        assert len(statements) == 2  # the empty genre needs no preview query
+
+    def test_book_previews_stay_within_sqlite_parameter_limit(self, test_db, genre_service, statements):
+        genres = MAX_COMPOUND_SELECT + 100
+        test_db.execute(insert(Genre), [{"name": f"Chunked Genre {i}"} for i in range(genres)])
+        test_db.execute(insert(Book), [{"title": f"Chunked Book {i}", "author": "Author", "year": 2000, "pages": 10,
+                                        "genre_id": i + 1} for i in range(genres)])
+        test_db.commit()
+        statements.clear()
+
+        result = genre_service.get_genres(page_size=genres, include_total=False, books_limit=1)
+
+        assert all(len(genre.books) == 1 for genre in result.items)
+        # Two preview chunks; SQLite before 3.32 rejects statements with more than 999 bound parameters
+        assert len(statements) == 4
+        assert max(statement.count("?") for statement in statements) <= 999
+
+    def test_get_genres_sql_budget(self, genre_service, genres_with_books, sql_budget):
+        # Book counts and previews are one query each for the whole page, not one per genre
+        with sql_budget(4):
+            genre_service.get_genres(page_size=10)
+
+    def test_get_genres_paginates_genre_rows(self, genre_service, genres_with_books):
+        # Pages are counted in genres, not in joined genre x book rows
+        result = genre_service.get_genres(page_size=1)
+
+        assert result.total_items == 3
+        assert result.total_pages == 3
+        assert len(result.items) == 1
+
+    def test_get_genre_without_books(self, genre_service, genres_with_books, statements):
+        change_feed.catch_up(genre_service.db)  # the first look at the change log, due once per poll interval
+        statements.clear()
+
+        genre = genre_service.get_genre(genres_with_books[0].id, books_limit=0)
+
+        assert genre.book_count == 5
+        assert genre.books == []
+        assert len(statements) == 2
+
+    def test_get_books_by_genre(self, book_service, genres_with_books):
+        result = book_service.get_books_by_genre(genres_with_books[0].id, page=2, page_size=2)
+
+        assert result.total_items == 5
+        assert [book.title for book in result.items] == ["Genre Big Book 2", "Genre Big Book 3"]
+
+        first = book_service.get_books_by_genre(genres_with_books[0].id, page_size=3, cursor="")
+        second = book_service.get_books_by_genre(genres_with_books[0].id, page_size=3, cursor=first.next_cursor)
+        assert [book.title for book in second.items] == ["Genre Big Book 3", "Genre Big Book 4"]
+
+    def test_get_books_by_genre_not_found(self, book_service):
+        with pytest.raises(HTTPException) as exc_info:
+            book_service.get_books_by_genre(999)
+        assert exc_info.value.status_code == 404
+
+    def test_get_genres_by_ids(self, genre_service, genres_with_books):
+        big, small, empty = genres_with_books
+
+        result = genre_service.get_genres_by_ids([empty.id, 999, big.id], books_limit=2)
+
+        assert [genre.name if genre else None for genre in result.items] == [empty.name, None, big.name]
+        assert result.items[2].book_count == 5
+        assert len(result.items[2].books) == 2
+        assert result.not_found == [999]
+
+
+class TestGenreRoutes:
+    def test_get_all_rejects_oversized_page(self, client):
+        response = client.get("/genre/get-all", params={"page_size": settings.GENRE_MAX_PAGE_SIZE + 1})
+
+        assert response.status_code == 422
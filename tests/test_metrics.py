@@ -0,0 +1,57 @@
+from sqlalchemy import create_engine, text
+
+from metrics import SQL_STATEMENT_SECONDS, Counter, Histogram, instrument_engine, statement_labels
+
+
+class TestMetrics:
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = Histogram("test_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, "/book/get/{book_id}")
+
+        lines = list(histogram.render())
+
+        assert '# TYPE test_seconds histogram' in lines
+        assert 'test_seconds_bucket{route="/book/get/{book_id}",le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{route="/book/get/{book_id}",le="1.0"} 3' in lines
+        assert 'test_seconds_bucket{route="/book/get/{book_id}",le="+Inf"} 4' in lines
+        assert 'test_seconds_sum{route="/book/get/{book_id}"} 6.05' in lines
+        assert 'test_seconds_count{route="/book/get/{book_id}"} 4' in lines
+
+    def test_counter_escapes_labels(self):
+        counter = Counter("test_total", "Test counter.", ("path",))
+        counter.inc('a"b')
+        counter.inc('a"b', amount=2)
+
+        assert 'test_total{path="a\\"b"} 3' in list(counter.render())
+
+    def test_statement_labels(self):
+        assert statement_labels('SELECT books.id FROM books WHERE books.id = ?') == ("SELECT", "books")
+        assert statement_labels('INSERT INTO "genres" (name) VALUES (?)') == ("INSERT", "genres")
+        assert statement_labels('UPDATE users SET password=?') == ("UPDATE", "users")
+        assert statement_labels('PRAGMA journal_mode') == ("PRAGMA", "")
+
+    def test_instrumented_engine_times_statements(self):
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+        with engine.connect() as connection:
+            connection.execute(text("CREATE TABLE metric_probe (id INTEGER)"))
+            connection.execute(text("SELECT id FROM metric_probe"))
+            assert connection.info["statement_started"] == []
+        engine.dispose()
+
+        rendered = "\n".join(SQL_STATEMENT_SECONDS.render())
+        assert 'sql_statement_duration_seconds_count{operation="SELECT",table="metric_probe"} ' in rendered
+
+    def test_metrics_endpoint_labels_route_templates(self, client, sample_book):
+        assert client.get(f"/book/get/{sample_book.id}").status_code == 200
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert 'http_requests_total{method="GET",route="/book/get/{book_id}",status="200"}' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/book/get/{book_id}"}' in body
+        assert f'route="/book/get/{sample_book.id}"' not in body
+        assert "# TYPE db_pool_connections_in_use gauge" in body
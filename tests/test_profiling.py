@@ -0,0 +1,61 @@
+from fastapi.testclient import TestClient
+
+import profiling
+from main import app
+from profiling import ProfileStore, ProfilingMiddleware, RequestProfile, collapsed_stacks
+
+
+def synthetic_profile(profile_id: str) -> RequestProfile:
+    profile = RequestProfile(profile_id, "GET /book/get-all", 0.001)
+    route = ("get_all", "/app/routes/book_routes.py", 23)
+    profile.stacks = {
+        (route, ("Cursor.execute", "/site-packages/sqlalchemy/engine/default.py", 920)): 3.0,
+        (route, ("BaseModel.model_validate", "/site-packages/pydantic/main.py", 500)): 2.0,
+        (route,): 1.0,
+    }
+    return profile
+
+
+class TestProfiling:
+    def test_segments_and_formats(self):
+        profile = synthetic_profile("1-ab")
+
+        assert profile.segments() == {"sql": 3.0, "validation": 2.0, "jwt": 0.0, "bcrypt": 0.0, "app": 1.0}
+        speedscope = profile.to_speedscope()
+        assert [frame["name"] for frame in speedscope["shared"]["frames"]] == \
+            ["get_all", "Cursor.execute", "BaseModel.model_validate"]
+        assert speedscope["profiles"][0]["samples"] == [[0, 1], [0, 2], [0]]
+        assert collapsed_stacks(speedscope).splitlines()[0] == \
+            "get_all (book_routes.py:23);Cursor.execute (default.py:920) 3000"
+
+    def test_store_keeps_latest(self, tmp_path):
+        store = ProfileStore(str(tmp_path), max_profiles=2)
+        for started in (1, 2, 3):
+            store.save(synthetic_profile(f"{started}-ab"))
+
+        assert [summary["id"] for summary in store.list()] == ["3-ab", "2-ab"]
+        assert store.get("3-ab")["speedscope"]["name"] == "GET /book/get-all"
+
+    def test_sampled_request_is_profiled(self, client, sample_book, tmp_path, monkeypatch):
+        monkeypatch.setattr(profiling.profile_store, "directory", str(tmp_path))
+        monkeypatch.setattr(profiling.settings, "PROFILING_SAMPLE_RATE", 1.0)
+        profiled = TestClient(ProfilingMiddleware(app))
+
+        response = profiled.get("/book/get-all")
+
+        profile_id = response.headers["x-profile-id"]
+        summary = profiling.profile_store.get(profile_id)["summary"]
+        assert summary["label"] == "GET /book/get-all" and summary["status"] == 200
+        download = client.get(f"/admin/profiles/{profile_id}", params={"format": "collapsed"})
+        assert download.status_code == 200
+        assert "attachment" in download.headers["content-disposition"]
+        assert client.get("/admin/profiles/1-ff").status_code == 404
+
+    def test_header_requires_admin(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(profiling.profile_store, "directory", str(tmp_path))
+        profiled = TestClient(ProfilingMiddleware(app))
+
+        response = profiled.get("/book/get-all", headers={"X-Profile": "1", "Authorization": "Bearer not-a-token"})
+
+        assert "x-profile-id" not in response.headers
+        assert profiling.profile_store.list() == []
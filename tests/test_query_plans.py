@@ -0,0 +1,126 @@
+import asyncio
+import shutil
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+import auth
+from database import Base
+from enums import UserRole
+from initialization import create_admin_user
+from models import Book, Genre, User, SearchRequest
+from query_tracker import install as install_query_tracker, track_queries
+from service import BookService, GenreService, UserService
+from service.cursor import NEXT, encode_cursor
+from service.entity_cache import entity_cache
+from service.versions import change_feed
+
+BOOKS = 20000
+GENRES = 200
+USERS = 2000
+
+# Hot queries by name. Each runs against the seeded catalog; the value is the tables it may read in full, which
+# is only ever a listing that returns (or filters) every row by design.
+HOT_QUERIES = {
+    "book.get_book": (lambda s: s.books.get_book(BOOKS // 2), []),
+    "book.get_books_by_ids": (lambda s: s.books.get_books_by_ids([1, BOOKS // 3, BOOKS]), []),
+    # In id order the page walks the table's rowid B-tree and stops after OFFSET + LIMIT rows, without a sort
+    "book.get_all_books": (lambda s: s.books.get_all_books(page=50, page_size=20), ["books"]),
+    "book.get_all_books_by_title": (lambda s: s.books.get_all_books(page=50, page_size=20, sort_by="title"), []),
+    "book.get_all_books_by_year": (lambda s: s.books.get_all_books(page=50, page_size=20, sort_by="year"), []),
+    "book.get_all_books_keyset": (
+        lambda s: s.books.get_all_books(page_size=20, sort_by="year", include_total=False,
+                                        cursor=encode_cursor("year", (1990, BOOKS // 2), NEXT)), []),
+    "book.get_books_by_genre": (lambda s: s.books.get_books_by_genre(7, page=2, page_size=20), []),
+    "book.search_full_text": (lambda s: s.books.search_books(SearchRequest(query="book 12")), []),
+    # ILIKE '%term%' cannot use a B-tree index; ranked full-text search is the indexed way to search
+    "book.search_substring": (lambda s: s.books.search_books(SearchRequest(author="Author 1")), ["books"]),
+    "book.update_book": (lambda s: s.books.update_book(BOOKS // 2, s.books.schema(
+        title="Updated Plan Book", author="Plan Author", year=2001, pages=10)), []),
+    "book.add_book_to_genre": (lambda s: s.books.add_book_to_genre(BOOKS // 4, 3), []),
+    "book.assign_genre": (lambda s: s.books.assign_genre(5, book_ids=list(range(100, 200))), []),
+    "genre.get_genre": (lambda s: s.genres.get_genre(11), []),
+    # The unfiltered COUNT reads the (small) genres table; the id-ordered page is a rowid walk as above
+    "genre.get_genres": (lambda s: s.genres.get_genres(page=2, page_size=20), ["genres"]),
+    "genre.get_genres_by_name": (lambda s: s.genres.get_genres(page_size=20, sort_by="name", cursor=""), ["genres"]),
+    "user.login_lookup": (lambda s: s.users._get_user_by_username(f"user{USERS // 2}"), []),
+    "user.get_by_id": (lambda s: s.users._get_user_by_id(USERS // 2), []),
+    # The admin listing of every account
+    "user.get_all_users": (lambda s: s.users.get_all_users(), ["users"]),
+    "auth.resolve_principal": (
+        lambda s: asyncio.run(auth.resolve_principal({"sub": f"user{USERS // 3}", "iat": 0}, s.db)), []),
+    # Once per process start; an index on a two-valued role column is ignored as soon as statistics exist
+    "startup.admin_check": (lambda s: create_admin_user(s.db), ["users"]),
+}
+
+
+class Services:
+    def __init__(self, db):
+        self.db = db
+        self.books = BookService(db)
+        self.genres = GenreService(db)
+        self.users = UserService(db)
+
+
+def seed(database_url: str, analyze: bool):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Genre), [{"name": f"Plan Genre {i}"} for i in range(GENRES)])
+        connection.execute(insert(User), [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "password": "hash", "role": UserRole.USER.value}
+            for i in range(USERS)
+        ])
+        connection.execute(insert(Book), [
+            {"title": f"Plan Book {i}", "author": f"Author {i % 997}", "year": 1900 + i % 125, "pages": 50 + i % 900,
+             "genre_id": 1 + i % GENRES}
+            for i in range(BOOKS)
+        ])
+        if analyze:
+            # Planner statistics change index choices; production databases may or may not have them
+            connection.execute(text("ANALYZE"))
+    engine.dispose()
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["no-stats", "analyzed"])
+def seeded_catalog(request, tmp_path_factory):
+    path = tmp_path_factory.mktemp("plans") / "catalog.db"
+    seed(f"sqlite:///{path}", request.param)
+    return path
+
+
+@pytest.fixture
+def large_catalog(seeded_catalog, tmp_path, monkeypatch):
+    # A copy per test, so writes in one test don't reach the next; seeding once keeps the suite fast
+    path = tmp_path / "catalog.db"
+    shutil.copyfile(seeded_catalog, path)
+    engine = create_engine(f"sqlite:///{path}")
+    install_query_tracker(engine)
+    entity_cache.clear()
+    change_feed.clear()
+    # Force the database lookup a trusted role claim or a cached principal would skip
+    monkeypatch.setattr(auth.settings, "TRUST_JWT_ROLE_CLAIM", False)
+    auth.principal_cache.clear()
+    db = Session(engine)
+    try:
+        yield Services(db)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+class TestQueryPlans:
+    @pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+    def test_hot_query_has_no_new_full_table_scan(self, name, large_catalog):
+        query, allowed_scans = HOT_QUERIES[name]
+
+        # slow_ms=0: every statement is explained, not just the slow ones
+        with track_queries(slow_ms=0, label=name) as tracker:
+            query(large_catalog)
+
+        assert tracker.statements > 0
+        scans = {(table, slow["statement"]) for slow in tracker.slow for table in slow["full_table_scans"]
+                 if table not in allowed_scans}
+        assert not scans, f"{name} reads a whole table: {scans}"
+        assert tracker.full_table_scans == sorted(allowed_scans), tracker.report()
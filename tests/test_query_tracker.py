@@ -0,0 +1,71 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+import query_tracker
+from models import Book, BookRequest
+from query_tracker import QueryBudgetExceeded, QueryTrackerMiddleware, full_table_scans, statement_shape
+
+
+@pytest.fixture
+def books(book_service):
+    return [book_service.create_new_book(BookRequest(title=f"Tracked {i}", author="Author", year=2000, pages=10))
+            for i in range(6)]
+
+
+class TestQueryTracker:
+    def test_statement_shape(self):
+        assert statement_shape("SELECT * FROM books WHERE id IN (?, ?, ?)") == \
+            statement_shape("SELECT *  FROM books\nWHERE id IN (?, ?)")
+        assert statement_shape("SELECT * FROM books LIMIT 10") == "SELECT * FROM books LIMIT ?"
+
+    def test_full_table_scans(self):
+        plan = ["SCAN books", "SEARCH genres USING INTEGER PRIMARY KEY (rowid=?)", "SCAN users USING INDEX ix",
+                "SCAN books_fts VIRTUAL TABLE INDEX 0:M1", "CO-ROUTINE anon_1", "SCAN anon_1", "SCAN TABLE genres"]
+        assert full_table_scans(plan) == ["books", "genres"]
+
+    def test_budget_exceeded(self, test_db, books, sql_budget):
+        with pytest.raises(QueryBudgetExceeded, match="more than 1 SQL statements"):
+            with sql_budget(1):
+                test_db.execute(select(Book.id)).all()
+                test_db.execute(select(Book.title)).all()
+
+    def test_n_plus_one_detected(self, test_db, books, sql_budget):
+        with pytest.raises(QueryBudgetExceeded, match="possible N\\+1"):
+            with sql_budget(n_plus_one_threshold=5):
+                for book in books:
+                    test_db.execute(select(Book).where(Book.id == book.id)).scalar_one()
+
+    def test_slow_statements_get_query_plans(self, test_db, books, sql_budget):
+        with sql_budget(slow_ms=0) as tracker:
+            test_db.execute(select(Book).where(Book.author == "Author")).all()
+            test_db.execute(select(Book).where(Book.id == books[0].id)).one()
+
+        assert tracker.statements == 2 and tracker.seconds > 0
+        assert [slow["full_table_scans"] for slow in tracker.slow] == [["books"], []]
+        assert tracker.full_table_scans == ["books"]
+
+    def test_middleware(self, test_db, books, monkeypatch):
+        query_tracker.install(test_db.get_bind())
+        app = FastAPI()
+
+        @app.get("/books/{repeat}")
+        def read_books(repeat: int):
+            for _ in range(repeat):
+                test_db.execute(select(Book.id)).all()
+            return {}
+
+        app.add_middleware(QueryTrackerMiddleware)
+        client = TestClient(app, raise_server_exceptions=False)
+        monkeypatch.setattr(query_tracker.settings, "SQL_ROUTE_BUDGETS", {"/books/{repeat}": 2})
+        QueryTrackerMiddleware.flagged.clear()
+
+        assert client.get("/books/2").status_code == 200
+        assert client.get("/books/3").status_code == 200
+        assert [report["label"] for report in QueryTrackerMiddleware.flagged] == ["GET /books/{repeat}"]
+        assert QueryTrackerMiddleware.flagged[0]["statements"] == 3
+
+        monkeypatch.setattr(query_tracker.settings, "SQL_BUDGET_ACTION", "raise")
+        assert client.get("/books/2").status_code == 200
+        assert client.get("/books/3").status_code == 500
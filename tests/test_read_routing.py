@@ -0,0 +1,100 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from config import get_settings
+from database import Base, RoutingSession
+from engine_profile import PoolMetrics, apply_profile, engine_options, is_single_writer, read_url
+from models import Book, BookRequest, SearchRequest
+from service.book_service import BookService
+from service.genre_service import GenreService
+
+
+@pytest.fixture
+def routed():
+    # A writer and a read-only reader engine on the same temporary SQLite file, with the statements each ran
+    settings = get_settings()
+    db_fd, db_path = tempfile.mkstemp(suffix=".db")
+    writer_url = f"sqlite:///{db_path}"
+    reader_url = read_url(writer_url, settings)
+    writer_options = engine_options(writer_url, settings, single_writer=True)
+    writer = create_engine(writer_url, **writer_options)
+    reader_options = engine_options(reader_url, settings)
+    reader = create_engine(reader_url, **reader_options)
+    executed = {"writer": [], "reader": []}
+    for name, engine in (("writer", writer), ("reader", reader)):
+        apply_profile(engine, settings)
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args, name=name: executed[name].append(statement))
+    Base.metadata.create_all(writer)
+    metrics = {"writer": PoolMetrics(writer, writer_options["max_overflow"]),
+               "reader": PoolMetrics(reader, reader_options["max_overflow"])}
+    executed["writer"].clear()
+
+    Session = sessionmaker(class_=RoutingSession, autoflush=False, bind=writer, reader=reader)
+    try:
+        yield Session, executed, metrics
+    finally:
+        writer.dispose()
+        reader.dispose()
+        os.close(db_fd)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+
+class TestReadRouting:
+    def test_read_url(self):
+        settings = get_settings()
+        assert read_url("sqlite:////data/books.db", settings) == "sqlite:///file:/data/books.db?mode=ro&uri=true"
+        assert read_url("sqlite://", settings) is None
+        assert read_url("postgresql://db/books", settings) is None
+        assert read_url("postgresql://db/books", settings, "postgresql://replica/books") == \
+            "postgresql://replica/books"
+        assert read_url("sqlite:///books.db", settings.model_copy(update={"DATABASE_READ_ROUTING": False})) is None
+        assert is_single_writer("sqlite:///books.db", settings)
+        assert not is_single_writer("sqlite://", settings)
+
+    def test_reads_go_to_reader(self, routed):
+        Session, executed, _ = routed
+        with Session() as db:
+            BookService(db).get_all_books()
+            BookService(db).search_books(SearchRequest(title="anything"))
+            GenreService(db).get_genres()
+
+        assert executed["writer"] == []
+        assert any("FROM books" in statement for statement in executed["reader"])
+
+    def test_session_reads_its_writes_from_writer(self, routed):
+        Session, executed, _ = routed
+        with Session() as db:
+            service = BookService(db)
+            created = service.create_new_book(BookRequest(title="Routed", author="Writer", year=2001, pages=5))
+            executed["reader"].clear()
+
+            assert service.get_all_books().items[0].id == created.id
+            assert executed["reader"] == []
+
+        with Session() as db:
+            BookService(db).get_all_books()
+        assert executed["reader"]
+
+    def test_reader_is_read_only(self, routed):
+        Session, _, _ = routed
+        with Session() as db, db.reader.connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.execute(insert(Book).values(title="Nope", author="Nobody", year=1, pages=1))
+
+    def test_pool_metrics(self, routed):
+        Session, _, metrics = routed
+        with Session() as db:
+            BookService(db).get_all_books()
+
+        reader_stats = metrics["reader"].stats()
+        assert reader_stats["checkouts"] >= 1 and reader_stats["in_use"] == 0
+        assert metrics["writer"].stats()["size"] == 1
+        assert metrics["writer"].capacity() == 1
@@ -0,0 +1,139 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, text
+
+import database
+from hashing import password_hasher
+from initialization import migrate
+from server import WORKER_BOOT_ERROR
+from service.versions import change_feed, versions
+from startup import worker_startup
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, port: int, workers: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, '-m', 'server', '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+         '--graceful-timeout', '5'],
+        cwd=ROOT, env=dict(os.environ, DATABASE_URL=database_url), stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def ready_workers(port: int, workers: int, timeout: float = 30) -> set[int]:
+    pids = set()
+    deadline = time.monotonic() + timeout
+    while len(pids) < workers and time.monotonic() < deadline:
+        try:
+            response = httpx.get(f'http://127.0.0.1:{port}/health/ready', timeout=1)
+            if response.status_code == 200:
+                pids.add(response.json()['pid'])
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    return pids
+
+
+@pytest.fixture
+def migrated_url(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'server.db'}"
+    engine = create_engine(database_url)
+    migrate(engine)
+    engine.dispose()
+    return database_url
+
+
+class TestForkSafety:
+    def test_child_gets_own_pools_and_startup(self):
+        with database.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        parent_pool = database.engine.pool
+        read, write = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read)
+                with database.engine.connect() as connection:
+                    connection.execute(text('SELECT 1'))
+                state = {
+                    'new_pool': database.engine.pool is not parent_pool,
+                    'startup_pid': worker_startup.pid == os.getpid(),
+                    'startup_ready': worker_startup.ready,
+                    'hash_pool': password_hasher._executor is None,
+                }
+                os.write(write, json.dumps(state).encode())
+            finally:
+                os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as child_output:
+            state = json.loads(child_output.read())
+        os.waitpid(pid, 0)
+
+        assert state == {'new_pool': True, 'startup_pid': True, 'startup_ready': False, 'hash_pool': True}
+        assert database.engine.pool is parent_pool
+
+    def test_child_issues_own_etags(self, test_db):
+        versions.changed('books', 1)
+        change_feed.catch_up(test_db)
+        parent_etags = [versions.table_etag('books'), versions.entity_etag('books', 1)]
+        read, write = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read)
+                # The same change in the child must not produce the parent's validators
+                versions.changed('books', 1)
+                state = {
+                    'etags': [versions.table_etag('books'), versions.entity_etag('books', 1)],
+                    'epoch': versions.epoch,
+                    'positions': change_feed.stats()['last_seq'],
+                }
+                os.write(write, json.dumps(state).encode())
+            finally:
+                os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as child_output:
+            state = json.loads(child_output.read())
+        os.waitpid(pid, 0)
+
+        assert state['epoch'] != versions.epoch
+        assert not set(state['etags']) & set(parent_etags)
+        assert state['positions'] == {}
+        assert [versions.table_etag('books'), versions.entity_etag('books', 1)] == parent_etags
+
+
+class TestServer:
+    def test_workers_serve_and_stop_gracefully(self, migrated_url):
+        port = free_port()
+        server = start_server(migrated_url, port, workers=2)
+        try:
+            pids = ready_workers(port, workers=2)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            status = server.wait(timeout=30)
+
+        assert len(pids) == 2
+        assert server.pid not in pids
+        assert status == 0
+
+    def test_worker_boot_failure_stops_server(self, tmp_path):
+        # Not migrated: the workers' schema check fails
+        server = start_server(f"sqlite:///{tmp_path / 'empty.db'}", free_port(), workers=2)
+
+        assert server.wait(timeout=30) == WORKER_BOOT_ERROR
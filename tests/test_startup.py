@@ -0,0 +1,110 @@
+import asyncio
+import os
+import threading
+
+import pytest
+from alembic.script import ScriptDirectory
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+import startup
+from database import Base
+from enums import UserRole
+from initialization import (SCHEMA_REVISION, _alembic_config, bootstrap_lock, create_admin_user, migrate,
+                            schema_revision)
+from main import app
+from models import User
+
+
+@pytest.fixture
+def empty_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bootstrap.db'}")
+    yield engine
+    engine.dispose()
+
+
+class TestMigrate:
+    def test_schema_revision_is_alembic_head(self, empty_engine):
+        with empty_engine.connect() as connection:
+            script = ScriptDirectory.from_config(_alembic_config(connection))
+
+        assert script.get_current_head() == SCHEMA_REVISION
+
+    def test_creates_and_stamps_empty_database(self, empty_engine):
+        assert migrate(empty_engine) == "created"
+        assert migrate(empty_engine) == "up to date"
+
+        with empty_engine.connect() as connection:
+            assert schema_revision(connection) == SCHEMA_REVISION
+            assert connection.execute(text("SELECT COUNT(*) FROM books")).scalar() == 0
+
+    def test_upgrades_stamped_database(self, empty_engine):
+        migrate(empty_engine)
+        with empty_engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_users_username"))
+            connection.execute(text("UPDATE alembic_version SET version_num = 'c5e2d8a41f93'"))
+
+        assert migrate(empty_engine) == "upgraded from c5e2d8a41f93"
+
+        with empty_engine.connect() as connection:
+            assert schema_revision(connection) == SCHEMA_REVISION
+
+    def test_refuses_unmanaged_database(self, empty_engine):
+        Base.metadata.create_all(bind=empty_engine)
+
+        with pytest.raises(RuntimeError):
+            migrate(empty_engine)
+
+
+class TestBootstrap:
+    def test_concurrent_bootstraps_create_one_admin(self, empty_engine, tmp_path):
+        migrate(empty_engine)
+        lock_path = str(tmp_path / "bootstrap.lock")
+        errors = []
+
+        def bootstrap():
+            try:
+                with bootstrap_lock(lock_path), Session(empty_engine) as db:
+                    create_admin_user(db)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=bootstrap) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        with Session(empty_engine) as db:
+            assert db.query(User).filter(User.role == UserRole.ADMIN.value).count() == 1
+
+
+class TestWorkerStartup:
+    def test_schema_check_rejects_outdated_database(self, empty_engine, monkeypatch):
+        migrate(empty_engine)
+        with empty_engine.begin() as connection:
+            connection.execute(text("UPDATE alembic_version SET version_num = 'c5e2d8a41f93'"))
+        monkeypatch.setattr("database.engine", empty_engine)
+
+        with pytest.raises(RuntimeError, match="c5e2d8a41f93"):
+            startup.check_schema()
+
+    def test_start_records_phases(self, test_db):
+        worker = startup.WorkerStartup(startup.IMPORT_STARTED)
+        worker.imported()
+
+        asyncio.run(worker.start())
+
+        report = worker.report()
+        assert report["ready"]
+        assert report["pid"] == os.getpid()
+        assert set(report["phases_ms"]) == {"import", "schema_check", "pool_warmup", "ready"}
+
+    def test_ready_after_lifespan(self, test_db):
+        with TestClient(app) as client:
+            response = client.get("/health/ready")
+
+        assert response.status_code == 200
+        assert response.json()["ready"]
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from error_messages import ErrorMessages
+from hashing import PasswordHasher
+from models import UserRequest, LoginRequest, ChangePasswordRequest
+
+
+def sign_up(user_service, username="reader", password="secret"):
+    return asyncio.run(user_service.sign_up(
+        UserRequest(username=username, email=f"{username}@example.com", password=password, role="USER")
+    ))
+
+
+class TestUserService:
+    def test_sign_up_stores_hash(self, user_service):
+        user = sign_up(user_service)
+
+        assert user.password != "secret"
+        assert user.password.startswith("$2b$")
+
+    def test_sign_up_duplicate_username(self, user_service):
+        sign_up(user_service)
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(user_service.sign_up(
+                UserRequest(username="reader", email="other@example.com", password="secret", role="USER")
+            ))
+
+        assert exc_info.value.status_code == 409
+        assert exc_info.value.detail == ErrorMessages.DUPLICATE_USER.value
+
+    def test_login_success(self, user_service):
+        sign_up(user_service)
+
+        response = asyncio.run(user_service.login(LoginRequest(username="reader", password="secret")))
+
+        assert response.username == "reader"
+        assert response.access_token
+
+    def test_login_wrong_password(self, user_service):
+        sign_up(user_service)
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(user_service.login(LoginRequest(username="reader", password="wrong")))
+
+        assert exc_info.value.status_code == 401
+        assert exc_info.value.detail == ErrorMessages.INCORRECT_CREDENTIALS.value
+
+    def test_change_password(self, user_service):
+        user = sign_up(user_service)
+
+        asyncio.run(user_service.change_password(
+            ChangePasswordRequest(id=user.id, username="reader", old_password="secret", new_password="changed")
+        ))
+        response = asyncio.run(user_service.login(LoginRequest(username="reader", password="changed")))
+
+        assert response.username == "reader"
+
+
+class TestPasswordHasher:
+    def test_hash_and_verify(self):
+        hasher = PasswordHasher(workers=0, max_in_flight=4)
+        try:
+            hashed = asyncio.run(hasher.hash("secret"))
+
+            assert asyncio.run(hasher.verify("secret", hashed))
+            assert not asyncio.run(hasher.verify("wrong", hashed))
+            assert hasher.stats()["completed"] == 3
+            assert hasher.stats()["in_flight"] == 0
+        finally:
+            hasher.shutdown()
+
+    def test_rejects_when_full(self):
+        hasher = PasswordHasher(workers=0, max_in_flight=0)
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(hasher.hash("secret"))
+
+        assert exc_info.value.status_code == 503
+        assert hasher.stats()["rejected"] == 1